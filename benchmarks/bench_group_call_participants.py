@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Micro-benchmark of the participants of group calls: the participants info
+added by the interpretation, then merged with the participants of the
+channels. Half of the members are reached through a channel. Best CPU time
+of a few runs.
+
+The merge must scale linearly with the members: from the smallest to the
+largest group, the time per call must grow like the members (e.g. 4x from 50
+to 200 members), not like their square (16x). The benchmark fails when the
+growth is closer to quadratic than to linear.
+
+usage: PYTHONPATH=. python3 benchmarks/bench_group_call_participants.py [MEMBERS ...]
+"""
+
+import sys
+import time
+
+from wazo_call_logd.generator import _ParticipantsProcessor
+from wazo_call_logd.participant import ParticipantInfo, ResolvedParticipants
+from wazo_call_logd.raw_call_log import RawCallLog
+
+DEFAULT_MEMBERS = (50, 200)
+CALLS = 100
+REPEAT = 5
+
+
+def resolved_participants(members):
+    participants = [
+        ParticipantInfo(f'user-{i}', 'tenant', i, [], None) for i in range(members)
+    ]
+    return ResolvedParticipants(
+        by_line_name={
+            'caller': None,
+            **{f'line{i}': participant for i, participant in enumerate(participants)},
+        },
+        by_user_uuid={participant.uuid: participant for participant in participants},
+    )
+
+
+def group_call(members):
+    call_log = RawCallLog()
+    call_log.raw_participants['PJSIP/caller-00000001'].update(role='source')
+    for i in range(0, members, 2):
+        call_log.raw_participants[f'PJSIP/line{i}-00000001'].update(
+            role='destination', answered=False
+        )
+    for i in range(members):
+        call_log.add_participants_info(
+            {'user_uuid': f'user-{i}', 'role': 'destination', 'requested': False}
+        )
+    # e.g. WAZO_USER_MISSED_CALL events of every member
+    for i in range(members):
+        call_log.insert_or_update_participants_info(
+            {'user_uuid': f'user-{i}', 'role': 'destination', 'answered': False}
+        )
+    return call_log
+
+
+def fetch_participants(members, resolved):
+    for _ in range(CALLS):
+        processor = _ParticipantsProcessor(None, resolved_participants=resolved)
+        processor(group_call(members))
+
+
+def timed(function, *args):
+    start = time.process_time()
+    function(*args)
+    return time.process_time() - start
+
+
+def main():
+    sizes = sorted(int(size) for size in sys.argv[1:]) or DEFAULT_MEMBERS
+    print(f'{"members":>10} {"us/call":>10} {"us/member":>10}')
+    elapsed_by_size = {}
+    for members in sizes:
+        resolved = resolved_participants(members)
+        elapsed = min(
+            timed(fetch_participants, members, resolved) for _ in range(REPEAT)
+        )
+        elapsed_by_size[members] = elapsed
+        per_call = elapsed / CALLS * 1e6
+        print(f'{members:>10} {per_call:>10.1f} {per_call / members:>10.2f}')
+
+    smallest, largest = sizes[0], sizes[-1]
+    if smallest == largest:
+        return
+    size_ratio = largest / smallest
+    growth = elapsed_by_size[largest] / elapsed_by_size[smallest]
+    print(
+        f'{smallest} -> {largest} members: {growth:.1f}x '
+        f'(linear: {size_ratio:.0f}x, quadratic: {size_ratio**2:.0f}x)'
+    )
+    # NOTE: the geometric mean of the linear and quadratic growths
+    if growth > size_ratio**1.5:
+        sys.exit('the participants merge does not scale linearly')
+
+
+if __name__ == '__main__':
+    main()
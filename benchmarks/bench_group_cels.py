@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Micro-benchmark of the correlation of CELs sharing channels
+
+usage: PYTHONPATH=. python3 benchmarks/bench_group_cels.py [SIZE ...]
+"""
+
+import sys
+import time
+
+from synthetic_cels import generate_cels
+
+from wazo_call_logd.generator import _group_cels_by_shared_channels
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES
+    print(f'{"CELs":>10} {"groups":>10} {"seconds":>10} {"CELs/s":>12}')
+    for size in sizes:
+        cels = generate_cels(size)
+        start = time.perf_counter()
+        groups = sum(1 for _ in _group_cels_by_shared_channels(cels))
+        elapsed = time.perf_counter() - start
+        print(
+            f'{len(cels):>10} {groups:>10} {elapsed:>10.3f} {len(cels) / elapsed:>12.0f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
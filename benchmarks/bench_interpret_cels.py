@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Micro-benchmark of the interpretation of the CELs of each call, best CPU
+time of a few runs
+
+usage: PYTHONPATH=. python3 benchmarks/bench_interpret_cels.py [SIZE ...]
+"""
+
+import sys
+import time
+
+from synthetic_cels import generate_cels
+
+from wazo_call_logd.cel_interpretor import default_interpretors
+from wazo_call_logd.cel_sequence import CelSequence
+from wazo_call_logd.generator import _group_cels_by_shared_channels
+from wazo_call_logd.raw_call_log import RawCallLog
+
+DEFAULT_SIZES = (10_000, 100_000)
+REPEAT = 5
+
+
+def interpret(groups):
+    interpretors = default_interpretors()
+    for _, cels in groups:
+        cels = CelSequence(cels)
+        interpretor = next(i for i in interpretors if i.can_interpret(cels))
+        interpretor.interpret_cels(cels, RawCallLog())
+
+
+def timed(function, *args):
+    start = time.process_time()
+    function(*args)
+    return time.process_time() - start
+
+
+def main():
+    sizes = [int(size) for size in sys.argv[1:]] or DEFAULT_SIZES
+    print(f'{"CELs":>10} {"calls":>10} {"seconds":>10} {"us/call":>10}')
+    for size in sizes:
+        groups = list(_group_cels_by_shared_channels(generate_cels(size)))
+        elapsed = min(timed(interpret, groups) for _ in range(REPEAT))
+        print(
+            f'{size:>10} {len(groups):>10} {elapsed:>10.3f}'
+            f' {elapsed / len(groups) * 1e6:>10.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
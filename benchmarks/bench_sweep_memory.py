@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""
+Memory benchmark of the interpretation of a sweep, keeping every interpreted
+call until the participants are fetched, like the generator does. Reports the
+growth of the peak RSS of the process during the interpretation.
+
+usage: PYTHONPATH=. python3 benchmarks/bench_sweep_memory.py [CALLS]
+"""
+
+import resource
+import sys
+
+from synthetic_cels import generate_cels
+
+from wazo_call_logd.cel_interpretor import default_interpretors
+from wazo_call_logd.cel_sequence import CelSequence
+from wazo_call_logd.generator import _group_cels_by_shared_channels
+from wazo_call_logd.raw_call_log import RawCallLog
+
+DEFAULT_CALLS = 100_000
+# two channels per call, and a third one for a tenth of the calls
+CELS_PER_CALL = 11.5
+
+
+def peak_rss_kib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def interpret(groups):
+    interpretors = default_interpretors()
+    call_logs = []
+    for _, cels in groups:
+        cels = CelSequence(cels)
+        interpretor = next(i for i in interpretors if i.can_interpret(cels))
+        call_logs.append(interpretor.interpret_cels(cels, RawCallLog()))
+    return call_logs
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CALLS
+    groups = list(_group_cels_by_shared_channels(generate_cels(calls * CELS_PER_CALL)))
+
+    before = peak_rss_kib()
+    call_logs = interpret(groups)
+    growth = peak_rss_kib() - before
+
+    print(f'{"calls":>10} {"peak RSS growth (MiB)":>22} {"bytes/call":>12}')
+    print(
+        f'{len(call_logs):>10} {growth / 1024:>22.1f} {growth * 1024 / len(call_logs):>12.0f}'
+    )
+
+
+if __name__ == '__main__':
+    main()
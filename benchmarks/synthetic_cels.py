@@ -0,0 +1,77 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import json
+import random
+from collections.abc import Iterator
+from datetime import datetime, timedelta, timezone
+
+from wazo_call_logd.database.queries.cel import CELRow
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _call_cels(
+    id_: int, linkedid: str, uniqueids: list[str], eventtime: datetime
+) -> Iterator[CELRow]:
+    channames = {
+        uniqueid: f'PJSIP/line{i}-{uniqueid}' for i, uniqueid in enumerate(uniqueids)
+    }
+    bridge_extra = json.dumps(
+        {'bridge_id': linkedid, 'bridge_technology': 'simple_bridge'}
+    )
+
+    def cel(eventtype, uniqueid, **kwargs):
+        return CELRow(
+            id_,
+            eventtype,
+            eventtime,
+            uniqueid,
+            linkedid,
+            cid_name=f'Caller {linkedid}',
+            cid_num='1001',
+            exten='1002',
+            context='default',
+            channame=channames[uniqueid],
+            **kwargs,
+        )
+
+    for uniqueid in uniqueids:
+        yield cel('CHAN_START', uniqueid)
+        id_ += 1
+    for uniqueid in uniqueids:
+        yield cel('ANSWER', uniqueid)
+        id_ += 1
+        yield cel('BRIDGE_ENTER', uniqueid, extra=bridge_extra)
+        id_ += 1
+    for uniqueid in uniqueids:
+        yield cel('HANGUP', uniqueid)
+        id_ += 1
+        yield cel('CHAN_END', uniqueid)
+        id_ += 1
+    yield cel('LINKEDID_END', uniqueids[-1])
+
+
+def generate_cels(
+    count: int, correlation_ratio: float = 0.1, seed: int = 0
+) -> list[CELRow]:
+    """
+    Generate about `count` CELs of two-channel calls. A `correlation_ratio` of
+    the calls share a channel with a previous call (e.g. transfers, pickups).
+    """
+    rng = random.Random(seed)
+    cels: list[CELRow] = []
+    uniqueids: list[str] = []
+    call = 0
+    while len(cels) < count:
+        linkedid = f'{1700000000 + call}.{call}'
+        call_uniqueids = [linkedid, f'{linkedid}1']
+        if uniqueids and rng.random() < correlation_ratio:
+            call_uniqueids.append(rng.choice(uniqueids[-1000:]))
+        uniqueids.extend(call_uniqueids[:2])
+        eventtime = START + timedelta(seconds=call)
+        cels.extend(_call_cels(len(cels) + 1, linkedid, call_uniqueids, eventtime))
+        call += 1
+    return cels
@@ -1,4 +1,4 @@
-# Copyright 2017-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from datetime import datetime as dt
@@ -9,11 +9,13 @@ from hamcrest import (
     contains_exactly,
     contains_inanyorder,
     empty,
+    equal_to,
     has_entries,
     has_length,
     has_properties,
     has_property,
 )
+from sqlalchemy import event
 
 from wazo_call_logd.database.models import CallLog, CallLogParticipant, Recording
 from wazo_call_logd.database.queries.call_log import ListParams
@@ -246,6 +248,145 @@ class TestCallLog(DBIntegrationTest):
             self.session.query(CallLogParticipant).delete()
             self.session.query(Recording).delete()
 
+    def test_create_from_list_populates_call_logs(self):
+        call_log = CallLog(
+            date=NOW,
+            tenant_uuid=str(MASTER_TENANT),
+            participants=[
+                CallLogParticipant(role='source', user_uuid=str(USER_1_UUID)),
+                CallLogParticipant(
+                    role='destination', user_uuid=str(USER_2_UUID), answered=True
+                ),
+            ],
+            recordings=[Recording(start_time=NOW, end_time=NOW)],
+        )
+
+        self.dao.call_log.create_from_list([call_log])
+
+        assert_that(
+            call_log,
+            has_properties(
+                id=self.session.query(CallLog.id).scalar(),
+                source_user_uuid=str(USER_1_UUID),
+                destination_user_uuid=str(USER_2_UUID),
+                recordings=contains_exactly(
+                    has_properties(call_log_id=call_log.id, call_log=call_log)
+                ),
+            ),
+        )
+
+        with transaction(self.session):
+            self.session.query(CallLog).delete()
+
+    def test_create_from_list_statement_count(self):
+        call_logs = [
+            CallLog(
+                date=NOW,
+                tenant_uuid=str(MASTER_TENANT),
+                participants=[
+                    CallLogParticipant(role='source', user_uuid=str(USER_1_UUID))
+                ],
+                recordings=[Recording(start_time=NOW, end_time=NOW)],
+            )
+            for _ in range(100)
+        ]
+        statements = []
+
+        def count_statement(*args):
+            statements.append(args)
+
+        engine = self.session.get_bind()
+        event.listen(engine, 'before_cursor_execute', count_statement)
+        try:
+            self.dao.call_log.create_from_list(call_logs)
+        finally:
+            event.remove(engine, 'before_cursor_execute', count_statement)
+
+        # ids, call logs, participants and recordings
+        assert_that(statements, has_length(4))
+        assert_that(self.session.query(CallLog).count(), equal_to(100))
+
+        with transaction(self.session):
+            self.session.query(CallLog).delete()
+
+    def test_update_from_list(self):
+        existing = CallLog(
+            date=NOW,
+            tenant_uuid=str(MASTER_TENANT),
+            conversation_id='1.1',
+            source_name='before',
+            participants=[
+                CallLogParticipant(role='source', user_uuid=str(USER_1_UUID)),
+                CallLogParticipant(role='destination', user_uuid=str(USER_2_UUID)),
+            ],
+        )
+        other = CallLog(date=NOW, tenant_uuid=str(MASTER_TENANT), conversation_id='2.2')
+        self.dao.call_log.create_from_list([existing, other])
+        source_uuid = existing.participants[0].uuid
+
+        regenerated = CallLog(
+            date=NOW,
+            tenant_uuid=str(MASTER_TENANT),
+            conversation_id='1.1',
+            source_name='after',
+            participants=[
+                CallLogParticipant(role='source', user_uuid=str(USER_1_UUID)),
+                CallLogParticipant(role='destination', user_uuid=str(USER_3_UUID)),
+            ],
+        )
+        new = CallLog(date=NOW, tenant_uuid=str(MASTER_TENANT), conversation_id='3.3')
+
+        result = self.dao.call_log.update_from_list(
+            [regenerated, new], [existing.id, other.id]
+        )
+
+        assert_that(result, contains_exactly(regenerated))
+        assert_that(
+            regenerated,
+            has_properties(
+                id=existing.id,
+                source_user_uuid=str(USER_1_UUID),
+                destination_user_uuid=str(USER_3_UUID),
+            ),
+        )
+        assert_that(
+            self.session.query(CallLog).get(existing.id),
+            has_properties(
+                source_name='after',
+                participants=contains_inanyorder(
+                    has_properties(uuid=source_uuid, user_uuid=str(USER_1_UUID)),
+                    has_properties(role='destination', user_uuid=str(USER_3_UUID)),
+                ),
+            ),
+        )
+        assert_that(self.session.query(CallLogParticipant).count(), equal_to(2))
+
+        with transaction(self.session):
+            self.session.query(CallLog).delete()
+
+    def test_find_and_clear_enrichment_pending(self):
+        pending = CallLog(
+            date=NOW,
+            tenant_uuid=str(MASTER_TENANT),
+            conversation_id='1.1',
+            enrichment_pending=True,
+        )
+        enriched = CallLog(
+            date=NOW, tenant_uuid=str(MASTER_TENANT), conversation_id='2.2'
+        )
+        self.dao.call_log.create_from_list([pending, enriched])
+
+        result = self.dao.call_log.find_enrichment_pending(limit=10)
+
+        assert_that(result, contains_exactly((pending.id, '1.1')))
+
+        self.dao.call_log.clear_enrichment_pending([pending.id])
+
+        assert_that(self.dao.call_log.find_enrichment_pending(limit=10), empty())
+
+        with transaction(self.session):
+            self.session.query(CallLog).delete()
+
     @call_log(**cdr(id_=1))
     @call_log(**cdr(id_=2))
     @call_log(**cdr(id_=3))
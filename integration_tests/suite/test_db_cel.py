@@ -1,4 +1,4 @@
-# Copyright 2013-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from datetime import timedelta as td
@@ -9,8 +9,11 @@ from hamcrest import (
     contains_exactly,
     contains_inanyorder,
     empty,
+    has_entries,
+    has_length,
     has_properties,
     has_property,
+    only_contains,
 )
 from xivo_dao.alchemy.cel import CEL
 
@@ -109,6 +112,24 @@ class TestCEL(DBIntegrationTest):
             ),
         )
 
+    @cel(linkedid='1', call_log_id=1)
+    @cel(linkedid='2', call_log_id=2)
+    @cel(linkedid='3', call_log_id=3)
+    def test_unassociate_all_in_batches(self, cel1, cel2, cel3):
+        self.dao.cel.unassociate_all(batch_size=2)
+        cels = [cel1['id'], cel2['id'], cel3['id']]
+        result = self.cel_session.query(CEL).filter(CEL.id.in_(cels)).all()
+        assert_that(result, only_contains(has_properties(call_log_id=None)))
+
+    @cel(linkedid='1', call_log_id=1)
+    @cel(linkedid='2', call_log_id=2)
+    @cel(linkedid='3', call_log_id=3)
+    def test_unassociate_many_call_logs_in_batches(self, cel1, cel2, cel3):
+        self.dao.cel.unassociate_all_from_call_log_ids([1, 2, 3], batch_size=2)
+        cels = [cel1['id'], cel2['id'], cel3['id']]
+        result = self.cel_session.query(CEL).filter(CEL.id.in_(cels)).all()
+        assert_that(result, only_contains(has_properties(call_log_id=None)))
+
     def test_find_last_unprocessed_no_cels(self):
         result = self.dao.cel.find_last_unprocessed()
 
@@ -228,6 +249,33 @@ class TestCEL(DBIntegrationTest):
             ),
         )
 
+    @cel(linkedid='666')
+    @cel(linkedid='2')
+    @cel(linkedid='777')
+    def test_find_from_linked_ids(self, cel1, _, cel3):
+        result = self.dao.cel.find_from_linked_ids(['666', '777'])
+        assert_that(
+            result,
+            contains_inanyorder(
+                has_property('id', cel1['id']),
+                has_property('id', cel3['id']),
+            ),
+        )
+
+    @cel(linkedid='666', uniqueid='1', eventtype='CHAN_START')
+    @cel(linkedid='2')
+    @cel(linkedid='666', uniqueid='1', eventtype='HANGUP', call_log_id=42)
+    def test_find_ids_from_linked_ids(self, cel1, _, cel3):
+        result = self.dao.cel.find_ids_from_linked_ids(['666'])
+        assert_that(result, has_entries({'666': has_length(2)}))
+        assert_that(
+            [row[:2] + row[3:] for row in result['666']],
+            contains_inanyorder(
+                ('1', 'CHAN_START', cel1['id'], None),
+                ('1', 'HANGUP', cel3['id'], 42),
+            ),
+        )
+
     @cel(linkedid='666', eventtime=NOW)
     @cel(linkedid='666', eventtime=NOW - td(hours=1))
     @cel(linkedid='666', eventtime=NOW + td(hours=1))
@@ -296,3 +344,81 @@ class TestCEL(DBIntegrationTest):
         older = NOW - td(hours=1)
         result = self.dao.cel.find_last_unprocessed(older=older)
         assert_that(result, empty())
+
+    @cel(linkedid='1', eventtime=NOW - td(hours=2))  # excluded
+    @cel(linkedid='2', eventtime=NOW - td(minutes=3))
+    @cel(linkedid='3', eventtime=NOW - td(minutes=2), processed=True)  # excluded
+    @cel(linkedid='4', eventtime=NOW - td(minutes=1))
+    def test_count_unprocessed(self, _, cel2, __, cel4):
+        older = NOW - td(hours=1)
+
+        assert self.dao.cel.count_unprocessed(older=older) == 2
+        after = (cel2['eventtime'], cel2['id'])
+        assert self.dao.cel.count_unprocessed(older=older, after=after) == 1
+
+    @cel(linkedid='1', eventtime=NOW - td(minutes=1))
+    @cel(linkedid='2', eventtime=NOW - td(minutes=3))
+    @cel(linkedid='3', eventtime=NOW - td(minutes=2))
+    def test_find_next_unprocessed(self, cel1, cel2, cel3):
+        older = NOW - td(hours=1)
+
+        result = self.dao.cel.find_next_unprocessed(2, older=older)
+        assert_that(
+            result,
+            contains_exactly(
+                has_properties(id=cel2['id'], uniqueid=str(cel2['uniqueid'])),
+                has_properties(id=cel3['id'], uniqueid=str(cel3['uniqueid'])),
+            ),
+        )
+
+        after = (result[-1].eventtime, result[-1].id)
+        result = self.dao.cel.find_next_unprocessed(2, older=older, after=after)
+        assert_that(result, contains_exactly(has_properties(id=cel1['id'])))
+
+    @cel(linkedid='1', uniqueid='1.1')
+    @cel(linkedid='2', uniqueid='1.1')
+    @cel(linkedid='2', uniqueid='2.1')
+    @cel(linkedid='3', uniqueid='3.1')  # excluded
+    def test_stream_from_uniqueids(self, cel1, cel2, cel3, _):
+        result = list(self.dao.cel.stream_from_uniqueids(['2.1']))
+        assert_that(
+            result,
+            contains_exactly(
+                has_property('id', cel1['id']),
+                has_property('id', cel2['id']),
+                has_property('id', cel3['id']),
+            ),
+        )
+
+    @cel(linkedid='1', eventtime=NOW - td(hours=2))
+    @cel(linkedid='1')
+    @cel(linkedid='2', processed=True)  # excluded
+    def test_stream_last_unprocessed(self, cel1, cel2, _):
+        older = NOW - td(hours=1)
+        result = list(self.dao.cel.stream_last_unprocessed(older=older))
+        assert_that(
+            result,
+            contains_exactly(
+                has_properties(id=cel1['id'], linkedid='1'),
+                has_properties(id=cel2['id'], linkedid='1'),
+            ),
+        )
+
+    @cel(linkedid='1', uniqueid='1.1')
+    @cel(linkedid='2', uniqueid='1.1')
+    @cel(linkedid='2', uniqueid='2.1')
+    @cel(linkedid='3', uniqueid='2.1')
+    @cel(linkedid='4', uniqueid='4.1')  # excluded
+    def test_find_from_linked_id_follows_correlation_chain(
+        self, cel1, cel2, cel3, cel4, _
+    ):
+        result = self.dao.cel.find_from_linked_id('1')
+        assert_that(
+            result,
+            contains_exactly(
+                has_property('id', cel1['id']),
+                has_property('id', cel2['id']),
+                has_property('id', cel3['id']),
+                has_property('id', cel4['id']),
+            ),
+        )
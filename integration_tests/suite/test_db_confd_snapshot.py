@@ -0,0 +1,143 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from hamcrest import (
+    assert_that,
+    contains_exactly,
+    contains_inanyorder,
+    equal_to,
+    has_properties,
+    none,
+)
+
+from wazo_call_logd.database.models import ConfdContext, ConfdLine, ConfdUser
+
+from .helpers.base import DBIntegrationTest
+from .helpers.constants import MASTER_TENANT, USER_1_UUID, USER_2_UUID
+
+USER_1 = {
+    'uuid': str(USER_1_UUID),
+    'tenant_uuid': str(MASTER_TENANT),
+    'userfield': 'a, b',
+    'line_id': 1,
+}
+LINE_1 = {
+    'id': 1,
+    'name': 'line1',
+    'user_uuid': str(USER_1_UUID),
+    'extension_id': 10,
+    'extension_exten': '1001',
+    'extension_context': 'default',
+}
+LINE_2 = {
+    'id': 2,
+    'name': 'line2',
+    'user_uuid': None,
+    'extension_id': None,
+    'extension_exten': None,
+    'extension_context': None,
+}
+CONTEXT = {'name': 'default', 'tenant_uuid': str(MASTER_TENANT)}
+
+
+class TestConfdSnapshot(DBIntegrationTest):
+    def setUp(self):
+        super().setUp()
+        self.dao.confd_snapshot.replace_all([USER_1], [LINE_1, LINE_2], [CONTEXT])
+
+    def tearDown(self):
+        for model in (ConfdUser, ConfdLine, ConfdContext):
+            self.session.query(model).delete()
+        self.session.commit()
+        super().tearDown()
+
+    def test_replace_all(self):
+        self.dao.confd_snapshot.replace_all([], [LINE_2], [])
+
+        assert_that(self.session.query(ConfdUser).count(), equal_to(0))
+        assert_that(
+            self.session.query(ConfdLine).all(),
+            contains_exactly(has_properties(id=2, name='line2')),
+        )
+        assert_that(self.session.query(ConfdContext).count(), equal_to(0))
+
+    def test_replace_all_keeps_rows(self):
+        line_1 = dict(LINE_1, extension_exten='1002')
+        self.dao.confd_snapshot.replace_all(
+            [],
+            [line_1, LINE_2],
+            [],
+            kept_user_uuids=[USER_1['uuid']],
+            kept_line_ids=[1],
+        )
+
+        assert_that(
+            self.session.query(ConfdUser).all(),
+            contains_exactly(has_properties(uuid=USER_1_UUID)),
+        )
+        assert_that(
+            self.session.query(ConfdLine).all(),
+            contains_inanyorder(
+                has_properties(id=1, extension_exten='1001'),
+                has_properties(id=2),
+            ),
+        )
+
+    def test_find_lines(self):
+        result = self.dao.confd_snapshot.find_lines(['line1', 'line2', 'unknown'])
+
+        assert_that(
+            result,
+            contains_exactly(
+                contains_exactly(
+                    has_properties(name='line1'),
+                    has_properties(uuid=str(USER_1_UUID), userfield='a, b'),
+                ),
+                contains_exactly(has_properties(name='line2'), none()),
+            ),
+        )
+
+    def test_find_users(self):
+        result = self.dao.confd_snapshot.find_users([str(USER_1_UUID)])
+
+        assert_that(
+            result,
+            contains_exactly(
+                contains_exactly(
+                    has_properties(uuid=str(USER_1_UUID)),
+                    has_properties(id=1, extension_exten='1001'),
+                )
+            ),
+        )
+
+    def test_upsert_and_delete(self):
+        user_2 = dict(USER_1, uuid=str(USER_2_UUID), line_id=None)
+        self.dao.confd_snapshot.upsert_user(user_2)
+        self.dao.confd_snapshot.upsert_line(dict(LINE_2, user_uuid=str(USER_2_UUID)))
+        self.dao.confd_snapshot.delete_user(str(USER_1_UUID))
+
+        assert_that(
+            self.session.query(ConfdUser).all(),
+            contains_exactly(has_properties(uuid=str(USER_2_UUID))),
+        )
+        assert_that(
+            self.session.query(ConfdLine).all(),
+            contains_inanyorder(
+                has_properties(id=1),
+                has_properties(id=2, user_uuid=str(USER_2_UUID)),
+            ),
+        )
+
+    def test_find_line_ids_by_extension_id(self):
+        result = self.dao.confd_snapshot.find_line_ids_by_extension_id(10)
+
+        assert_that(result, contains_exactly(1))
+
+    def test_find_context_tenant_uuid(self):
+        result = self.dao.confd_snapshot.find_context_tenant_uuid('default')
+        assert_that(result, equal_to(str(MASTER_TENANT)))
+
+        self.dao.confd_snapshot.delete_context('default')
+
+        result = self.dao.confd_snapshot.find_context_tenant_uuid('default')
+        assert_that(result, none())
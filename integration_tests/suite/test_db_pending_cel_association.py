@@ -0,0 +1,46 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from hamcrest import assert_that, contains_exactly, empty, has_properties
+
+from wazo_call_logd.database.models import PendingCELAssociation
+
+from .helpers.base import DBIntegrationTest
+
+
+class TestPendingCELAssociation(DBIntegrationTest):
+    def tearDown(self):
+        self.session.query(PendingCELAssociation).delete()
+        self.session.commit()
+        super().tearDown()
+
+    def test_create(self):
+        pending = self.dao.pending_cel_association.create([10, 11], [1, 1], {3, 2})
+
+        result = self.dao.pending_cel_association.find_all()
+        assert_that(
+            result,
+            contains_exactly(
+                has_properties(
+                    id=pending.id,
+                    cel_ids=[10, 11],
+                    call_log_ids=[1, 1],
+                    unassociated_call_log_ids=[2, 3],
+                )
+            ),
+        )
+
+    def test_find_all_by_cel_ids(self):
+        pending = self.dao.pending_cel_association.create([10, 11], [1, 1], set())
+        self.dao.pending_cel_association.create([12], [2], set())
+
+        result = self.dao.pending_cel_association.find_all_by_cel_ids({11, 13})
+
+        assert_that(result, contains_exactly(has_properties(id=pending.id)))
+
+    def test_delete_from_list(self):
+        pending = self.dao.pending_cel_association.create([10], [1], set())
+
+        self.dao.pending_cel_association.delete_from_list([pending.id])
+
+        assert_that(self.dao.pending_cel_association.find_all(), empty())
@@ -0,0 +1,66 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from datetime import datetime as dt
+from datetime import timedelta as td
+from datetime import timezone as tz
+
+from hamcrest import assert_that, equal_to, has_properties, none
+
+from wazo_call_logd.database.models import SweepCheckpoint
+
+from .helpers.base import DBIntegrationTest
+
+NOW = dt.now(tz.utc)
+
+
+class TestSweepCheckpoint(DBIntegrationTest):
+    def tearDown(self):
+        self.session.query(SweepCheckpoint).delete()
+        self.session.commit()
+        super().tearDown()
+
+    def test_find_when_no_checkpoint(self):
+        result = self.dao.sweep_checkpoint.find()
+        assert_that(result, none())
+
+    def test_create_replaces_previous_checkpoint(self):
+        self.dao.sweep_checkpoint.create(NOW - td(days=2))
+        self.dao.sweep_checkpoint.create(NOW - td(days=1))
+
+        result = self.dao.sweep_checkpoint.find()
+        assert_that(
+            result,
+            has_properties(
+                older=NOW - td(days=1),
+                last_eventtime=None,
+                last_cel_id=None,
+                processed_cel_count=0,
+            ),
+        )
+        assert_that(self.session.query(SweepCheckpoint).count(), equal_to(1))
+
+    def test_update(self):
+        checkpoint = self.dao.sweep_checkpoint.create(NOW - td(days=1))
+        checkpoint.last_eventtime = NOW - td(hours=1)
+        checkpoint.last_cel_id = 42
+        checkpoint.processed_cel_count = 10
+
+        self.dao.sweep_checkpoint.update(checkpoint)
+
+        result = self.dao.sweep_checkpoint.find()
+        assert_that(
+            result,
+            has_properties(
+                last_eventtime=NOW - td(hours=1),
+                last_cel_id=42,
+                processed_cel_count=10,
+            ),
+        )
+
+    def test_delete(self):
+        self.dao.sweep_checkpoint.create(NOW - td(days=1))
+
+        self.dao.sweep_checkpoint.delete()
+
+        assert_that(self.dao.sweep_checkpoint.find(), none())
@@ -1,4 +1,4 @@
-# Copyright 2021-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2021-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import uuid
@@ -60,3 +60,53 @@ class TestTenant(DBIntegrationTest):
         query = self.session.query(Tenant).filter(Tenant.uuid.in_(tenant_uuids))
         query.delete(synchronize_session=False)
         self.session.commit()
+
+    def test_create_all_skips_known_uuids(self):
+        tenant_uuid = str(uuid.uuid4())
+        self.dao.tenant.create_all_uuids_if_not_exist([tenant_uuid])
+        query = self.session.query(Tenant).filter(Tenant.uuid == tenant_uuid)
+        query.delete(synchronize_session=False)
+        self.session.commit()
+
+        self.dao.tenant.create_all_uuids_if_not_exist([tenant_uuid])
+        assert_that(query.count(), equal_to(0))
+
+        self.dao.tenant.forget_uuid(tenant_uuid)
+        self.dao.tenant.create_all_uuids_if_not_exist([tenant_uuid])
+        assert_that(query.count(), equal_to(1))
+
+        query.delete(synchronize_session=False)
+        self.session.commit()
+        self.dao.tenant.forget_uuid(tenant_uuid)
+
+    def test_create_all_after_forgetting_all_uuids(self):
+        tenant_uuid = str(uuid.uuid4())
+        self.dao.tenant.create_all_uuids_if_not_exist([tenant_uuid])
+        query = self.session.query(Tenant).filter(Tenant.uuid == tenant_uuid)
+        query.delete(synchronize_session=False)
+        self.session.commit()
+
+        self.dao.tenant.forget_all_uuids()
+        self.dao.tenant.create_all_uuids_if_not_exist([tenant_uuid])
+        assert_that(query.count(), equal_to(1))
+
+        query.delete(synchronize_session=False)
+        self.session.commit()
+        self.dao.tenant.forget_uuid(tenant_uuid)
+
+    def test_create_all_in_a_transaction_rolled_back(self):
+        tenant_uuid = str(uuid.uuid4())
+        try:
+            with self.dao.transaction():
+                self.dao.tenant.create_all_uuids_if_not_exist([tenant_uuid])
+                raise RuntimeError()
+        except RuntimeError:
+            pass
+
+        self.dao.tenant.create_all_uuids_if_not_exist([tenant_uuid])
+        query = self.session.query(Tenant).filter(Tenant.uuid == tenant_uuid)
+        assert_that(query.count(), equal_to(1))
+
+        query.delete(synchronize_session=False)
+        self.session.commit()
+        self.dao.tenant.forget_uuid(tenant_uuid)
@@ -1,4 +1,4 @@
-# Copyright 2018-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2018-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from hamcrest import assert_that, equal_to, has_entries, has_entry
@@ -49,6 +49,7 @@ class TestStatusAllOK(IntegrationTest):
                     bus_consumer=has_entry('status', 'ok'),
                     task_queue=has_entry('status', 'ok'),
                     service_token=has_entry('status', 'ok'),
+                    generation_queue=has_entry('status', 'ok'),
                 ),
             )
 
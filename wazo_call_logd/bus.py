@@ -1,4 +1,4 @@
-# Copyright 2022-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2022-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from wazo_bus.consumer import BusConsumer as BaseConsumer
@@ -7,11 +7,30 @@ from wazo_bus.resources.call_logs.events import (
     CallLogCreatedEvent,
     CallLogUserCreatedEvent,
 )
+from wazo_bus.resources.common.event import TenantEvent, UserEvent
 from xivo.status import Status
 
 from wazo_call_logd.plugins.cdr.schemas import CDRSchema
 
 
+class CallLogUpdatedEvent(TenantEvent):
+    service = 'call_logd'
+    name = 'call_log_updated'
+    routing_key_fmt = 'call_log.updated'
+
+    def __init__(self, cdr_data, tenant_uuid):
+        super().__init__(cdr_data, tenant_uuid)
+
+
+class CallLogUserUpdatedEvent(UserEvent):
+    service = 'call_logd'
+    name = 'call_log_user_updated'
+    routing_key_fmt = 'call_log.user.{user_uuid}.updated'
+
+    def __init__(self, cdr_data, tenant_uuid, user_uuid):
+        super().__init__(cdr_data, tenant_uuid, user_uuid)
+
+
 class BusConsumer(BaseConsumer):
     @classmethod
     def from_config(cls, config):
@@ -31,14 +50,20 @@ class BusPublisher(BasePublisher):
         return cls(name=name, service_uuid=service_uuid, **config)
 
     def publish_call_log(self, *call_logs):
+        self._publish_call_logs(call_logs, CallLogCreatedEvent, CallLogUserCreatedEvent)
+
+    def publish_call_log_updated(self, *call_logs):
+        self._publish_call_logs(call_logs, CallLogUpdatedEvent, CallLogUserUpdatedEvent)
+
+    def _publish_call_logs(self, call_logs, event_class, user_event_class):
         for call_log in call_logs:
             payload = CDRSchema().dump(call_log)
-            event = CallLogCreatedEvent(payload, call_log.tenant_uuid)
+            event = event_class(payload, call_log.tenant_uuid)
             super().publish(event)
 
             user_payload = CDRSchema(exclude=['tags']).dump(call_log)
             for participant in call_log.participants:
-                user_event = CallLogUserCreatedEvent(
+                user_event = user_event_class(
                     user_payload, call_log.tenant_uuid, participant.user_uuid
                 )
                 super().publish(user_event)
@@ -0,0 +1,190 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from .cel_interpretor import parse_eventtime
+from .database.cel_event_type import CELEventType
+from .database.queries.cel import CELRow
+
+logger = logging.getLogger(__name__)
+
+
+def parse_payload_eventtime(eventtime: str) -> datetime:
+    # NOTE: the AMI CEL event time is a UNIX timestamp unless a dateformat is
+    # configured in cel.conf, in which case it is a local time
+    try:
+        timestamp = float(eventtime)
+    except ValueError:
+        parsed = parse_eventtime(eventtime)
+        return parsed if parsed.tzinfo else parsed.astimezone()
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def cel_from_payload(payload: dict) -> CELRow:
+    eventtype = payload['EventName']
+    userdeftype = payload.get('UserDefType', '')
+    if eventtype == 'USER_DEFINED' and userdeftype:
+        # the cel table stores the user defined type as event type
+        eventtype = userdeftype
+
+    return CELRow(
+        id=None,
+        eventtype=eventtype,
+        eventtime=parse_payload_eventtime(payload['EventTime']),
+        uniqueid=payload['UniqueID'],
+        linkedid=payload['LinkedID'],
+        userdeftype=userdeftype,
+        cid_name=payload.get('CallerIDname', ''),
+        cid_num=payload.get('CallerIDnum', ''),
+        cid_ani=payload.get('CallerIDani', ''),
+        cid_rdnis=payload.get('CallerIDrdnis', ''),
+        cid_dnid=payload.get('CallerIDdnid', ''),
+        exten=payload.get('Exten', ''),
+        context=payload.get('Context', ''),
+        channame=payload.get('Channel', ''),
+        appname=payload.get('Application', ''),
+        appdata=payload.get('AppData', ''),
+        accountcode=payload.get('AccountCode', ''),
+        peeraccount=payload.get('PeerAccount', ''),
+        userfield=payload.get('Userfield', ''),
+        peer=payload.get('Peer', ''),
+        extra=payload.get('Extra') or None,
+    )
+
+
+@dataclass
+class _LinkedIdBuffer:
+    created_at: float
+    cels: list[CELRow] = field(default_factory=list)
+    uniqueids: set[str] = field(default_factory=set)
+    started_uniqueids: set[str] = field(default_factory=set)
+    ended: bool = False
+
+
+class CELBuffer:
+    """
+    CELs received from the bus, grouped by linkedid, so that call logs can be
+    generated without reading the cel table again.
+
+    A correlation group is only returned when it is known to be complete, i.e.
+    every linkedid has ended and the start of every channel was received.
+    Otherwise (e.g. after a restart or an eviction), the CELs must be read from
+    the database. The buffer is bounded in number of CELs and in age.
+    """
+
+    def __init__(self, max_events=100000, max_age=7200):
+        self._max_events = max_events
+        self._max_age = max_age
+        self._buffers: OrderedDict[str, _LinkedIdBuffer] = OrderedDict()
+        self._linked_ids_by_uniqueid: defaultdict[str, set[str]] = defaultdict(set)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        if not config['enabled']:
+            return None
+        return cls(max_events=config['max_events'], max_age=config['max_age'])
+
+    def __len__(self):
+        return self._size
+
+    def add(self, payload: dict) -> CELRow | None:
+        try:
+            cel = cel_from_payload(payload)
+        except (KeyError, ValueError) as e:
+            logger.debug('Ignoring unexpected CEL payload %s: %s', payload, e)
+            return None
+
+        with self._lock:
+            buffer = self._buffers.get(cel.linkedid)
+            if buffer is None:
+                buffer = self._buffers[cel.linkedid] = _LinkedIdBuffer(time.monotonic())
+            buffer.cels.append(cel)
+            buffer.uniqueids.add(cel.uniqueid)
+            if cel.eventtype == CELEventType.chan_start:
+                buffer.started_uniqueids.add(cel.uniqueid)
+            elif cel.eventtype == CELEventType.linkedid_end:
+                buffer.ended = True
+            self._linked_ids_by_uniqueid[cel.uniqueid].add(cel.linkedid)
+            self._size += 1
+            self._evict()
+        return cel
+
+    def find(self, linked_ids: list[str]) -> dict[str, list[CELRow]]:
+        """
+        Return the buffered CELs of the complete correlation groups of the
+        given linkedids, including the correlated linkedids
+        """
+        result = {}
+        with self._lock:
+            for linked_id in linked_ids:
+                if linked_id in result:
+                    continue
+                correlated_linked_ids = self._correlated_linked_ids(linked_id)
+                if not self._is_complete(correlated_linked_ids):
+                    logger.debug('CELs of linkedid %s are not all buffered', linked_id)
+                    continue
+                for correlated_linked_id in correlated_linked_ids:
+                    buffer = self._buffers[correlated_linked_id]
+                    result[correlated_linked_id] = list(buffer.cels)
+        return result
+
+    def discard(self, linked_ids):
+        with self._lock:
+            for linked_id in linked_ids:
+                self._remove(linked_id)
+
+    def _correlated_linked_ids(self, linked_id: str) -> set[str]:
+        correlated_linked_ids = set()
+        pending = [linked_id]
+        while pending:
+            current = pending.pop()
+            if current in correlated_linked_ids or current not in self._buffers:
+                continue
+            correlated_linked_ids.add(current)
+            for uniqueid in self._buffers[current].uniqueids:
+                pending.extend(self._linked_ids_by_uniqueid[uniqueid])
+        return correlated_linked_ids
+
+    def _is_complete(self, linked_ids: set[str]) -> bool:
+        if not linked_ids:
+            return False
+        buffers = [self._buffers[linked_id] for linked_id in linked_ids]
+        if not all(buffer.ended for buffer in buffers):
+            return False
+        uniqueids = set().union(*(buffer.uniqueids for buffer in buffers))
+        started_uniqueids = set().union(*(b.started_uniqueids for b in buffers))
+        return uniqueids <= started_uniqueids
+
+    def _evict(self):
+        oldest_allowed = time.monotonic() - self._max_age
+        while self._buffers:
+            linked_id, oldest = next(iter(self._buffers.items()))
+            if self._size <= self._max_events and oldest.created_at >= oldest_allowed:
+                break
+            # evicting a whole correlation group ensures that an incomplete
+            # group can never be mistaken for a complete one
+            evicted = self._correlated_linked_ids(linked_id)
+            logger.debug('Evicting buffered CELs of linkedids %s', evicted)
+            for evicted_linked_id in evicted:
+                self._remove(evicted_linked_id)
+
+    def _remove(self, linked_id: str):
+        buffer = self._buffers.pop(linked_id, None)
+        if not buffer:
+            return
+        self._size -= len(buffer.cels)
+        for uniqueid in buffer.uniqueids:
+            linked_ids = self._linked_ids_by_uniqueid[uniqueid]
+            linked_ids.discard(linked_id)
+            if not linked_ids:
+                del self._linked_ids_by_uniqueid[uniqueid]
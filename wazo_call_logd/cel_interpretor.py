@@ -1,4 +1,4 @@
-# Copyright 2022-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2022-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -6,18 +6,23 @@ from __future__ import annotations
 import json
 import logging
 import re
+import time
 import urllib.parse
 import uuid
 from datetime import datetime
+from functools import lru_cache
 from typing import Callable, TypedDict
 
-import dateutil
+import dateutil.parser
 from xivo.asterisk.line_identity import identity_from_channel
 from xivo_dao.alchemy.cel import CEL
 
+from .cel_sequence import CelSequence
 from .database.cel_event_type import CELEventType
 from .database.models import Destination, Recording
 from .exceptions import CELInterpretationError
+from .generation_metrics import GenerationMetrics
+from .participant import CHANNEL_CACHE_SIZE
 from .raw_call_log import BridgeInfo, RawCallLog
 
 logger = logging.getLogger(__name__)
@@ -37,12 +42,14 @@ RECORDING_PATH_REGEX = re.compile(
 )
 
 
-def default_interpretors() -> list[AbstractCELInterpretor]:
+def default_interpretors(
+    metrics: GenerationMetrics | None = None,
+) -> list[AbstractCELInterpretor]:
     return [
         LocalOriginateCELInterpretor(),
         DispatchCELInterpretor(
-            CallerCELInterpretor(),
-            CalleeCELInterpretor(),
+            CallerCELInterpretor(metrics),
+            CalleeCELInterpretor(metrics),
         ),
     ]
 
@@ -52,7 +59,10 @@ def parse_key_pair_sequence(text: str) -> list[tuple[str, str]]:
     return key_pairs
 
 
+# NOTE: the same extras repeat in the CELs of a call (e.g. bridge, recording)
+@lru_cache(maxsize=1024)
 def extract_cel_extra(extra: str | None) -> dict | None:
+    """The decoded extra is shared between the CELs and must not be modified"""
     if not extra:
         logger.debug('missing CEL extra')
         return
@@ -173,15 +183,23 @@ def bridge_info(details: dict) -> BridgeInfo | None:
 def parse_eventtime(eventtime: str | datetime) -> datetime:
     if isinstance(eventtime, datetime):
         return eventtime
-    else:
+    try:
+        return datetime.fromisoformat(eventtime)
+    except ValueError:
         return dateutil.parser.isoparse(eventtime)
 
 
+@lru_cache(maxsize=CHANNEL_CACHE_SIZE)
+def channel_identity(channame: str) -> str:
+    return identity_from_channel(channame)
+
+
 EventInterpretor = Callable[[CEL, RawCallLog], RawCallLog]
 
 
 class AbstractCELInterpretor:
     eventtype_map: dict[str, EventInterpretor] = {}
+    metrics: GenerationMetrics | None = None
 
     def interpret_cels(self, cels: list[CEL], call_log: RawCallLog):
         for cel in cels:
@@ -190,6 +208,16 @@ class AbstractCELInterpretor:
         return call_log
 
     def interpret_cel(self, cel: CEL, call: RawCallLog):
+        if self.metrics is None:
+            return self._interpret_cel(cel, call)
+
+        start = time.perf_counter()
+        try:
+            return self._interpret_cel(cel, call)
+        finally:
+            self.metrics.observe_cel(cel.eventtype, time.perf_counter() - start)
+
+    def _interpret_cel(self, cel: CEL, call: RawCallLog):
         eventtype = cel.eventtype
         logger.debug("Interpreting CEL event type %s", eventtype)
         if eventtype in self.eventtype_map:
@@ -212,13 +240,12 @@ class DispatchCELInterpretor:
         return call_log
 
     def split_caller_callee_cels(self, cels):
-        uniqueids = [
-            cel.uniqueid for cel in cels if cel.eventtype == CELEventType.chan_start
-        ]
+        cels = CelSequence.of(cels)
+        uniqueids = cels.started_uniqueids
         caller_uniqueid = uniqueids[0] if len(uniqueids) > 0 else None
-        callee_uniqueids = uniqueids[1:]
+        callee_uniqueids = set(uniqueids[1:])
 
-        caller_cels = [cel for cel in cels if cel.uniqueid == caller_uniqueid]
+        caller_cels = cels.of_channel(caller_uniqueid)
         callee_cels = [cel for cel in cels if cel.uniqueid in callee_uniqueids]
 
         return (caller_cels, callee_cels)
@@ -228,7 +255,8 @@ class DispatchCELInterpretor:
 
 
 class CallerCELInterpretor(AbstractCELInterpretor):
-    def __init__(self):
+    def __init__(self, metrics: GenerationMetrics | None = None):
+        self.metrics = metrics
         self.eventtype_map = {
             CELEventType.chan_start: self.interpret_chan_start,
             CELEventType.chan_end: self.interpret_chan_end,
@@ -257,7 +285,7 @@ class CallerCELInterpretor(AbstractCELInterpretor):
         call.requested_exten = call.extension_filter.filter(cel.exten)
         call.requested_context = cel.context
         call.destination_exten = call.extension_filter.filter(cel.exten)
-        call.source_line_identity = identity_from_channel(cel.channame)
+        call.source_line_identity = channel_identity(cel.channame)
         call.raw_participants[cel.channame].update(role='source')
         logger.debug(
             'Setting source line identity info from chan_start event (id=%s)', cel.id
@@ -444,7 +472,7 @@ class CallerCELInterpretor(AbstractCELInterpretor):
         )
 
         if MEETING_EXTENSION_REGEX.match(call.destination_exten):
-            call.extension_filter.add_exten(call.destination_exten)
+            call.add_filtered_exten(call.destination_exten)
             # Don't call filter.filter_call() yet, to avoid empty exten during interpret.
             # Let interpret_chan_end do it instead.
 
@@ -475,11 +503,7 @@ class CallerCELInterpretor(AbstractCELInterpretor):
                 "name": source_name,
                 "role": "source",
             }
-            call.insert_or_update_participants_info(
-                info,
-                lambda p: p.get('user_uuid') == source_user_uuid
-                and p.get('role') == 'source',
-            )
+            call.insert_or_update_participants_info(info)
 
             logger.debug(
                 "identified source participant info(user_uuid=%s, user_name=%s)"
@@ -494,11 +518,7 @@ class CallerCELInterpretor(AbstractCELInterpretor):
                 "name": destination_name,
                 "role": "destination",
             }
-            call.insert_or_update_participants_info(
-                info,
-                lambda p: p.get('user_uuid') == destination_user_uuid
-                and p.get('role') == 'destination',
-            )
+            call.insert_or_update_participants_info(info)
 
             logger.debug(
                 "identified destination participant info (user_uuid=%s, user_name=%s)"
@@ -517,7 +537,7 @@ class CallerCELInterpretor(AbstractCELInterpretor):
         )
         call.source_name = source_name
         call.source_exten = cel.cid_num
-        call.source_line_identity = identity_from_channel(cel.channame)
+        call.source_line_identity = channel_identity(cel.channame)
         return call
 
     def interpret_wazo_call_log_destination(self, cel, call: RawCallLog):
@@ -557,7 +577,7 @@ class CallerCELInterpretor(AbstractCELInterpretor):
                 destination_details['user_uuid'],
                 destination_details['user_name'],
             )
-            call.participants_info.append(participant_info)
+            call.add_participants_info(participant_info)
 
             call.destination_name = participant_info["name"]
             logger.debug(
@@ -612,7 +632,8 @@ class CallerCELInterpretor(AbstractCELInterpretor):
 
 
 class CalleeCELInterpretor(AbstractCELInterpretor):
-    def __init__(self):
+    def __init__(self, metrics: GenerationMetrics | None = None):
+        self.metrics = metrics
         self.eventtype_map = {
             CELEventType.chan_start: self.interpret_chan_start,
             CELEventType.chan_end: self.interpret_chan_end,
@@ -623,7 +644,7 @@ class CalleeCELInterpretor(AbstractCELInterpretor):
         }
 
     def interpret_chan_start(self, cel, call):
-        call.destination_line_identity = identity_from_channel(cel.channame)
+        call.destination_line_identity = channel_identity(cel.channame)
         call.caller_id_by_channels[cel.channame] = (cel.cid_name, cel.cid_num)
 
         if call.direction == 'outbound':
@@ -786,7 +807,8 @@ class CalleeCELInterpretor(AbstractCELInterpretor):
 
 class LocalOriginateCELInterpretor:
     def interpret_cels(self, cels, call: RawCallLog):
-        uniqueids = [cel.uniqueid for cel in cels if cel.eventtype == 'CHAN_START']
+        cels = CelSequence.of(cels)
+        uniqueids = cels.started_uniqueids
         try:
             (
                 local_channel1,
@@ -796,45 +818,29 @@ class LocalOriginateCELInterpretor:
         except ValueError:  # in case a CHAN_START is missing...
             return call
 
-        try:
-            local_channel1_start = next(
-                cel
-                for cel in cels
-                if cel.uniqueid == local_channel1 and cel.eventtype == 'CHAN_START'
-            )
-            source_channel_answer = next(
-                cel
-                for cel in cels
-                if cel.uniqueid == source_channel and cel.eventtype == 'ANSWER'
-            )
-            source_channel_end = next(
-                cel
-                for cel in cels
-                if cel.uniqueid == source_channel and cel.eventtype == 'CHAN_END'
-            )
-            local_channel2_answer = next(
-                cel
-                for cel in cels
-                if cel.uniqueid == local_channel2 and cel.eventtype == 'ANSWER'
-            )
-        except StopIteration:
+        local_channel1_start = cels.first('CHAN_START', local_channel1)
+        source_channel_answer = cels.first('ANSWER', source_channel)
+        source_channel_end = cels.first('CHAN_END', source_channel)
+        local_channel2_answer = cels.first('ANSWER', local_channel2)
+        if not (
+            local_channel1_start
+            and source_channel_answer
+            and source_channel_end
+            and local_channel2_answer
+        ):
             return call
 
         call.date = parse_eventtime(local_channel1_start.eventtime)
         call.date_end = parse_eventtime(source_channel_end.eventtime)
         call.source_name = source_channel_answer.cid_name
         call.source_exten = source_channel_answer.cid_num
-        call.source_line_identity = identity_from_channel(
-            source_channel_answer.channame
-        )
+        call.source_line_identity = channel_identity(source_channel_answer.channame)
         call.raw_participants[source_channel_answer.channame].update(role='source')
 
         call.destination_exten = local_channel2_answer.cid_num
 
         # Adding all recordings
-        for cel in cels:
-            if cel.eventtype != CELEventType.mixmonitor_start:
-                continue
+        for cel in cels.of_type(CELEventType.mixmonitor_start):
             extra = extract_cel_extra(cel.extra)
             if not is_valid_mixmonitor_start_extra(extra):
                 return call
@@ -847,9 +853,7 @@ class LocalOriginateCELInterpretor:
             call.recordings.append(recording)
 
         # Check if any recordings have been stopped manually
-        for cel in cels:
-            if cel.eventtype != CELEventType.mixmonitor_stop:
-                continue
+        for cel in cels.of_type(CELEventType.mixmonitor_stop):
             extra = extract_cel_extra(cel.extra)
             if not is_valid_mixmonitor_stop_extra(extra):
                 return call
@@ -863,32 +867,24 @@ class LocalOriginateCELInterpretor:
             if not recording.end_time:
                 recording.end_time = call.date_end
 
-        local_channel1_app_start = next(
-            (
-                cel
-                for cel in cels
-                if cel.uniqueid == local_channel1 and cel.eventtype == 'APP_START'
-            ),
-            None,
-        )
+        local_channel1_app_start = cels.first('APP_START', local_channel1)
         if local_channel1_app_start:
             call.user_field = local_channel1_app_start.userfield
 
         other_channels_start = [
             cel
-            for cel in cels
-            if cel.uniqueid not in starting_channels and cel.eventtype == 'CHAN_START'
+            for cel in cels.of_type('CHAN_START')
+            if cel.uniqueid not in starting_channels
         ]
-        non_local_other_channels = [
+        non_local_other_channels = {
             cel.uniqueid
             for cel in other_channels_start
             if not cel.channame.lower().startswith('local/')
-        ]
+        }
         other_channels_bridge_enter = [
             cel
-            for cel in cels
+            for cel in cels.of_type('BRIDGE_ENTER')
             if cel.uniqueid in non_local_other_channels
-            and cel.eventtype == 'BRIDGE_ENTER'
         ]
         destination_channel = (
             other_channels_bridge_enter[-1].uniqueid
@@ -897,31 +893,19 @@ class LocalOriginateCELInterpretor:
         )
 
         if destination_channel:
-            try:
-                # in outgoing calls, destination ANSWER event has more callerid
-                # information than START event
-                destination_channel_answer = next(
-                    cel
-                    for cel in cels
-                    if cel.uniqueid == destination_channel and cel.eventtype == 'ANSWER'
-                )
-                # take the last bridge enter/exit to skip local channel optimization
-                destination_channel_bridge_enter = next(
-                    reversed(
-                        [
-                            cel
-                            for cel in cels
-                            if cel.uniqueid == destination_channel
-                            and cel.eventtype == 'BRIDGE_ENTER'
-                        ]
-                    )
-                )
-            except StopIteration:
+            # in outgoing calls, destination ANSWER event has more callerid
+            # information than START event
+            destination_channel_answer = cels.first('ANSWER', destination_channel)
+            # take the last bridge enter/exit to skip local channel optimization
+            destination_channel_bridge_enter = cels.last(
+                'BRIDGE_ENTER', destination_channel
+            )
+            if not (destination_channel_answer and destination_channel_bridge_enter):
                 return call
 
             call.destination_name = destination_channel_answer.cid_name
             call.destination_exten = destination_channel_answer.cid_num
-            call.destination_line_identity = identity_from_channel(
+            call.destination_line_identity = channel_identity(
                 destination_channel_answer.channame
             )
             call.raw_participants[destination_channel_answer.channame].update(
@@ -931,21 +915,16 @@ class LocalOriginateCELInterpretor:
                 destination_channel_bridge_enter.eventtime
             )
 
-        is_incall = any([True for cel in cels if cel.eventtype == 'XIVO_INCALL'])
-        is_outcall = any([True for cel in cels if cel.eventtype == 'XIVO_OUTCALL'])
+        is_incall = cels.has('XIVO_INCALL')
+        is_outcall = cels.has('XIVO_OUTCALL')
         if is_incall:
             call.direction = 'inbound'
         if is_outcall:
             call.direction = 'outbound'
 
         # extract tenant and user info from WAZO_ORIGINATE_ALL_LINES custom event
-        try:
-            wazo_originate_all_lines = next(
-                cel
-                for cel in cels
-                if cel.eventtype == CELEventType.wazo_originate_all_lines
-            )
-        except StopIteration:
+        wazo_originate_all_lines = cels.first(CELEventType.wazo_originate_all_lines)
+        if not wazo_originate_all_lines:
             logger.debug(f'No {CELEventType.wazo_originate_all_lines} cel found')
         else:
             logger.info(f'processing {CELEventType.wazo_originate_all_lines} cel entry')
@@ -973,17 +952,14 @@ class LocalOriginateCELInterpretor:
                     'role': 'source',
                     'requested': (not call.requested_type),
                 }
-                call.insert_or_update_participants_info(
-                    participant_info,
-                    lambda p: p.get('user_uuid') == info['user_uuid']
-                    and p.get('role') == 'source',
-                )
+                call.insert_or_update_participants_info(participant_info)
                 call.requested_type = 'all_lines'
 
         return call
 
     @classmethod
     def can_interpret(cls, cels):
+        cels = CelSequence.of(cels)
         has_three_channels = cls.three_channels_minimum(cels)
         if not has_three_channels:
             logger.debug(
@@ -1012,12 +988,11 @@ class LocalOriginateCELInterpretor:
 
     @classmethod
     def three_channels_minimum(cls, cels):
-        channels = {cel.uniqueid for cel in cels}
-        return len(channels) >= 3
+        return len(CelSequence.of(cels).uniqueids) >= 3
 
     @classmethod
     def first_two_channels_are_local(cls, cels):
-        names = [cel.channame for cel in cels if cel.eventtype == 'CHAN_START']
+        names = [cel.channame for cel in CelSequence.of(cels).of_type('CHAN_START')]
         return (
             len(names) >= 2
             and names[0].lower().startswith('local/')
@@ -1026,7 +1001,8 @@ class LocalOriginateCELInterpretor:
 
     @classmethod
     def first_channel_is_answered_before_any_other_operation(cls, cels):
-        first_channel_cels = [cel for cel in cels if cel.uniqueid == cels[0].uniqueid]
+        cels = CelSequence.of(cels)
+        first_channel_cels = cels.of_channel(cels[0].uniqueid) if cels else []
         return (
             len(first_channel_cels) >= 2
             and first_channel_cels[0].eventtype == 'CHAN_START'
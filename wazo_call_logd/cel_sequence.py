@@ -0,0 +1,68 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterable
+
+from xivo_dao.alchemy.cel import CEL
+
+from .database.cel_event_type import CELEventType
+
+
+class CelSequence(list):
+    """
+    CELs of a correlation group, indexed once by channel (uniqueid) and by
+    event type, in their original order. The sequence must not be modified
+    after it is built.
+    """
+
+    def __init__(self, cels: Iterable[CEL] = ()):
+        super().__init__(cels)
+        by_uniqueid: dict[str, list[CEL]] = defaultdict(list)
+        by_eventtype: dict[str, list[CEL]] = defaultdict(list)
+        for cel in self:
+            by_uniqueid[cel.uniqueid].append(cel)
+            by_eventtype[cel.eventtype].append(cel)
+        self._by_uniqueid = by_uniqueid
+        self._by_eventtype = by_eventtype
+        # NOTE: only needed by some interpretors, built on first use
+        self._by_uniqueid_and_eventtype: dict[tuple[str, str], list[CEL]] | None = None
+
+    @classmethod
+    def of(cls, cels: Iterable[CEL]) -> CelSequence:
+        return cels if isinstance(cels, cls) else cls(cels)
+
+    @property
+    def uniqueids(self) -> list[str]:
+        """Every channel of the sequence, by order of appearance"""
+        return list(self._by_uniqueid)
+
+    @property
+    def started_uniqueids(self) -> list[str]:
+        """The channels of the CHAN_START events, in order"""
+        return [cel.uniqueid for cel in self.of_type(CELEventType.chan_start)]
+
+    def of_channel(self, uniqueid: str) -> list[CEL]:
+        return self._by_uniqueid.get(uniqueid, [])
+
+    def of_type(self, eventtype: str, uniqueid: str | None = None) -> list[CEL]:
+        if uniqueid is None:
+            return self._by_eventtype.get(eventtype, [])
+        if self._by_uniqueid_and_eventtype is None:
+            self._by_uniqueid_and_eventtype = defaultdict(list)
+            for cel in self:
+                self._by_uniqueid_and_eventtype[cel.uniqueid, cel.eventtype].append(cel)
+        return self._by_uniqueid_and_eventtype.get((uniqueid, eventtype), [])
+
+    def has(self, eventtype: str) -> bool:
+        return eventtype in self._by_eventtype
+
+    def first(self, eventtype: str, uniqueid: str | None = None) -> CEL | None:
+        cels = self.of_type(eventtype, uniqueid)
+        return cels[0] if cels else None
+
+    def last(self, eventtype: str, uniqueid: str | None = None) -> CEL | None:
+        cels = self.of_type(eventtype, uniqueid)
+        return cels[-1] if cels else None
@@ -0,0 +1,104 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from xivo.status import Status
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Track the latency of the requests to a remote service.
+
+    The breaker opens when a request fails or lasts longer than
+    `latency_threshold` seconds: the requests are not allowed for
+    `retry_interval` seconds. Then, the requests are tried again and the
+    breaker closes on the first one fast enough.
+
+    Requests made with `call` are not waited for longer than
+    `latency_threshold` seconds: they are left running in the background and
+    fail with a `TimeoutError`.
+    """
+
+    def __init__(self, name: str, latency_threshold: float, retry_interval: float):
+        self.name = name
+        self._latency_threshold = latency_threshold
+        self._retry_interval = retry_interval
+        self._opened_at: float | None = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(thread_name_prefix=f'{name}-request')
+
+    @classmethod
+    def from_config(cls, name, config):
+        return cls(
+            name,
+            latency_threshold=config['latency_threshold'],
+            retry_interval=config['retry_interval'],
+        )
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            return time.monotonic() - self._opened_at >= self._retry_interval
+
+    def call(self, func, *args, **kwargs):
+        start_time = time.monotonic()
+        future = self._executor.submit(func, *args, **kwargs)
+        try:
+            result = future.result(timeout=self._latency_threshold)
+        except FutureTimeoutError:
+            self.record_failure()
+            raise TimeoutError(
+                f'Request to {self.name} took more than {self._latency_threshold}s'
+            )
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success(time.monotonic() - start_time)
+        return result
+
+    def record_success(self, elapsed: float):
+        if elapsed > self._latency_threshold:
+            logger.warning(
+                'Request to %s took %.2fs, deferring the next requests for %ss',
+                self.name,
+                elapsed,
+                self._retry_interval,
+            )
+            self._open()
+            return
+
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info('Requests to %s are fast enough again', self.name)
+            self._opened_at = None
+
+    def record_failure(self):
+        logger.warning(
+            'Request to %s failed, deferring the next requests for %ss',
+            self.name,
+            self._retry_interval,
+        )
+        self._open()
+
+    def _open(self):
+        with self._lock:
+            self._opened_at = time.monotonic()
+
+    def provide_status(self, status):
+        key = f'{self.name}_circuit_breaker'
+        status[key]['status'] = Status.ok
+        status[key]['state'] = 'open' if self.is_open else 'closed'
@@ -0,0 +1,269 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from collections.abc import Iterable
+
+import requests.exceptions
+from wazo_confd_client import Client as ConfdClient
+
+from .database.queries.confd_snapshot import ConfdSnapshotDAO
+from .participant import ParticipantInfo, ResolvedParticipants, get_tags
+
+logger = logging.getLogger(__name__)
+
+USER_EVENTS = ('user_created', 'user_edited')
+LINE_EVENTS = ('line_created', 'line_edited')
+ASSOCIATION_EVENTS = (
+    'user_line_associated',
+    'user_line_dissociated',
+    'line_extension_associated',
+    'line_extension_dissociated',
+)
+EXTENSION_EVENTS = ('extension_edited', 'extension_deleted')
+CONTEXT_EVENTS = ('context_created', 'context_edited')
+
+_STOP = object()
+
+
+class ConfdSnapshot:
+    """
+    A copy of the confd lines, users and contexts in the call-logd database,
+    loaded in bulk when the service starts and kept up to date by the confd
+    bus events, to generate call logs without waiting for confd.
+
+    Lines and users missing from the snapshot must be looked up in confd.
+    The bus events remove the changed lines and users from the snapshot and
+    a background thread fetches them again from confd, so that the bus
+    consumer never waits for confd. When a line or a user cannot be fetched,
+    it stays out of the snapshot. The rows updated by the bus events while
+    the snapshot is loaded are newer than the bulk listing, they are kept.
+    """
+
+    def __init__(self, dao: ConfdSnapshotDAO, confd: ConfdClient):
+        self._dao = dao
+        self._confd = confd
+        # NOTE: the keys updated by the bus events while loading
+        self._updated_keys: dict[str, set] | None = None
+        self._lock = threading.Lock()
+        self._refreshes: queue.Queue = queue.Queue()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name='confd-snapshot-refresh', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._refreshes.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def load(self):
+        with self._lock:
+            self._updated_keys = {'users': set(), 'lines': set(), 'contexts': set()}
+        try:
+            users = self._confd.users.list(recurse=True)['items']
+            lines = self._confd.lines.list(recurse=True)['items']
+            contexts = self._confd.contexts.list(recurse=True)['items']
+            with self._lock:
+                self._dao.replace_all(
+                    [_user_row(user) for user in users],
+                    [_line_row(line) for line in lines if line['name']],
+                    [_context_row(context) for context in contexts],
+                    kept_user_uuids=self._updated_keys['users'],
+                    kept_line_ids=self._updated_keys['lines'],
+                    kept_context_names=self._updated_keys['contexts'],
+                )
+        finally:
+            with self._lock:
+                self._updated_keys = None
+        logger.info(
+            'Loaded confd snapshot of %s users, %s lines and %s contexts',
+            len(users),
+            len(lines),
+            len(contexts),
+        )
+
+    def load_in_background(self, *args):
+        def _load():
+            try:
+                self.load()
+            except Exception:
+                logger.exception('Failed to load the confd snapshot')
+
+        threading.Thread(target=_load, name='confd_snapshot', daemon=True).start()
+
+    def find_participants(
+        self, line_names: Iterable[str], user_uuids: Iterable[str]
+    ) -> ResolvedParticipants:
+        resolved = ResolvedParticipants({}, {})
+        for line, user in self._dao.find_lines(set(line_names)):
+            if line.name in resolved.by_line_name:
+                continue
+            if line.user_uuid and not user:
+                # NOTE: user not loaded yet, looked up in confd
+                continue
+            resolved.by_line_name[line.name] = (
+                _participant(user, line) if user else None
+            )
+        for user, line in self._dao.find_users({str(uuid) for uuid in user_uuids}):
+            resolved.by_user_uuid[str(user.uuid)] = _participant(user, line)
+        return resolved
+
+    def find_context_tenant_uuid(self, name: str) -> str | None:
+        return self._dao.find_context_tenant_uuid(name)
+
+    def subscribe(self, bus_consumer):
+        for event_name in USER_EVENTS:
+            bus_consumer.subscribe(event_name, self._on_user_event)
+        bus_consumer.subscribe('user_deleted', self._on_user_deleted)
+        for event_name in LINE_EVENTS:
+            bus_consumer.subscribe(event_name, self._on_line_event)
+        bus_consumer.subscribe('line_deleted', self._on_line_deleted)
+        for event_name in ASSOCIATION_EVENTS:
+            bus_consumer.subscribe(event_name, self._on_association_event)
+        for event_name in EXTENSION_EVENTS:
+            bus_consumer.subscribe(event_name, self._on_extension_event)
+        for event_name in CONTEXT_EVENTS:
+            bus_consumer.subscribe(event_name, self._on_context_event)
+        bus_consumer.subscribe('context_deleted', self._on_context_deleted)
+
+    def _on_user_event(self, event):
+        self._refresh_user(event['uuid'])
+
+    def _on_user_deleted(self, event):
+        self._updated('users', str(event['uuid']))
+        self._dao.delete_user(event['uuid'])
+
+    def _on_line_event(self, event):
+        self._refresh_line(event['id'])
+
+    def _on_line_deleted(self, event):
+        self._updated('lines', event['id'])
+        self._dao.delete_line(event['id'])
+
+    def _on_association_event(self, event):
+        self._refresh_line(event['line']['id'])
+        if 'user' in event:
+            self._refresh_user(event['user']['uuid'])
+
+    def _on_extension_event(self, event):
+        for line_id in self._dao.find_line_ids_by_extension_id(event['id']):
+            self._refresh_line(line_id)
+
+    def _on_context_event(self, event):
+        self._updated('contexts', event['name'])
+        self._dao.upsert_context(_context_row(event))
+
+    def _on_context_deleted(self, event):
+        self._updated('contexts', event['name'])
+        self._dao.delete_context(event['name'])
+
+    def _updated(self, kind: str, key):
+        # NOTE: waits for a bulk replacement in progress, so that the update is
+        # either kept by the replacement or written after it
+        with self._lock:
+            if self._updated_keys is not None:
+                self._updated_keys[kind].add(key)
+
+    def _refresh_user(self, user_uuid: str):
+        # NOTE: the user is looked up in confd until it is fetched again
+        self._updated('users', str(user_uuid))
+        self._dao.delete_user(user_uuid)
+        self._refreshes.put((self._fetch_user, user_uuid))
+
+    def _refresh_line(self, line_id: int):
+        # NOTE: the line is looked up in confd until it is fetched again
+        self._updated('lines', line_id)
+        self._dao.delete_line(line_id)
+        self._refreshes.put((self._fetch_line, line_id))
+
+    def _run(self):
+        while (refresh := self._refreshes.get()) is not _STOP:
+            fetch, key = refresh
+            try:
+                fetch(key)
+            except Exception:
+                logger.exception('Failed to refresh the confd snapshot of %s', key)
+
+    def _fetch_user(self, user_uuid: str):
+        try:
+            user = self._confd.users.get(user_uuid)
+        except requests.exceptions.RequestException as e:
+            if not _is_not_found(e):
+                raise
+            return
+        # NOTE: the user fetched is newer than a bulk listing in progress
+        self._updated('users', str(user_uuid))
+        self._dao.upsert_user(_user_row(user))
+
+    def _fetch_line(self, line_id: int):
+        try:
+            line = self._confd.lines.get(line_id)
+        except requests.exceptions.RequestException as e:
+            if not _is_not_found(e):
+                raise
+            return
+        if line['name']:
+            self._updated('lines', line_id)
+            self._dao.upsert_line(_line_row(line))
+
+
+def _is_not_found(error: requests.exceptions.RequestException) -> bool:
+    return error.response is not None and error.response.status_code == 404
+
+
+def _user_row(user: dict) -> dict:
+    return {
+        'uuid': user['uuid'],
+        'tenant_uuid': user['tenant_uuid'],
+        'userfield': user.get('userfield'),
+        # the main line of the user, like find_participant_by_uuid
+        'line_id': user['lines'][0]['id'] if user.get('lines') else None,
+    }
+
+
+def _line_row(line: dict) -> dict:
+    extension = line['extensions'][0] if line.get('extensions') else {}
+    return {
+        'id': line['id'],
+        'name': line['name'],
+        'user_uuid': line['users'][0]['uuid'] if line.get('users') else None,
+        'extension_id': extension.get('id'),
+        'extension_exten': extension.get('exten'),
+        'extension_context': extension.get('context'),
+    }
+
+
+def _context_row(context: dict) -> dict:
+    return {'name': context['name'], 'tenant_uuid': context['tenant_uuid']}
+
+
+def _participant(user, line) -> ParticipantInfo:
+    main_extension = None
+    if line and line.extension_exten:
+        main_extension = {
+            'exten': line.extension_exten,
+            'context': line.extension_context,
+        }
+    return ParticipantInfo(
+        uuid=str(user.uuid),
+        tenant_uuid=str(user.tenant_uuid),
+        line_id=line.id if line else user.line_id,
+        tags=get_tags(user.userfield),
+        main_extension=main_extension,
+    )
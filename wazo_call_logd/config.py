@@ -1,4 +1,4 @@
-# Copyright 2017-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import argparse
@@ -92,6 +92,39 @@ DEFAULT_CONFIG = {
         'username': None,
         'password': None,
     },
+    'generation': {
+        'batch_size': 100,
+        'batch_timeout': 0.1,
+        'workers': 1,
+        'queue_size': 10000,
+        'cel_buffer': {
+            'enabled': True,
+            'max_events': 100000,
+            'max_age': 7200,
+            'incremental': False,
+        },
+        'participant_cache': {
+            'ttl': 300,
+            'max_size': 10000,
+        },
+        'context_cache': {
+            'ttl': 3600,
+            'max_size': 10000,
+        },
+        'confd_snapshot': {
+            'enabled': True,
+        },
+        'deferred_enrichment': {
+            'enabled': True,
+            'latency_threshold': 5,
+            'retry_interval': 30,
+            'interval': 60,
+            'batch_size': 100,
+        },
+        'metrics': {
+            'enabled': False,
+        },
+    },
     'retention': {
         'cdr_days': None,
         'export_days': None,
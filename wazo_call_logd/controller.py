@@ -1,10 +1,10 @@
-# Copyright 2017-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import contextlib
 import logging
 import signal
 import threading
-import time
 from functools import partial
 
 from wazo_auth_client import Client as AuthClient
@@ -14,14 +14,22 @@ from xivo.status import StatusAggregator, TokenStatus
 from xivo.token_renewer import TokenRenewer
 
 from wazo_call_logd import celery
+from wazo_call_logd.cel_buffer import CELBuffer
 from wazo_call_logd.cel_interpretor import default_interpretors
+from wazo_call_logd.circuit_breaker import CircuitBreaker
+from wazo_call_logd.confd_snapshot import ConfdSnapshot
+from wazo_call_logd.enrichment import EnrichmentWorker
+from wazo_call_logd.generation_metrics import GenerationMetrics
+from wazo_call_logd.generation_queue import GenerationQueue
 from wazo_call_logd.generator import CallLogsGenerator
+from wazo_call_logd.incremental import IncrementalInterpretor
 from wazo_call_logd.manager import CallLogsManager
+from wazo_call_logd.participant import ContextTenantCache, ParticipantCache
 from wazo_call_logd.writer import CallLogsWriter
 
 from .auth import init_master_tenant
 from .bus import BusConsumer, BusPublisher
-from .database.helpers import new_db_session
+from .database.helpers import new_db_sessions
 from .database.queries import DAO
 from .http_server import HTTPServer, api, app
 
@@ -32,10 +40,11 @@ class Controller:
     def __init__(self, config):
         self.config = config
         self._stopping_thread = None
-        DBSession = new_db_session(config['db_uri'])
-        CELDBSession = new_db_session(config['cel_db_uri'])
+        DBSession, CELDBSession = new_db_sessions(
+            config['db_uri'], config['cel_db_uri']
+        )
         self.dao = DAO(DBSession, CELDBSession)
-        writer = CallLogsWriter(self.dao)
+        self.writer = CallLogsWriter(self.dao)
 
         # NOTE(afournier): it is important to load the tasks before configuring the Celery app
         self.celery_task_manager = plugin_helpers.load(
@@ -52,19 +61,67 @@ class Controller:
 
         auth_client = AuthClient(**config['auth'])
         confd_client = ConfdClient(**config['confd'])
+        self.confd_snapshot = None
+        if config['generation']['confd_snapshot']['enabled']:
+            self.confd_snapshot = ConfdSnapshot(self.dao.confd_snapshot, confd_client)
+        self.participant_cache = ParticipantCache.from_config(
+            config['generation']['participant_cache'], self.confd_snapshot
+        )
+        self.context_cache = ContextTenantCache.from_config(
+            config['generation']['context_cache'], self.confd_snapshot
+        )
+        enrichment_config = config['generation']['deferred_enrichment']
+        self.confd_breaker = None
+        if enrichment_config['enabled']:
+            self.confd_breaker = CircuitBreaker.from_config('confd', enrichment_config)
+        self.generation_metrics = GenerationMetrics.from_config(
+            config['generation']['metrics']
+        )
+        cel_buffer_config = config['generation']['cel_buffer']
+        interpretors = default_interpretors(self.generation_metrics)
+        self.incremental_interpretor = IncrementalInterpretor.from_config(
+            cel_buffer_config, interpretors
+        )
         generator = CallLogsGenerator(
-            confd_client,
-            default_interpretors(),
+            (
+                self.generation_metrics.counted_confd(confd_client)
+                if self.generation_metrics
+                else confd_client
+            ),
+            interpretors,
+            self.participant_cache,
+            self.context_cache,
+            self.confd_breaker,
+            self.incremental_interpretor,
+            self.generation_metrics,
         )
         self.token_renewer = TokenRenewer(auth_client)
         self.token_renewer.subscribe_to_token_change(confd_client.set_token)
         self.token_renewer.subscribe_to_next_token_details_change(
             generator.set_default_tenant_uuid
         )
+        if self.confd_snapshot:
+            self.token_renewer.subscribe_to_next_token_details_change(
+                self.confd_snapshot.load_in_background
+            )
+        self.token_renewer.subscribe_to_next_token_details_change(
+            partial(self.context_cache.load_in_background, confd_client)
+        )
 
         self.bus_publisher = BusPublisher.from_config(config['uuid'], config['bus'])
         self.bus_consumer = BusConsumer.from_config(config['bus'])
-        self.manager = CallLogsManager(self.dao, generator, writer, self.bus_publisher)
+        cel_buffer = CELBuffer.from_config(cel_buffer_config)
+        self.manager = CallLogsManager(
+            self.dao, generator, self.writer, self.bus_publisher, cel_buffer
+        )
+        self.generation_queue = GenerationQueue.from_config(
+            self.manager, config['generation']
+        )
+        self.enrichment_worker = None
+        if self.confd_breaker:
+            self.enrichment_worker = EnrichmentWorker.from_config(
+                self.generation_queue, self.confd_breaker, enrichment_config
+            )
 
         self._bus_subscribe()
 
@@ -100,12 +157,21 @@ class Controller:
         self.status_aggregator.add_provider(self.bus_consumer.provide_status)
         self.status_aggregator.add_provider(self.token_status.provide_status)
         self.status_aggregator.add_provider(celery.provide_status)
+        self.status_aggregator.add_provider(self.generation_queue.provide_status)
+        self.status_aggregator.add_provider(self.participant_cache.provide_status)
+        if self.confd_breaker:
+            self.status_aggregator.add_provider(self.confd_breaker.provide_status)
+        if self.generation_metrics:
+            self.status_aggregator.add_provider(self.generation_metrics.provide_status)
         self._update_db_from_config_file()
+        self.dao.tenant.load_known_uuids()
+        self.writer.associate_pending()
 
         try:
-            with self.bus_consumer:
-                with self.token_renewer:
-                    self.http_server.run()
+            with self.generation_queue, self._enrichment_worker(), self._snapshot():
+                with self.bus_consumer:
+                    with self.token_renewer:
+                        self.http_server.run()
         finally:
             logger.info('Stopping wazo-call-logd...')
             self._celery_process.terminate()
@@ -113,6 +179,12 @@ class Controller:
             if self._stopping_thread:
                 self._stopping_thread.join()
 
+    def _enrichment_worker(self):
+        return self.enrichment_worker or contextlib.nullcontext()
+
+    def _snapshot(self):
+        return self.confd_snapshot or contextlib.nullcontext()
+
     def stop(self, reason):
         logger.warning('Stopping wazo-call-logd: %s', reason)
         self._stopping_thread = threading.Thread(
@@ -144,27 +216,23 @@ class Controller:
             self.dao.config.update(config)
 
     def _bus_subscribe(self):
-        self.bus_consumer.subscribe('CEL', self._handle_linked_id_end)
+        self.bus_consumer.subscribe('CEL', self._handle_cel)
+        # NOTE: the snapshot must be updated before invalidating the cache
+        if self.confd_snapshot:
+            self.confd_snapshot.subscribe(self.bus_consumer)
+        self.participant_cache.subscribe(self.bus_consumer)
+        self.context_cache.subscribe(self.bus_consumer)
+
+    def _handle_cel(self, payload):
+        if self.manager.cel_buffer:
+            cel = self.manager.cel_buffer.add(payload)
+            if cel and self.incremental_interpretor:
+                self.incremental_interpretor.add(cel)
 
-    def _handle_linked_id_end(self, payload):
         if payload['EventName'] != 'LINKEDID_END':
             return
 
-        linked_id = payload['LinkedID']
-        start_time = time.time()
-        try:
-            self.manager.generate_from_linked_id(linked_id)
-        except Exception:
-            logger.exception(
-                'Failed to generate call log for linkedid \"%s\"', linked_id
-            )
-        else:
-            processing_time = time.time() - start_time
-            logger.info(
-                'Generated call log for linkedid \"%s\" in %.2fs',
-                linked_id,
-                processing_time,
-            )
+        self.generation_queue.put(payload['LinkedID'])
 
 
 def _signal_handler(controller, signum, frame):
@@ -0,0 +1,31 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from alembic import op
+
+
+def table_exists(table_name):
+    conn = op.get_bind()
+    result = conn.execute(
+        "SELECT to_regclass('{}') IS NOT NULL as tbl_exists;".format(table_name)
+    ).first()
+    return result.tbl_exists
+
+
+def index_exists(index_name, table_name=None, column=None):
+    # NOTE: when a column is given, the index may have been created under
+    # another name with the table
+    conn = op.get_bind()
+    if column is None:
+        query = (
+            "SELECT exists(SELECT 1 from pg_indexes where indexname = '{}') "
+            "as ix_exists;".format(index_name)
+        )
+    else:
+        query = (
+            "SELECT exists(SELECT 1 from pg_indexes where tablename = '{}' "
+            "and (indexname = '{}' or indexdef like '%({})')) as ix_exists;".format(
+                table_name, index_name, column
+            )
+        )
+    return conn.execute(query).first().ix_exists
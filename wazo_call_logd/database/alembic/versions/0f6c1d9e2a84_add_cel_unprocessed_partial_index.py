@@ -0,0 +1,41 @@
+"""add cel unprocessed partial index
+
+Revision ID: 0f6c1d9e2a84
+Revises: c52e8a1f03d7
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+from wazo_call_logd.database.alembic.helpers import index_exists, table_exists
+
+# revision identifiers, used by Alembic.
+revision = '0f6c1d9e2a84'
+down_revision = 'c52e8a1f03d7'
+
+TABLE_NAME = 'cel'
+INDEX_NAME = 'cel__idx__unprocessed_eventtime_id'
+
+
+def upgrade():
+    # NOTE: the cel table is not managed by call-logd and is not in the
+    # call-logd database when cel_db_uri is a different database
+    if not table_exists(TABLE_NAME) or index_exists(INDEX_NAME):
+        return
+
+    # NOTE: built concurrently to keep accepting CELs on large tables
+    with op.get_context().autocommit_block():
+        op.create_index(
+            index_name=INDEX_NAME,
+            table_name=TABLE_NAME,
+            columns=['eventtime', 'id'],
+            postgresql_where=sa.text(
+                "call_log_id IS NULL AND channame <> 'Message/ast_msg_queue'"
+            ),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS {}'.format(INDEX_NAME))
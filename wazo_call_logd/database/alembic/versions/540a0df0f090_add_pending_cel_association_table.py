@@ -0,0 +1,28 @@
+"""add pending cel association table
+
+Revision ID: 540a0df0f090
+Revises: 7a4d2e9c5b13
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import ARRAY
+
+# revision identifiers, used by Alembic.
+revision = '540a0df0f090'
+down_revision = '7a4d2e9c5b13'
+
+
+def upgrade():
+    op.create_table(
+        'call_logd_pending_cel_association',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('cel_ids', ARRAY(sa.Integer), nullable=False),
+        sa.Column('call_log_ids', ARRAY(sa.Integer), nullable=False),
+        sa.Column('unassociated_call_log_ids', ARRAY(sa.Integer), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('call_logd_pending_cel_association')
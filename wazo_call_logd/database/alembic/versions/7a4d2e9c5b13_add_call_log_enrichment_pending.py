@@ -0,0 +1,40 @@
+"""add call log enrichment pending
+
+Revision ID: 7a4d2e9c5b13
+Revises: e3b8a4c6f1d2
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '7a4d2e9c5b13'
+down_revision = 'e3b8a4c6f1d2'
+
+TABLE_NAME = 'call_logd_call_log'
+INDEX_NAME = 'call_logd_call_log__idx__enrichment_pending'
+
+
+def upgrade():
+    op.add_column(
+        TABLE_NAME,
+        sa.Column(
+            'enrichment_pending',
+            sa.Boolean,
+            server_default='false',
+            nullable=False,
+        ),
+    )
+    # NOTE: only the few call logs waiting for enrichment are indexed
+    op.create_index(
+        index_name=INDEX_NAME,
+        table_name=TABLE_NAME,
+        columns=['id'],
+        postgresql_where=sa.text('enrichment_pending'),
+    )
+
+
+def downgrade():
+    op.drop_index(INDEX_NAME, table_name=TABLE_NAME)
+    op.drop_column(TABLE_NAME, 'enrichment_pending')
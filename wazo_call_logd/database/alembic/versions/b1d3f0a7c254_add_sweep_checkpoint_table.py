@@ -0,0 +1,31 @@
+"""add sweep checkpoint table
+
+Revision ID: b1d3f0a7c254
+Revises: 6190f9a543ef
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'b1d3f0a7c254'
+down_revision = '6190f9a543ef'
+
+
+def upgrade():
+    op.create_table(
+        'call_logd_sweep_checkpoint',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('older', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('last_eventtime', sa.DateTime(timezone=True)),
+        sa.Column('last_cel_id', sa.Integer),
+        sa.Column(
+            'processed_cel_count', sa.Integer, nullable=False, server_default='0'
+        ),
+        sa.Column('updated_at', sa.DateTime(timezone=True)),
+    )
+
+
+def downgrade():
+    op.drop_table('call_logd_sweep_checkpoint')
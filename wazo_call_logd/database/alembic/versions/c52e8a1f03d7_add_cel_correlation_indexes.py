@@ -0,0 +1,44 @@
+"""add cel correlation indexes
+
+Revision ID: c52e8a1f03d7
+Revises: b1d3f0a7c254
+
+"""
+
+from alembic import op
+
+from wazo_call_logd.database.alembic.helpers import index_exists, table_exists
+
+# revision identifiers, used by Alembic.
+revision = 'c52e8a1f03d7'
+down_revision = 'b1d3f0a7c254'
+
+TABLE_NAME = 'cel'
+INDEXES = [
+    ('cel__idx__linkedid', 'linkedid'),
+    ('cel__idx__uniqueid', 'uniqueid'),
+]
+
+
+def upgrade():
+    # NOTE: the cel table is not managed by call-logd and is not in the
+    # call-logd database when cel_db_uri is a different database
+    if not table_exists(TABLE_NAME):
+        return
+
+    # NOTE: built concurrently to keep accepting CELs on large tables
+    with op.get_context().autocommit_block():
+        for index_name, column in INDEXES:
+            if not index_exists(index_name, TABLE_NAME, column):
+                op.create_index(
+                    index_name=index_name,
+                    table_name=TABLE_NAME,
+                    columns=[column],
+                    postgresql_concurrently=True,
+                )
+
+
+def downgrade():
+    # NOTE: the indexes may have existed before the upgrade and are also
+    # required by the rest of the system, they are kept
+    pass
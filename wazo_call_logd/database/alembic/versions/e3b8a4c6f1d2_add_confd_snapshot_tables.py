@@ -0,0 +1,50 @@
+"""add confd snapshot tables
+
+Revision ID: e3b8a4c6f1d2
+Revises: 0f6c1d9e2a84
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy_utils import UUIDType
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8a4c6f1d2'
+down_revision = '0f6c1d9e2a84'
+
+
+def upgrade():
+    op.create_table(
+        'call_logd_confd_user',
+        sa.Column('uuid', UUIDType, primary_key=True),
+        sa.Column('tenant_uuid', UUIDType, nullable=False),
+        sa.Column('userfield', sa.Text),
+        sa.Column('line_id', sa.Integer),
+    )
+    op.create_table(
+        'call_logd_confd_line',
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('name', sa.String(128), nullable=False),
+        sa.Column('user_uuid', UUIDType),
+        sa.Column('extension_id', sa.Integer),
+        sa.Column('extension_exten', sa.String(40)),
+        sa.Column('extension_context', sa.String(79)),
+    )
+    op.create_index('call_logd_confd_line__idx__name', 'call_logd_confd_line', ['name'])
+    op.create_index(
+        'call_logd_confd_line__idx__extension_id',
+        'call_logd_confd_line',
+        ['extension_id'],
+    )
+    op.create_table(
+        'call_logd_confd_context',
+        sa.Column('name', sa.String(79), primary_key=True),
+        sa.Column('tenant_uuid', UUIDType, nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('call_logd_confd_context')
+    op.drop_table('call_logd_confd_line')
+    op.drop_table('call_logd_confd_user')
@@ -1,4 +1,4 @@
-# Copyright 2017-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import logging
@@ -17,6 +17,15 @@ def new_db_session(db_uri):
     return _Session
 
 
+def new_db_sessions(db_uri, cel_db_uri):
+    DBSession = new_db_session(db_uri)
+    if cel_db_uri == db_uri:
+        # NOTE: sharing the scoped session allows the CEL and the call logs to be
+        # written in the same transaction
+        return DBSession, DBSession
+    return DBSession, new_db_session(cel_db_uri)
+
+
 @retry(
     stop=stop_after_attempt(60 * 5),
     wait=wait_fixed(1),
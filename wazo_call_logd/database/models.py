@@ -1,4 +1,4 @@
-# Copyright 2021-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2021-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -63,6 +63,7 @@ class CallLog(Base):
     direction = Column(String(255))
     user_field = Column(String(255))
     conversation_id = Column(String(255))
+    enrichment_pending = Column(Boolean, nullable=False, server_default='false')
 
     recordings = relationship(
         'Recording',
@@ -119,6 +120,11 @@ class CallLog(Base):
 
     __table_args__ = (
         Index('call_logd_call_log__idx__conversation_id', 'conversation_id'),
+        Index(
+            'call_logd_call_log__idx__enrichment_pending',
+            'id',
+            postgresql_where=text('enrichment_pending'),
+        ),
         CheckConstraint(
             direction.in_(['inbound', 'internal', 'outbound']),
             name='call_logd_call_log_direction_check',
@@ -336,6 +342,63 @@ class Config(Base):
     retention_recording_days_from_file = Column(Boolean)
 
 
+@generic_repr
+class SweepCheckpoint(Base):
+    __tablename__ = 'call_logd_sweep_checkpoint'
+
+    id = Column(Integer, primary_key=True)
+    older = Column(DateTime(timezone=True), nullable=False)
+    last_eventtime = Column(DateTime(timezone=True))
+    last_cel_id = Column(Integer)
+    processed_cel_count = Column(Integer, nullable=False, server_default='0')
+    updated_at = Column(DateTime(timezone=True))
+
+
+@generic_repr
+class PendingCELAssociation(Base):
+    __tablename__ = 'call_logd_pending_cel_association'
+
+    id = Column(Integer, primary_key=True)
+    cel_ids = Column(ARRAY(Integer), nullable=False)
+    # the call log of each CEL
+    call_log_ids = Column(ARRAY(Integer), nullable=False)
+    unassociated_call_log_ids = Column(ARRAY(Integer), nullable=False)
+
+
+@generic_repr
+class ConfdUser(Base):
+    __tablename__ = 'call_logd_confd_user'
+
+    uuid = Column(UUIDType, primary_key=True)
+    tenant_uuid = Column(UUIDType, nullable=False)
+    userfield = Column(Text)
+    line_id = Column(Integer)
+
+
+@generic_repr
+class ConfdLine(Base):
+    __tablename__ = 'call_logd_confd_line'
+    __table_args__ = (
+        Index('call_logd_confd_line__idx__name', 'name'),
+        Index('call_logd_confd_line__idx__extension_id', 'extension_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(128), nullable=False)
+    user_uuid = Column(UUIDType)
+    extension_id = Column(Integer)
+    extension_exten = Column(String(40))
+    extension_context = Column(String(79))
+
+
+@generic_repr
+class ConfdContext(Base):
+    __tablename__ = 'call_logd_confd_context'
+
+    name = Column(String(79), primary_key=True)
+    tenant_uuid = Column(UUIDType, nullable=False)
+
+
 @generic_repr
 class Export(Base):
     __tablename__ = 'call_logd_export'
@@ -1,27 +1,36 @@
-# Copyright 2020-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2020-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
+from contextlib import AbstractContextManager
+
 from .agent_stat import AgentStatDAO
+from .base import transaction
 from .call_log import CallLogDAO
 from .cel import CELDAO
+from .confd_snapshot import ConfdSnapshotDAO
 from .config import ConfigDAO
 from .export import ExportDAO
 from .helper import HelperDAO
+from .pending_cel_association import PendingCELAssociationDAO
 from .queue_stat import QueueStatDAO
 from .recording import RecordingDAO
 from .retention import RetentionDAO
+from .sweep_checkpoint import SweepCheckpointDAO
 from .tenant import TenantDAO
 
 
 class DAO:
     call_log: CallLogDAO
     config: ConfigDAO
+    confd_snapshot: ConfdSnapshotDAO
     export: ExportDAO
     helper: HelperDAO
+    pending_cel_association: PendingCELAssociationDAO
     recording: RecordingDAO
     retention: RetentionDAO
+    sweep_checkpoint: SweepCheckpointDAO
     tenant: TenantDAO
 
     cel: CELDAO
@@ -31,10 +40,13 @@ class DAO:
     _dao = {
         'call_log': CallLogDAO,
         'config': ConfigDAO,
+        'confd_snapshot': ConfdSnapshotDAO,
         'export': ExportDAO,
         'helper': HelperDAO,
+        'pending_cel_association': PendingCELAssociationDAO,
         'recording': RecordingDAO,
         'retention': RetentionDAO,
+        'sweep_checkpoint': SweepCheckpointDAO,
         'tenant': TenantDAO,
     }
 
@@ -45,8 +57,20 @@ class DAO:
     }
 
     def __init__(self, session, cel_db_session):
+        self._session = session
+        self._cel_db_session = cel_db_session
         for name, dao in self._dao.items():
             setattr(self, name, dao(session))
 
         for name, dao in self._cel_dao.items():
             setattr(self, name, dao(cel_db_session))
+
+    @property
+    def cel_in_same_database(self) -> bool:
+        return self._session is self._cel_db_session
+
+    def transaction(self) -> AbstractContextManager:
+        return transaction(self._session)
+
+    def cel_transaction(self) -> AbstractContextManager:
+        return transaction(self._cel_db_session)
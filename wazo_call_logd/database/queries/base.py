@@ -1,4 +1,4 @@
-# Copyright 2020-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2020-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from collections.abc import Iterator
@@ -10,6 +10,30 @@ from sqlalchemy.orm import scoped_session
 
 from wazo_call_logd.exceptions import DatabaseServiceUnavailable
 
+IN_TRANSACTION = 'wazo_call_logd_in_transaction'
+
+
+@contextmanager
+def transaction(Session: scoped_session) -> Iterator[BaseSession]:
+    """
+    Run the queries of every DAO using this scoped session in this thread in a
+    single transaction, committed when leaving the context.
+    """
+    session = Session()
+    session.info[IN_TRANSACTION] = True
+    try:
+        yield session
+        session.commit()
+    except exc.OperationalError:
+        session.rollback()
+        raise DatabaseServiceUnavailable()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        session.info.pop(IN_TRANSACTION, None)
+        Session.remove()
+
 
 class BaseDAO:
     def __init__(self, Session: scoped_session):
@@ -18,6 +42,11 @@ class BaseDAO:
     @contextmanager
     def new_session(self) -> Iterator[BaseSession]:
         session = self._Session()
+        if session.info.get(IN_TRANSACTION):
+            # NOTE: committed or rolled back by the enclosing transaction
+            yield session
+            return
+
         try:
             yield session
             session.commit()
@@ -29,3 +58,15 @@ class BaseDAO:
             raise
         finally:
             self._Session.remove()
+
+    @contextmanager
+    def new_streaming_session(self) -> Iterator[BaseSession]:
+        # NOTE: a session outside of the scoped session, which is removed after
+        # each query of this thread, while the results are still being consumed
+        session = self._Session.session_factory()
+        try:
+            yield session
+        except exc.OperationalError:
+            raise DatabaseServiceUnavailable()
+        finally:
+            session.close()
@@ -1,21 +1,27 @@
-# Copyright 2017-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2017-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 import datetime as dt
+import uuid
+from collections import defaultdict
 from typing import Any, TypedDict
 
 import sqlalchemy as sa
 from sqlalchemy import and_, distinct, func, sql
 from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Query, joinedload, selectinload, subqueryload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from wazo_call_logd.datatypes import CallDirection, OrderDirection
 
-from ..models import CallLog, CallLogParticipant
+from ..models import CallLog, CallLogParticipant, Destination, Recording
 from .base import BaseDAO
 
+# number of rows per INSERT statement, bounded by the maximum number of parameters
+INSERT_BATCH_SIZE = 1000
+
 
 class ListParams(TypedDict, total=False):
     search: str
@@ -271,15 +277,97 @@ class CallLogDAO(BaseDAO):
         if not call_logs:
             return
 
+        participants, recordings, destinations = [], [], []
         with self.new_session() as session:
-            for call_log in call_logs:
-                session.add(call_log)
-                session.flush()
-                # NOTE(fblackburn): fetch relationship before expunge_all
-                call_log.recordings
-                call_log.source_participant
-                call_log.destination_participant
-            session.expunge_all()
+            # NOTE: ids are reserved first, the order of the rows returned by
+            # a multi-row INSERT ... RETURNING is not guaranteed
+            ids = session.execute(
+                sa.select(
+                    [
+                        func.nextval(
+                            func.pg_get_serial_sequence(CallLog.__tablename__, 'id')
+                        )
+                    ]
+                ).select_from(func.generate_series(1, len(call_logs)))
+            ).fetchall()
+            for call_log, (id_,) in zip(call_logs, ids):
+                _set_ids(call_log, id_)
+                participants.extend(call_log.participants)
+                recordings.extend(call_log.recordings)
+                destinations.extend(call_log.destination_details)
+
+            for model, objects in (
+                (CallLog, call_logs),
+                (CallLogParticipant, participants),
+                (Recording, recordings),
+                (Destination, destinations),
+            ):
+                _bulk_insert(session, model, objects)
+
+        for call_log in call_logs:
+            _set_loaded_relationships(call_log)
+
+    def update_from_list(self, call_logs, call_log_ids) -> list[CallLog]:
+        """
+        Update in place the call logs of `call_log_ids` having the conversation
+        of one of `call_logs`, keeping their id. The participants, recordings
+        and destinations are diffed, only the changed rows are written.
+
+        Return the call logs that were updated, the others must be created.
+        """
+        call_logs_by_conversation = defaultdict(list)
+        for call_log in call_logs:
+            if call_log.conversation_id:
+                call_logs_by_conversation[call_log.conversation_id].append(call_log)
+        if not call_logs_by_conversation or not call_log_ids:
+            return []
+
+        updated_call_logs = []
+        with self.new_session() as session:
+            query = (
+                session.query(CallLog)
+                .options(
+                    selectinload('participants'),
+                    selectinload('recordings'),
+                    selectinload('destination_details'),
+                )
+                .filter(CallLog.id.in_(call_log_ids))
+                .filter(CallLog.conversation_id.in_(call_logs_by_conversation))
+                .order_by(CallLog.id)
+            )
+            for existing in query:
+                candidates = call_logs_by_conversation[existing.conversation_id]
+                if not candidates:
+                    continue
+                call_log = candidates.pop(0)
+                _set_ids(call_log, existing.id)
+                _update_call_log(existing, call_log)
+                updated_call_logs.append(call_log)
+
+        for call_log in updated_call_logs:
+            _set_loaded_relationships(call_log)
+        return updated_call_logs
+
+    def find_enrichment_pending(self, limit) -> list[tuple[int, str]]:
+        """Return the (id, conversation_id) of the call logs flagged for enrichment"""
+        with self.new_session() as session:
+            query = (
+                session.query(CallLog.id, CallLog.conversation_id)
+                .filter(CallLog.enrichment_pending.is_(True))
+                .order_by(CallLog.id)
+                .limit(limit)
+            )
+            return [(id_, conversation_id) for id_, conversation_id in query]
+
+    def clear_enrichment_pending(self, call_log_ids):
+        with self.new_session() as session:
+            query = session.query(CallLog).filter(CallLog.id.in_(call_log_ids))
+            query.update({CallLog.enrichment_pending: False}, synchronize_session=False)
+
+    def find_existing_ids(self, call_log_ids) -> set[int]:
+        with self.new_session() as session:
+            query = session.query(CallLog.id).filter(CallLog.id.in_(call_log_ids))
+            return {id_ for id_, in query}
 
     def delete_from_list(self, call_log_ids):
         with self.new_session() as session:
@@ -295,3 +383,122 @@ class CallLogDAO(BaseDAO):
             matched_rows = query.with_entities(CallLog.id).all()
             query.delete()
             return [_id for (_id,) in matched_rows]
+
+
+def _set_ids(call_log, id_):
+    call_log.id = id_
+    _set_defaults(call_log, enrichment_pending=lambda: False)
+    for participant in call_log.participants:
+        participant.call_log_id = id_
+        _set_defaults(
+            participant,
+            uuid=uuid.uuid4,
+            tags=list,
+            answered=lambda: False,
+            requested=lambda: False,
+        )
+    for recording in call_log.recordings:
+        recording.call_log_id = id_
+        _set_defaults(recording, uuid=uuid.uuid4)
+    for destination in call_log.destination_details:
+        destination.call_log_id = id_
+        _set_defaults(destination, uuid=uuid.uuid4)
+
+
+def _update_call_log(existing, call_log):
+    # NOTE: the generated objects are never attached to the session, they are
+    # still used after the commit to associate the CEL and publish the events
+    _update_columns(existing, call_log, exclude=('id',))
+    existing.participants = _merge_rows(
+        existing.participants,
+        call_log.participants,
+        key=lambda p: (p.role, str(p.user_uuid), p.line_id),
+    )
+    existing.recordings = _merge_rows(
+        existing.recordings,
+        call_log.recordings,
+        key=lambda r: (r.start_time, r.path),
+    )
+    existing.destination_details = _merge_rows(
+        existing.destination_details,
+        call_log.destination_details,
+        key=lambda d: (d.destination_details_key, d.destination_details_value),
+    )
+
+
+def _merge_rows(existing_rows, rows, key):
+    existing_rows_by_key = defaultdict(list)
+    for existing_row in existing_rows:
+        existing_rows_by_key[key(existing_row)].append(existing_row)
+
+    merged_rows = []
+    for row in rows:
+        if matching_rows := existing_rows_by_key.get(key(row)):
+            existing_row = matching_rows.pop(0)
+            row.uuid = existing_row.uuid
+            _update_columns(existing_row, row, exclude=('uuid', 'call_log_id'))
+            merged_rows.append(existing_row)
+        else:
+            merged_rows.append(_copy(row))
+    # NOTE: the rows left out are deleted as orphans
+    return merged_rows
+
+
+def _update_columns(existing, obj, exclude):
+    for column in existing.__table__.columns:
+        if column.key in exclude:
+            continue
+        value = getattr(obj, column.key)
+        if getattr(existing, column.key) != value:
+            setattr(existing, column.key, value)
+
+
+def _copy(obj):
+    model = type(obj)
+    return model(
+        **{column.key: getattr(obj, column.key) for column in model.__table__.columns}
+    )
+
+
+def _set_defaults(obj, **default_factories):
+    # NOTE: server defaults cannot be used in a multi-row insert, the values
+    # are also required on the objects for the bus events
+    for attribute, default_factory in default_factories.items():
+        if getattr(obj, attribute) is None:
+            setattr(obj, attribute, default_factory())
+
+
+def _bulk_insert(session, model, objects):
+    columns = [column.key for column in model.__table__.columns]
+    for i in range(0, len(objects), INSERT_BATCH_SIZE):
+        rows = [
+            {column: getattr(obj, column) for column in columns}
+            for obj in objects[i : i + INSERT_BATCH_SIZE]
+        ]
+        session.execute(model.__table__.insert().values(rows))
+
+
+def _set_loaded_relationships(call_log):
+    # NOTE: the objects are never attached to a session, the read-only
+    # relationships used to publish the call logs are set like if loaded
+    participants = call_log.participants
+    source_participants = [p for p in participants if p.role == 'source']
+    destination_participants = sorted(
+        (p for p in participants if p.role == 'destination'),
+        key=lambda p: (bool(p.answered), str(p.user_uuid)),
+        reverse=True,
+    )
+    set_committed_value(
+        call_log,
+        'source_participant',
+        source_participants[0] if source_participants else None,
+    )
+    set_committed_value(
+        call_log,
+        'destination_participant',
+        destination_participants[0] if destination_participants else None,
+    )
+    for participant in participants:
+        set_committed_value(participant, 'call_log', call_log)
+    for recording in call_log.recordings:
+        set_committed_value(recording, 'call_log', call_log)
@@ -1,10 +1,60 @@
-# Copyright 2013-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from __future__ import annotations
+
+from collections import defaultdict
+from collections.abc import Iterator
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import Integer, bindparam, func, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import aliased
 from xivo_dao.alchemy.cel import CEL
 
 from .base import BaseDAO
 
+STREAM_BATCH_SIZE = 2000
+UNASSOCIATE_BATCH_SIZE = 10000
+
+
+class CELRow(NamedTuple):
+    """
+    Lightweight, immutable CEL exposing the same attributes as the CEL model
+    """
+
+    id: int | None
+    eventtype: str
+    eventtime: datetime
+    uniqueid: str
+    linkedid: str
+    userdeftype: str = ''
+    cid_name: str = ''
+    cid_num: str = ''
+    cid_ani: str = ''
+    cid_rdnis: str = ''
+    cid_dnid: str = ''
+    exten: str = ''
+    context: str = ''
+    channame: str = ''
+    appname: str = ''
+    appdata: str = ''
+    amaflags: int = 0
+    accountcode: str = ''
+    peeraccount: str = ''
+    userfield: str = ''
+    peer: str = ''
+    extra: str | None = None
+    call_log_id: int | None = None
+
+    @classmethod
+    def from_cel(cls, cel: CEL) -> CELRow:
+        return cls._make(getattr(cel, field) for field in cls._fields)
+
+
+CEL_ROW_COLUMNS = [getattr(CEL, field) for field in CELRow._fields]
+
 
 def eject(session, objects):
     for obj in objects:
@@ -14,66 +64,202 @@ def eject(session, objects):
 
 class CELDAO(BaseDAO):
     def associate_all_to_call_logs(self, call_logs):
-        with self.new_session() as session:
-            for call_log in call_logs:
-                if not call_log.cel_ids:
-                    continue
-                query = session.query(CEL).filter(CEL.id.in_(call_log.cel_ids))
-                query.update({'call_log_id': call_log.id}, synchronize_session=False)
-
-    def unassociate_all_from_call_log_ids(self, call_log_ids):
-        if not call_log_ids:
+        cel_ids, call_log_ids = [], []
+        for call_log in call_logs:
+            cel_ids.extend(call_log.cel_ids)
+            call_log_ids.extend([call_log.id] * len(call_log.cel_ids))
+        self.associate_all(cel_ids, call_log_ids)
+
+    def associate_all(self, cel_ids, call_log_ids):
+        """Associate each CEL of `cel_ids` to the call log at the same index"""
+        if not cel_ids:
             return
 
+        cel = CEL.__table__
+        associations = select(
+            [
+                func.unnest(bindparam('cel_ids', type_=ARRAY(Integer))).label('cel_id'),
+                func.unnest(bindparam('call_log_ids', type_=ARRAY(Integer))).label(
+                    'call_log_id'
+                ),
+            ]
+        ).alias('associations')
+        query = (
+            cel.update()
+            .values(call_log_id=associations.c.call_log_id)
+            .where(cel.c.id == associations.c.cel_id)
+        )
         with self.new_session() as session:
-            query = session.query(CEL).filter(CEL.call_log_id.in_(call_log_ids))
-            query.update({'call_log_id': None}, synchronize_session=False)
+            session.execute(query, {'cel_ids': cel_ids, 'call_log_ids': call_log_ids})
 
-    def unassociate_all(self):
-        with self.new_session() as session:
-            query = session.query(CEL)
-            query.update({'call_log_id': None}, synchronize_session=False)
+    def unassociate_all_from_call_log_ids(
+        self, call_log_ids, batch_size=UNASSOCIATE_BATCH_SIZE
+    ):
+        call_log_ids = list(call_log_ids)
+        # NOTE: one transaction per batch, to avoid locking many CELs for long
+        for i in range(0, len(call_log_ids), batch_size):
+            batch = call_log_ids[i : i + batch_size]
+            with self.new_session() as session:
+                query = session.query(CEL).filter(CEL.call_log_id.in_(batch))
+                query.update({'call_log_id': None}, synchronize_session=False)
+
+    def unassociate_all(self, batch_size=UNASSOCIATE_BATCH_SIZE):
+        cel = CEL.__table__
+        # NOTE: paginated by id, so that each batch starts where the previous
+        # one stopped instead of scanning the CELs already unassociated
+        associated_cels = (
+            select([cel.c.id])
+            .where(cel.c.id > bindparam('last_id'))
+            .where(cel.c.call_log_id.isnot(None))
+            .order_by(cel.c.id.asc())
+            .limit(batch_size)
+        )
+        query = (
+            cel.update()
+            .values(call_log_id=None)
+            .where(cel.c.id.in_(associated_cels))
+            .returning(cel.c.id)
+        )
+        last_id = 0
+        while True:
+            with self.new_session() as session:
+                ids = [id_ for id_, in session.execute(query, {'last_id': last_id})]
+            if not ids:
+                break
+            last_id = max(ids)
+
+    def _correlated_linkedids(self, session, base_cels):
+        # the closure of the linkedids sharing channels, e.g. transfers or
+        # pickups chaining several linkedids, found in a recursive query
+        correlated_linkedids = (
+            session.query(CEL.linkedid.label('linkedid'))
+            .filter(CEL.uniqueid.in_(base_cels))
+            .cte('correlated_linkedids', recursive=True)
+        )
+        linked_cel = aliased(CEL)
+        shared_channel_cel = aliased(CEL)
+        correlated_linkedids = correlated_linkedids.union(
+            session.query(shared_channel_cel.linkedid)
+            .join(linked_cel, linked_cel.uniqueid == shared_channel_cel.uniqueid)
+            .filter(linked_cel.linkedid == correlated_linkedids.c.linkedid)
+        )
+        return session.query(correlated_linkedids.c.linkedid)
 
     def _correlated_cels_by_uniqueid(self, session, base_cels):
-        unique_ids = {row.uniqueid for row in base_cels.all()}
-        correlated_linkedids = {
-            row.linkedid
-            for row in session.query(CEL.linkedid)
-            .distinct(CEL.linkedid)
-            .filter(CEL.uniqueid.in_(unique_ids))
-            .all()
-        }
+        correlated_linkedids = self._correlated_linkedids(session, base_cels)
         correlated_cels = (
             session.query(CEL)
             .filter(CEL.linkedid.in_(correlated_linkedids))
-            .order_by(CEL.eventtime.asc())
+            .order_by(CEL.eventtime.asc(), CEL.id.asc())
         )
 
         return correlated_cels
 
+    def _stream_correlated_cels_by_uniqueid(
+        self, session, base_cels
+    ) -> Iterator[CELRow]:
+        correlated_linkedids = self._correlated_linkedids(session, base_cels)
+        query = (
+            session.query(*CEL_ROW_COLUMNS)
+            .filter(CEL.linkedid.in_(correlated_linkedids))
+            .order_by(CEL.eventtime.asc(), CEL.id.asc())
+            .yield_per(STREAM_BATCH_SIZE)
+        )
+        for row in query:
+            yield CELRow._make(row)
+
+    def _filter_unprocessed(self, query):
+        # NOTE: same predicate as the partial index on (eventtime, id) of the
+        # unprocessed CELs, to only read the unprocessed tail of the table
+        return query.filter(CEL.call_log_id.is_(None)).filter(
+            CEL.channame != 'Message/ast_msg_queue'  # ignore SIP chat
+        )
+
+    def _last_unprocessed_uniqueids(self, session, limit=None, older=None):
+        query = self._filter_unprocessed(session.query(CEL.uniqueid)).order_by(
+            CEL.eventtime.desc(), CEL.id.desc()
+        )
+
+        if limit:
+            query = query.limit(limit)
+        elif older:
+            query = query.filter(CEL.eventtime >= older)
+        return query
+
     def find_last_unprocessed(self, limit=None, older=None):
         with self.new_session() as session:
-            subquery = (
-                session.query(CEL.uniqueid)
-                .filter(CEL.call_log_id.is_(None))
-                .filter(CEL.channame != 'Message/ast_msg_queue')  # ignore SIP chat
-                .order_by(CEL.eventtime.desc())
+            subquery = self._last_unprocessed_uniqueids(session, limit, older)
+            cels = list(self._correlated_cels_by_uniqueid(session, subquery))
+            return eject(session, cels)
+
+    def stream_last_unprocessed(self, limit=None, older=None) -> Iterator[CELRow]:
+        """
+        Same as find_last_unprocessed, without loading all the CELs in memory:
+        the CELs are fetched with a server-side cursor, in chronological order
+        """
+        with self.new_streaming_session() as session:
+            subquery = self._last_unprocessed_uniqueids(session, limit, older)
+            yield from self._stream_correlated_cels_by_uniqueid(session, subquery)
+
+    def count_unprocessed(self, older=None, after=None):
+        with self.new_session() as session:
+            query = self._filter_unprocessed(session.query(func.count(CEL.id)))
+            query = self._filter_range(query, older, after)
+            return query.scalar()
+
+    def find_next_unprocessed(self, limit, older=None, after=None):
+        """
+        Return the (eventtime, id, uniqueid) of the next `limit` unprocessed
+        CELs following the (eventtime, id) key `after`, in ascending order
+        """
+        with self.new_session() as session:
+            query = self._filter_unprocessed(
+                session.query(CEL.eventtime, CEL.id, CEL.uniqueid)
             )
+            query = self._filter_range(query, older, after)
+            query = query.order_by(CEL.eventtime.asc(), CEL.id.asc()).limit(limit)
+            return query.all()
 
-            if limit:
-                subquery = subquery.limit(limit)
-            elif older:
-                subquery = subquery.filter(CEL.eventtime >= older)
+    def _filter_range(self, query, older, after):
+        if older:
+            query = query.filter(CEL.eventtime >= older)
+        if after:
+            query = query.filter(tuple_(CEL.eventtime, CEL.id) > tuple_(*after))
+        return query
 
-            cels = list(self._correlated_cels_by_uniqueid(session, subquery))
-            return eject(session, cels)
+    def stream_from_uniqueids(self, uniqueids) -> Iterator[CELRow]:
+        with self.new_streaming_session() as session:
+            unique_cels = session.query(CEL.uniqueid).filter(
+                CEL.uniqueid.in_(uniqueids)
+            )
+            yield from self._stream_correlated_cels_by_uniqueid(session, unique_cels)
 
     def find_from_linked_id(self, linked_id):
+        return self.find_from_linked_ids([linked_id])
+
+    def find_ids_from_linked_ids(self, linked_ids) -> dict[str, list[tuple]]:
+        """
+        Return the (uniqueid, eventtype, eventtime, id, call_log_id) of the CELs
+        of each linkedid
+        """
+        with self.new_session() as session:
+            query = session.query(
+                CEL.linkedid,
+                CEL.uniqueid,
+                CEL.eventtype,
+                CEL.eventtime,
+                CEL.id,
+                CEL.call_log_id,
+            ).filter(CEL.linkedid.in_(linked_ids))
+            result = defaultdict(list)
+            for linked_id, *row in query:
+                result[linked_id].append(tuple(row))
+            return dict(result)
+
+    def find_from_linked_ids(self, linked_ids):
         with self.new_session() as session:
-            linked_cels = (
-                session.query(CEL.uniqueid)
-                .distinct(CEL.uniqueid)
-                .filter(CEL.linkedid == linked_id)
+            linked_cels = session.query(CEL.uniqueid).filter(
+                CEL.linkedid.in_(linked_ids)
             )
             correlated_cels = list(
                 self._correlated_cels_by_uniqueid(session, linked_cels)
@@ -0,0 +1,120 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from collections.abc import Collection
+
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import ConfdContext, ConfdLine, ConfdUser
+from .base import BaseDAO
+
+# number of rows per INSERT statement, bounded by the maximum number of parameters
+INSERT_BATCH_SIZE = 1000
+
+
+class ConfdSnapshotDAO(BaseDAO):
+    def replace_all(
+        self,
+        users: list[dict],
+        lines: list[dict],
+        contexts: list[dict],
+        kept_user_uuids: Collection[str] = (),
+        kept_line_ids: Collection[int] = (),
+        kept_context_names: Collection[str] = (),
+    ):
+        """Replace every row, except the rows of the kept keys"""
+        with self.new_session() as session:
+            for column, rows, kept_keys in (
+                (ConfdUser.uuid, users, kept_user_uuids),
+                (ConfdLine.id, lines, kept_line_ids),
+                (ConfdContext.name, contexts, kept_context_names),
+            ):
+                query = session.query(column.class_)
+                if kept_keys:
+                    query = query.filter(column.notin_(kept_keys))
+                query.delete(synchronize_session=False)
+                rows = [row for row in rows if row[column.key] not in kept_keys]
+                for i in range(0, len(rows), INSERT_BATCH_SIZE):
+                    session.execute(
+                        insert(column.class_).values(rows[i : i + INSERT_BATCH_SIZE])
+                    )
+
+    def upsert_user(self, row: dict):
+        self._upsert(ConfdUser, 'uuid', row)
+
+    def upsert_line(self, row: dict):
+        self._upsert(ConfdLine, 'id', row)
+
+    def upsert_context(self, row: dict):
+        self._upsert(ConfdContext, 'name', row)
+
+    def _upsert(self, model, primary_key: str, row: dict):
+        values = {key: value for key, value in row.items() if key != primary_key}
+        query = (
+            insert(model)
+            .values(row)
+            .on_conflict_do_update(index_elements=[primary_key], set_=values)
+        )
+        with self.new_session() as session:
+            session.execute(query)
+
+    def delete_user(self, user_uuid: str):
+        with self.new_session() as session:
+            session.query(ConfdUser).filter(ConfdUser.uuid == user_uuid).delete()
+
+    def delete_line(self, line_id: int):
+        with self.new_session() as session:
+            session.query(ConfdLine).filter(ConfdLine.id == line_id).delete()
+
+    def delete_context(self, name: str):
+        with self.new_session() as session:
+            session.query(ConfdContext).filter(ConfdContext.name == name).delete()
+
+    def find_line_ids_by_extension_id(self, extension_id: int) -> list[int]:
+        with self.new_session() as session:
+            query = session.query(ConfdLine.id).filter(
+                ConfdLine.extension_id == extension_id
+            )
+            return [line_id for (line_id,) in query]
+
+    def find_lines(self, line_names) -> list[tuple[ConfdLine, ConfdUser | None]]:
+        """Return the lines with the given names, and the first user of each line"""
+        if not line_names:
+            return []
+
+        with self.new_session() as session:
+            query = (
+                session.query(ConfdLine, ConfdUser)
+                .outerjoin(ConfdUser, ConfdUser.uuid == ConfdLine.user_uuid)
+                .filter(ConfdLine.name.in_(line_names))
+                .order_by(ConfdLine.id)
+            )
+            rows = query.all()
+            session.expunge_all()
+            return rows
+
+    def find_users(self, user_uuids) -> list[tuple[ConfdUser, ConfdLine | None]]:
+        """Return the users with the given uuids, and the main line of each user"""
+        if not user_uuids:
+            return []
+
+        with self.new_session() as session:
+            query = (
+                session.query(ConfdUser, ConfdLine)
+                .outerjoin(ConfdLine, ConfdLine.id == ConfdUser.line_id)
+                .filter(ConfdUser.uuid.in_(user_uuids))
+            )
+            rows = query.all()
+            session.expunge_all()
+            return rows
+
+    def find_context_tenant_uuid(self, name: str) -> str | None:
+        with self.new_session() as session:
+            tenant_uuid = (
+                session.query(ConfdContext.tenant_uuid)
+                .filter(ConfdContext.name == name)
+                .scalar()
+            )
+            return str(tenant_uuid) if tenant_uuid else None
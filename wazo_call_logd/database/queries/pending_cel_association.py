@@ -0,0 +1,51 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+from ..models import PendingCELAssociation
+from .base import BaseDAO
+
+
+class PendingCELAssociationDAO(BaseDAO):
+    def create(
+        self, cel_ids, call_log_ids, unassociated_call_log_ids
+    ) -> PendingCELAssociation:
+        with self.new_session() as session:
+            pending = PendingCELAssociation(
+                cel_ids=list(cel_ids),
+                call_log_ids=list(call_log_ids),
+                unassociated_call_log_ids=sorted(unassociated_call_log_ids),
+            )
+            session.add(pending)
+            session.flush()
+            session.expunge(pending)
+        return pending
+
+    def find_all(self) -> list[PendingCELAssociation]:
+        with self.new_session() as session:
+            pendings = session.query(PendingCELAssociation).order_by(
+                PendingCELAssociation.id
+            )
+            return _eject(session, pendings.all())
+
+    def find_all_by_cel_ids(self, cel_ids) -> list[PendingCELAssociation]:
+        with self.new_session() as session:
+            pendings = (
+                session.query(PendingCELAssociation)
+                .filter(PendingCELAssociation.cel_ids.overlap(list(cel_ids)))
+                .order_by(PendingCELAssociation.id)
+            )
+            return _eject(session, pendings.all())
+
+    def delete_from_list(self, ids):
+        with self.new_session() as session:
+            query = session.query(PendingCELAssociation)
+            query = query.filter(PendingCELAssociation.id.in_(ids))
+            query.delete(synchronize_session=False)
+
+
+def _eject(session, objects):
+    for obj in objects:
+        session.expunge(obj)
+    return objects
@@ -0,0 +1,41 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from datetime import datetime, timezone
+
+from ..models import SweepCheckpoint
+from .base import BaseDAO
+
+
+class SweepCheckpointDAO(BaseDAO):
+    def find(self):
+        with self.new_session() as session:
+            checkpoint = session.query(SweepCheckpoint).first()
+            if checkpoint:
+                session.expunge(checkpoint)
+        return checkpoint
+
+    def create(self, older):
+        with self.new_session() as session:
+            # only one sweep can run at a time, see the pidfile of wazo-call-logs
+            session.query(SweepCheckpoint).delete()
+            checkpoint = SweepCheckpoint(
+                older=older,
+                processed_cel_count=0,
+                updated_at=datetime.now(timezone.utc),
+            )
+            session.add(checkpoint)
+            session.flush()
+            session.expunge(checkpoint)
+        return checkpoint
+
+    def update(self, checkpoint):
+        checkpoint.updated_at = datetime.now(timezone.utc)
+        with self.new_session() as session:
+            session.add(checkpoint)
+            session.flush()
+            session.expunge(checkpoint)
+
+    def delete(self):
+        with self.new_session() as session:
+            session.query(SweepCheckpoint).delete()
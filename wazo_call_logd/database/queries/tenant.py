@@ -1,17 +1,57 @@
-# Copyright 2021-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2021-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import threading
+
+from sqlalchemy.dialects.postgresql import insert
+
 from ..models import Tenant
-from .base import BaseDAO
+from .base import IN_TRANSACTION, BaseDAO
 
 
 class TenantDAO(BaseDAO):
-    def create_all_uuids_if_not_exist(self, tenant_uuids):
+    def __init__(self, Session):
+        super().__init__(Session)
+        # NOTE: tenants known to exist, shared by every thread of the process
+        self._known_uuids: set[str] = set()
+        self._lock = threading.Lock()
+
+    def load_known_uuids(self):
         with self.new_session() as session:
-            for tenant_uuid in tenant_uuids:
-                if session.query(Tenant).get(tenant_uuid):
-                    continue
+            known_uuids = {str(uuid) for (uuid,) in session.query(Tenant.uuid)}
+        with self._lock:
+            self._known_uuids = known_uuids
+
+    def remember_uuids(self, tenant_uuids):
+        with self._lock:
+            self._known_uuids.update(tenant_uuids)
 
-                tenant = Tenant(uuid=tenant_uuid)
-                session.add(tenant)
-                session.flush()
+    def forget_uuid(self, tenant_uuid):
+        with self._lock:
+            self._known_uuids.discard(str(tenant_uuid))
+
+    def forget_all_uuids(self):
+        with self._lock:
+            self._known_uuids = set()
+
+    def create_all_uuids_if_not_exist(self, tenant_uuids) -> set[str]:
+        """
+        Return the uuids of the tenants created. In a transaction, they must be
+        remembered with `remember_uuids` once the transaction is committed.
+        """
+        with self._lock:
+            missing_uuids = {str(uuid) for uuid in tenant_uuids} - self._known_uuids
+        if not missing_uuids:
+            return missing_uuids
+
+        with self.new_session() as session:
+            in_transaction = session.info.get(IN_TRANSACTION, False)
+            query = (
+                insert(Tenant)
+                .values([{'uuid': uuid} for uuid in sorted(missing_uuids)])
+                .on_conflict_do_nothing()
+            )
+            session.execute(query)
+        if not in_transaction:
+            self.remember_uuids(missing_uuids)
+        return missing_uuids
@@ -0,0 +1,77 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import threading
+
+from .circuit_breaker import CircuitBreaker
+from .generation_queue import GenerationQueue
+
+logger = logging.getLogger(__name__)
+
+
+class EnrichmentWorker:
+    """
+    Periodically generate again the call logs written without their
+    participants while confd was slow, once confd is fast enough again.
+    The call logs are generated by the generation queue, so that they are
+    never generated by a worker at the same time.
+    """
+
+    def __init__(
+        self,
+        generation_queue: GenerationQueue,
+        confd_breaker: CircuitBreaker,
+        interval=60,
+        batch_size=100,
+    ):
+        self._generation_queue = generation_queue
+        self._confd_breaker = confd_breaker
+        self._interval = interval
+        self._batch_size = batch_size
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @classmethod
+    def from_config(cls, generation_queue, confd_breaker, config):
+        return cls(
+            generation_queue,
+            confd_breaker,
+            interval=config['interval'],
+            batch_size=config['batch_size'],
+        )
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='call-log-enrichment', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _run(self):
+        while not self._stopped.wait(self._interval):
+            try:
+                self.enrich()
+            except Exception:
+                logger.exception('Failed to enrich call logs')
+
+    def enrich(self):
+        while self._confd_breaker.allow_request() and not self._stopped.is_set():
+            count = self._generation_queue.enrich(self._batch_size)
+            if count < self._batch_size:
+                return
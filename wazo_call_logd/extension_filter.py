@@ -1,4 +1,4 @@
-# Copyright 2021 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2021-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import logging
@@ -12,6 +12,9 @@ class ExtensionFilter:
     def __init__(self, default_extensions=DEFAULT_HIDDEN_EXTENSIONS):
         self._extensions = set(default_extensions)
 
+    def copy(self):
+        return ExtensionFilter(self._extensions)
+
     def add_exten(self, exten):
         logger.debug('New filtered extension: "%s"', exten)
         self._extensions.add(exten)
@@ -27,3 +30,12 @@ class ExtensionFilter:
         call.destination_exten = self.filter(call.destination_exten)
         call.destination_internal_exten = self.filter(call.destination_internal_exten)
         return call
+
+
+class _FrozenExtensionFilter(ExtensionFilter):
+    def add_exten(self, exten):
+        raise TypeError('The default extension filter cannot be modified')
+
+
+# NOTE: shared by the call logs, which copy it before adding an extension
+DEFAULT_EXTENSION_FILTER: ExtensionFilter = _FrozenExtensionFilter()
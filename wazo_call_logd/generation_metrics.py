@@ -0,0 +1,142 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+
+from xivo.status import Status
+
+# upper bounds (in seconds) of the histogram buckets
+DEFAULT_BUCKETS = (
+    0.00001,
+    0.0001,
+    0.001,
+    0.01,
+    0.1,
+    1.0,
+    10.0,
+)
+
+
+class Histogram:
+    """
+    Number of observed durations by bucket, like a Prometheus histogram: each
+    bucket counts the durations lower than or equal to its upper bound.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = buckets
+        # the last count is for the durations greater than every bucket
+        self._counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self) -> dict:
+        buckets, cumulative_count = [], 0
+        for upper_bound, count in zip(self._buckets, self._counts):
+            cumulative_count += count
+            buckets.append({'le': upper_bound, 'count': cumulative_count})
+        # NOTE: the count of the +Inf bucket is the total count
+        return {'count': self.count, 'sum': self.sum, 'buckets': buckets}
+
+
+class _CountedConfdResource:
+    def __init__(self, resource, name: str, metrics: GenerationMetrics):
+        self._resource = resource
+        self._name = name
+        self._metrics = metrics
+
+    def __getattr__(self, method_name):
+        method = getattr(self._resource, method_name)
+        if not callable(method):
+            return method
+        call_name = f'{self._name}.{method_name}'
+
+        def counted(*args, **kwargs):
+            self._metrics.count_confd_call(call_name)
+            return method(*args, **kwargs)
+
+        return counted
+
+
+class _CountedConfdClient:
+    """The confd client of the generator, counting the requests to confd"""
+
+    def __init__(self, confd, metrics: GenerationMetrics):
+        self._confd = confd
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return _CountedConfdResource(getattr(self._confd, name), name, self._metrics)
+
+
+class GenerationMetrics:
+    """
+    Durations of the stages of the generation of call logs and of the
+    interpretation of each CEL event type, and number of requests to confd,
+    since the service started.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._stages: dict[str, Histogram] = {}
+        self._cel_eventtypes: dict[str, Histogram] = {}
+        self._confd_calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        if not config['enabled']:
+            return None
+        return cls()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(name, time.perf_counter() - start)
+
+    def observe_stage(self, name: str, elapsed: float):
+        self._observe(self._stages, name, elapsed)
+
+    def observe_cel(self, eventtype: str, elapsed: float):
+        self._observe(self._cel_eventtypes, eventtype, elapsed)
+
+    def count_confd_call(self, name: str):
+        with self._lock:
+            self._confd_calls[name] += 1
+
+    def counted_confd(self, confd):
+        return _CountedConfdClient(confd, self)
+
+    def _observe(self, histograms: dict[str, Histogram], name: str, elapsed: float):
+        with self._lock:
+            histogram = histograms.get(name)
+            if histogram is None:
+                histogram = histograms[name] = Histogram(self._buckets)
+            histogram.observe(elapsed)
+
+    def provide_status(self, status):
+        with self._lock:
+            stages = {name: h.to_dict() for name, h in self._stages.items()}
+            cel_eventtypes = {
+                name: h.to_dict() for name, h in self._cel_eventtypes.items()
+            }
+            confd_calls = dict(self._confd_calls)
+        status['generation_metrics']['status'] = Status.ok
+        status['generation_metrics']['stages'] = stages
+        status['generation_metrics']['cel_eventtypes'] = cel_eventtypes
+        status['generation_metrics']['confd_calls'] = confd_calls
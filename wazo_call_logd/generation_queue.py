@@ -0,0 +1,220 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import queue
+import threading
+import time
+from collections.abc import Iterator
+
+from xivo.status import Status
+
+from .manager import CallLogsManager
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class CorrelationLocks:
+    """
+    Set of linkedids currently being generated by a worker.
+
+    A worker must hold every linkedid of a correlation group before generating
+    it, so that two workers never generate the same call concurrently.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._held: set[str] = set()
+
+    def acquire(self, linked_ids: set[str], blocking=True) -> bool:
+        with self._condition:
+            if blocking:
+                self._condition.wait_for(lambda: not (linked_ids & self._held))
+            elif linked_ids & self._held:
+                return False
+            self._held |= linked_ids
+            return True
+
+    def release(self, linked_ids: set[str]):
+        with self._condition:
+            self._held -= linked_ids
+            self._condition.notify_all()
+
+
+class GenerationQueue:
+    """
+    Collect linkedids from LINKEDID_END events and generate their call logs
+    in micro-batches, i.e. one CEL fetch, one interpretation pass and one
+    write transaction for all the linkedids ended during a short window.
+
+    Batches are generated by a pool of worker threads, each one using its own
+    database sessions. The queue is bounded: when it is full, `put` blocks the
+    bus consumer until a worker catches up.
+    """
+
+    def __init__(
+        self,
+        manager: CallLogsManager,
+        batch_size=100,
+        batch_timeout=0.1,
+        workers=1,
+        queue_size=10000,
+    ):
+        self._manager = manager
+        self._batch_size = batch_size
+        self._batch_timeout = batch_timeout
+        self._workers = workers
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._threads: list[threading.Thread] = []
+        self._locks = CorrelationLocks()
+
+    @classmethod
+    def from_config(cls, manager, config):
+        return cls(
+            manager,
+            batch_size=config['batch_size'],
+            batch_timeout=config['batch_timeout'],
+            workers=config['workers'],
+            queue_size=config['queue_size'],
+        )
+
+    def start(self):
+        for i in range(self._workers):
+            thread = threading.Thread(
+                target=self._run, name=f'call-log-generation-{i}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def put(self, linked_id: str):
+        if self._queue.full():
+            logger.warning(
+                'Call log generation queue is full (%s linkedids), '
+                'waiting for workers to catch up',
+                self._queue.maxsize,
+            )
+        self._queue.put(linked_id)
+
+    def provide_status(self, status):
+        full = self._queue.full()
+        status['generation_queue']['status'] = Status.fail if full else Status.ok
+        status['generation_queue']['size'] = self._queue.qsize()
+        status['generation_queue']['max_size'] = self._queue.maxsize
+        status['generation_queue']['workers'] = self._workers
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            linked_ids, stopping = self._next_batch()
+            if linked_ids:
+                self.process(linked_ids)
+
+    def _next_batch(self) -> tuple[list[str], bool]:
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+
+        linked_ids = [first]
+        deadline = time.monotonic() + self._batch_timeout
+        while len(linked_ids) < self._batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                linked_id = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if linked_id is _STOP:
+                return linked_ids, True
+            linked_ids.append(linked_id)
+        return linked_ids, False
+
+    def process(self, linked_ids: list[str]):
+        start_time = time.time()
+        try:
+            self._generate(linked_ids)
+        except Exception:
+            if len(linked_ids) == 1:
+                logger.exception(
+                    'Failed to generate call log for linkedid \"%s\"', linked_ids[0]
+                )
+                return
+            logger.exception(
+                'Failed to generate call logs for %s linkedids, '
+                'retrying each linkedid separately',
+                len(linked_ids),
+            )
+            for linked_id in linked_ids:
+                self.process([linked_id])
+            return
+
+        processing_time = time.time() - start_time
+        logger.info(
+            'Generated call logs for linkedids %s in %.2fs',
+            ', '.join(f'\"{linked_id}\"' for linked_id in linked_ids),
+            processing_time,
+        )
+
+    def enrich(self, limit: int) -> int:
+        """
+        Generate again the call logs flagged for enrichment, holding their
+        linkedids like the workers. Return the number of call logs that were
+        flagged.
+        """
+        pending = self._manager.find_enrichment_pending(limit)
+        if not pending:
+            return 0
+
+        linked_ids = sorted(
+            {conversation_id for _, conversation_id in pending if conversation_id}
+        )
+        with self._correlated_cels(linked_ids) as cels:
+            self._manager.enrich_call_logs(pending, cels)
+        return len(pending)
+
+    def _generate(self, linked_ids: list[str]):
+        with self._correlated_cels(linked_ids) as cels:
+            self._manager.generate_from_cels(cels)
+
+    @contextlib.contextmanager
+    def _correlated_cels(self, linked_ids: list[str]) -> Iterator[list]:
+        held = set(linked_ids)
+        self._locks.acquire(held)
+        try:
+            while True:
+                cels = self._manager.find_cels_from_linked_ids(linked_ids)
+                # correlated linkedids (e.g. pickups) are only known from the CELs
+                correlated = {cel.linkedid for cel in cels} - held
+                if not correlated:
+                    break
+                if not self._locks.acquire(correlated, blocking=False):
+                    logger.debug(
+                        'Waiting for correlated linkedids %s to be generated',
+                        correlated,
+                    )
+                    self._locks.release(held)
+                    self._locks.acquire(held | correlated)
+                held |= correlated
+                # the CELs may have changed while waiting, fetch them again
+            yield cels
+        finally:
+            self._locks.release(held)
@@ -1,16 +1,15 @@
-# Copyright 2022-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2022-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 import logging
-from collections import namedtuple
-from collections.abc import Iterator
+from collections import defaultdict, namedtuple
+from collections.abc import Iterable, Iterator
 from itertools import groupby
 from operator import attrgetter
 
 from wazo_confd_client import Client as ConfdClient
-from xivo.asterisk.protocol_interface import protocol_interface_from_channel
 from xivo_dao.alchemy.cel import CEL
 
 from wazo_call_logd.cel_interpretor import AbstractCELInterpretor
@@ -18,8 +17,19 @@ from wazo_call_logd.database.cel_event_type import CELEventType
 from wazo_call_logd.exceptions import InvalidCallLogException
 from wazo_call_logd.raw_call_log import RawCallLog
 
+from .cel_sequence import CelSequence
+from .circuit_breaker import CircuitBreaker
 from .database.models import CallLog, CallLogParticipant
-from .participant import ParticipantInfo, find_participant, find_participant_by_uuid
+from .generation_metrics import GenerationMetrics
+from .incremental import IncrementalInterpretor
+from .participant import (
+    ContextTenantCache,
+    ParticipantCache,
+    ParticipantInfo,
+    ResolvedParticipants,
+    channel_protocol_interface,
+    line_name_from_channel,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,16 +40,46 @@ CallLogsCreation = namedtuple(
 
 
 class _ParticipantsProcessor:
-    def __init__(self, confd_client: ConfdClient):
+    """
+    Find the participants of a call log. With `defer_lookups`, the participants
+    that were not resolved beforehand are not looked up in confd: the processor
+    is then `deferred` if some participants are missing.
+    """
+
+    def __init__(
+        self,
+        confd_client: ConfdClient,
+        participant_cache: ParticipantCache | None = None,
+        resolved_participants: ResolvedParticipants | None = None,
+        defer_lookups: bool = False,
+    ):
         self.confd: ConfdClient = confd_client
+        if participant_cache is None:
+            participant_cache = ParticipantCache()
+        self.participant_cache = participant_cache
+        self.resolved_participants = resolved_participants or ResolvedParticipants(
+            {}, {}
+        )
         self.confd_participants: dict[str, ParticipantInfo] = {}
+        self.defer_lookups = defer_lookups
+        self.deferred = False
 
     def __call__(self, call_log: RawCallLog) -> RawCallLog:
         self._fetch_participants(call_log)
         return call_log
 
     def _fetch_participant_from_channel(self, channel: str) -> ParticipantInfo | None:
-        confd_participant = find_participant(self.confd, channel)
+        line_name = line_name_from_channel(channel)
+        if line_name in self.resolved_participants.by_line_name:
+            confd_participant = self.resolved_participants.by_line_name[line_name]
+        elif self.defer_lookups:
+            if line_name:
+                self.deferred = True
+            confd_participant = None
+        else:
+            confd_participant = self.participant_cache.find_participant(
+                self.confd, channel
+            )
         if not confd_participant:
             logger.debug('No participant found for channel %s', channel)
             return
@@ -59,9 +99,16 @@ class _ParticipantsProcessor:
     def _fetch_participant_from_user_uuid(
         self, user_uuid: str
     ) -> ParticipantInfo | None:
-        confd_participant = self.confd_participants.get(user_uuid)
+        confd_participant = self.confd_participants.get(
+            user_uuid
+        ) or self.resolved_participants.by_user_uuid.get(user_uuid)
         if not confd_participant:
-            confd_participant = find_participant_by_uuid(self.confd, user_uuid)
+            if self.defer_lookups:
+                self.deferred = True
+                return None
+            confd_participant = self.participant_cache.find_participant_by_uuid(
+                self.confd, user_uuid
+            )
             if not confd_participant:
                 logger.error('No user found for user_uuid %s', user_uuid)
                 return
@@ -73,6 +120,7 @@ class _ParticipantsProcessor:
         self, call_log: RawCallLog
     ) -> list[CallLogParticipant]:
         connected_participants = []
+        # NOTE: raw_participants is the index of the participants by channel
         for channel_name, raw_attributes in call_log.raw_participants.items():
             logger.debug(
                 'raw_participant info for channel %s: %s', channel_name, raw_attributes
@@ -102,22 +150,27 @@ class _ParticipantsProcessor:
         # can augment participants extracted from channels
         # and fill in unreachable participants with no corresponding channel
         unreached_participants = []
-        users_from_cel = (
-            str(participant_info['user_uuid'])
-            for participant_info in call_log.participants_info
-            if 'user_uuid' in participant_info
-        )
-        users_from_channels = (str(p.user_uuid) for p in connected_participants)
-        user_uuids = set(users_from_cel).union(users_from_channels)
+        # NOTE: indexed once by user, to merge the participants in linear time
+        connected_participants_by_user: dict[
+            str, list[CallLogParticipant]
+        ] = defaultdict(list)
+        for participant in connected_participants:
+            connected_participants_by_user[str(participant.user_uuid)].append(
+                participant
+            )
+        participants_info_by_user: dict[str, list[dict]] = defaultdict(list)
+        for participant_info in call_log.participants_info:
+            if 'user_uuid' in participant_info:
+                participants_info_by_user[participant_info['user_uuid']].append(
+                    participant_info
+                )
+        users_from_cel = (str(user_uuid) for user_uuid in participants_info_by_user)
+        user_uuids = set(users_from_cel).union(connected_participants_by_user)
         for user_uuid in user_uuids:
-            user_connected_participants = [
-                p for p in connected_participants if str(p.user_uuid) == user_uuid
-            ]
-            user_participants_info = [
-                p
-                for p in call_log.participants_info
-                if 'user_uuid' in p and p['user_uuid'] == user_uuid
-            ]
+            user_connected_participants = connected_participants_by_user.get(
+                user_uuid, []
+            )
+            user_participants_info = participants_info_by_user.get(user_uuid, [])
             logger.debug(
                 'Identified user participant %s(from CEL: %d, from channels: %d)',
                 user_uuid,
@@ -159,50 +212,200 @@ class _ParticipantsProcessor:
         call_log.participants = connected_participants + unreached_participants
 
 
+class _DisjointSet:
+    """
+    Union-find structure, with path halving and union by size
+    """
+
+    def __init__(self):
+        self._parents: dict[str, str] = {}
+        self._sizes: dict[str, int] = {}
+
+    def find(self, item: str) -> str:
+        parents = self._parents
+        if item not in parents:
+            parents[item] = item
+            self._sizes[item] = 1
+            return item
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    def union(self, item1: str, item2: str) -> str:
+        root1, root2 = self.find(item1), self.find(item2)
+        if root1 == root2:
+            return root1
+        if self._sizes[root1] < self._sizes[root2]:
+            root1, root2 = root2, root1
+        self._parents[root2] = root1
+        self._sizes[root1] += self._sizes.pop(root2)
+        return root1
+
+
 def _group_cels_by_shared_channels(
     cels: list[CEL],
 ) -> Iterator[tuple[set[str], list[CEL]]]:
-    cels = sorted(cels, key=attrgetter('linkedid'))
-    linkedid_sequences = [
-        (linkedid, list(cels))
-        for linkedid, cels in groupby(cels, key=attrgetter('linkedid'))
-    ]
-
     # identify linkedid-based cel sequences that share uniqueids(i.e. channels)
     # this correlation is transitive,
     # i.e. if a channel is shared between sequence a and b, and between b and c,
     # then a and c are also correlated
-    correlation_groups: list[tuple[set[str], set[str], list[CEL]]] = []
-    for linkedid, cels in linkedid_sequences:
-        uniqueids = {cel.uniqueid for cel in cels}
-        correlated_sequences = False
-        for (
-            correlated_uniqueids,
-            correlated_linkedids,
-            correlated_cels,
-        ) in correlation_groups:
-            # correlation identified if any channel in this cel sequence
-            # are also in other sequences in the group
-            if uniqueids & correlated_uniqueids:
-                correlated_cels.extend(cels)  # add cels to correlation group
-                correlated_uniqueids.update(
-                    uniqueids
-                )  # expand the correlation group to the channels of this sequence
-                correlated_sequences = True
-                correlated_linkedids.add(linkedid)
-        if not correlated_sequences:
-            # if no correlation found, create a new correlation group
-            correlation_groups.append((uniqueids, {linkedid}, list(cels)))
+    channels = _DisjointSet()
+    first_uniqueid_by_linkedid: dict[str, str] = {}
+    for cel in cels:
+        first_uniqueid = first_uniqueid_by_linkedid.setdefault(
+            cel.linkedid, cel.uniqueid
+        )
+        channels.union(first_uniqueid, cel.uniqueid)
+
+    correlation_groups: dict[str, tuple[set[str], list[CEL]]] = {}
+    for cel in cels:
+        root = channels.find(cel.uniqueid)
+        if root not in correlation_groups:
+            correlation_groups[root] = (set(), [])
+        linkedids, correlated_cels = correlation_groups[root]
+        linkedids.add(cel.linkedid)
+        correlated_cels.append(cel)
 
     yield from (
-        (linkedids, sorted(cels, key=attrgetter('eventtime')))
-        for (uniqueids, linkedids, cels) in correlation_groups
+        (linkedids, _sorted_cels(cels))
+        for linkedids, cels in sorted(
+            correlation_groups.values(), key=lambda group: min(group[0])
+        )
+    )
+
+
+class _StreamedCorrelationGroup:
+    def __init__(self):
+        self.linkedids: set[str] = set()
+        self.uniqueids: set[str] = set()
+        self.open_linkedids: set[str] = set()
+        self.open_uniqueids: set[str] = set()
+        self.cels: list[CEL] = []
+
+    def __len__(self):
+        return len(self.linkedids) + len(self.uniqueids)
+
+    def add(self, cel: CEL):
+        if cel.linkedid not in self.linkedids:
+            self.linkedids.add(cel.linkedid)
+            self.open_linkedids.add(cel.linkedid)
+        if cel.uniqueid not in self.uniqueids:
+            self.uniqueids.add(cel.uniqueid)
+            self.open_uniqueids.add(cel.uniqueid)
+        if cel.eventtype == CELEventType.chan_end:
+            self.open_uniqueids.discard(cel.uniqueid)
+        elif cel.eventtype == CELEventType.linkedid_end:
+            self.open_linkedids.discard(cel.linkedid)
+        self.cels.append(cel)
+
+    def merge(self, other: _StreamedCorrelationGroup):
+        self.linkedids |= other.linkedids
+        self.uniqueids |= other.uniqueids
+        self.open_linkedids |= other.open_linkedids
+        self.open_uniqueids |= other.open_uniqueids
+        self.cels.extend(other.cels)
+
+    @property
+    def complete(self) -> bool:
+        return not (self.open_linkedids or self.open_uniqueids)
+
+
+def stream_cels_by_shared_channels(
+    cels: Iterable[CEL],
+) -> Iterator[tuple[set[str], list[CEL]]]:
+    """
+    Same as _group_cels_by_shared_channels, for an iterable of CELs in
+    chronological order: a correlation group is yielded as soon as all its
+    linkedids and channels have ended, so that only the groups of calls in
+    progress are kept in memory. The groups still open are yielded at the end.
+    """
+    groups_by_linkedid: dict[str, _StreamedCorrelationGroup] = {}
+    groups_by_uniqueid: dict[str, _StreamedCorrelationGroup] = {}
+
+    def merge(group, other):
+        if other is group:
+            return group
+        if len(group) < len(other):
+            group, other = other, group
+        group.merge(other)
+        for linkedid in other.linkedids:
+            groups_by_linkedid[linkedid] = group
+        for uniqueid in other.uniqueids:
+            groups_by_uniqueid[uniqueid] = group
+        return group
+
+    for cel in cels:
+        group = groups_by_linkedid.get(cel.linkedid)
+        channel_group = groups_by_uniqueid.get(cel.uniqueid)
+        if group is None:
+            group = channel_group
+        elif channel_group is not None:
+            group = merge(group, channel_group)
+        if group is None:
+            group = _StreamedCorrelationGroup()
+        group.add(cel)
+        groups_by_linkedid[cel.linkedid] = group
+        groups_by_uniqueid[cel.uniqueid] = group
+
+        if group.complete:
+            for linkedid in group.linkedids:
+                del groups_by_linkedid[linkedid]
+            for uniqueid in group.uniqueids:
+                del groups_by_uniqueid[uniqueid]
+            yield group.linkedids, _sorted_cels(group.cels)
+
+    open_groups = {id(group): group for group in groups_by_linkedid.values()}
+    for group in sorted(open_groups.values(), key=lambda group: min(group.linkedids)):
+        yield group.linkedids, _sorted_cels(group.cels)
+
+
+def _sorted_cels(cels: list[CEL]) -> list[CEL]:
+    return sorted(cels, key=attrgetter('eventtime', 'linkedid'))
+
+
+def partition_cels(cels: list[CEL], slice_size: int) -> list[list[CEL]]:
+    """
+    Split CELs in contiguous time slices of about `slice_size` CELs, without
+    splitting a correlation group across slices
+    """
+    groups = sorted(
+        (group_cels for _, group_cels in _group_cels_by_shared_channels(cels)),
+        key=lambda group_cels: group_cels[0].eventtime,
     )
+    slices: list[list[CEL]] = []
+    current_slice: list[CEL] = []
+    for group_cels in groups:
+        current_slice.extend(group_cels)
+        if len(current_slice) >= slice_size:
+            slices.append(current_slice)
+            current_slice = []
+    if current_slice:
+        slices.append(current_slice)
+    return slices
 
 
 class CallLogsGenerator:
-    def __init__(self, confd, cel_interpretors: list[AbstractCELInterpretor]):
+    def __init__(
+        self,
+        confd,
+        cel_interpretors: list[AbstractCELInterpretor],
+        participant_cache: ParticipantCache | None = None,
+        context_cache: ContextTenantCache | None = None,
+        confd_breaker: CircuitBreaker | None = None,
+        incremental_interpretor: IncrementalInterpretor | None = None,
+        metrics: GenerationMetrics | None = None,
+    ):
         self.confd: ConfdClient = confd
+        self.confd_breaker = confd_breaker
+        self.incremental_interpretor = incremental_interpretor
+        self.metrics = metrics
+        if participant_cache is None:
+            participant_cache = ParticipantCache()
+        self.participant_cache = participant_cache
+        if context_cache is None:
+            context_cache = ContextTenantCache()
+        self.context_cache = context_cache
         self._cel_interpretors = cel_interpretors
         self._service_tenant_uuid = None
 
@@ -217,19 +420,34 @@ class CallLogsGenerator:
             call_logs_to_delete=call_logs_to_delete,
         )
 
+    def from_cel_groups(self, cel_groups: list[tuple[set[str], list[CEL]]]):
+        call_logs_to_delete = set()
+        for _, cels in cel_groups:
+            call_logs_to_delete |= self.list_call_log_ids(cels)
+        new_call_logs = self.call_logs_from_cel_groups(cel_groups)
+        return CallLogsCreation(
+            new_call_logs=new_call_logs,
+            call_logs_to_delete=call_logs_to_delete,
+        )
+
     def call_logs_from_cel(self, cels: list[CEL]) -> list[CallLog]:
-        result = []
-        for linkedids, cels_by_call in _group_cels_by_shared_channels(cels):
+        return self.call_logs_from_cel_groups(_group_cels_by_shared_channels(cels))
+
+    def call_logs_from_cel_groups(
+        self, cel_groups: Iterable[tuple[set[str], list[CEL]]]
+    ) -> list[CallLog]:
+        interpreted_call_logs = []
+        for linkedids, cels_by_call in cel_groups:
             logger.debug(
                 'interpreting %d cels from correlated linkedids(%s)',
                 len(cels_by_call),
                 linkedids,
             )
 
+            # NOTE: indexed once, for the interpretor selection and interpretation
+            cels_by_call = CelSequence(cels_by_call)
             terminated_links = {
-                cel.linkedid
-                for cel in cels_by_call
-                if cel.eventtype == CELEventType.linkedid_end
+                cel.linkedid for cel in cels_by_call.of_type(CELEventType.linkedid_end)
             }
 
             if linkedids != terminated_links:
@@ -240,27 +458,63 @@ class CallLogsGenerator:
                 )
                 continue
 
-            call_log = RawCallLog()
-
-            # Call pickups may have multiple linkedids.
-            # In that case, use the linkedid of the caller, i.e. the smaller one.
-            call_log.conversation_id = min(linkedids)
-            call_log.cel_ids = [cel.id for cel in cels_by_call]
-
             interpretor = self._get_interpretor(cels_by_call)
-            logger.debug('interpreting cels using %s', interpretor.__class__.__name__)
             try:
-                call_log = interpretor.interpret_cels(cels_by_call, call_log)
+                call_log = self._run_stage(
+                    'interpret', self._interpret, linkedids, cels_by_call, interpretor
+                )
+                self._run_stage(
+                    'remove_duplicate_participants',
+                    self._remove_duplicate_participants,
+                    call_log,
+                )
+            except Exception as e:
+                logger.exception(
+                    'CEL interpretation failure for linkedid group %s: %s', linkedids, e
+                )
+                # this CEL sequence failed to be interpreted,
+                # but the next one should be given a chance
+                continue
+            interpreted_call_logs.append((linkedids, call_log))
 
-                self._remove_duplicate_participants(call_log)
-                self._fetch_participants(call_log)
-                self._ensure_tenant_uuid_is_set(call_log)
-                self._fill_extensions_from_participants(call_log)
-                self._remove_incomplete_recordings(call_log)
-                self._handle_recording_pauses(call_log)
+        lookup_confd, resolved_participants = self._run_stage(
+            'resolve_participants',
+            self._resolve_participants,
+            (call_log for _, call_log in interpreted_call_logs),
+        )
+
+        result = []
+        for linkedids, call_log in interpreted_call_logs:
+            try:
+                self._run_stage(
+                    'fetch_participants',
+                    self._fetch_participants,
+                    call_log,
+                    resolved_participants,
+                    lookup_confd,
+                )
+                self._run_stage(
+                    'ensure_tenant_uuid_is_set',
+                    self._ensure_tenant_uuid_is_set,
+                    call_log,
+                    lookup_confd,
+                )
+                self._run_stage(
+                    'fill_extensions_from_participants',
+                    self._fill_extensions_from_participants,
+                    call_log,
+                )
+                self._run_stage(
+                    'remove_incomplete_recordings',
+                    self._remove_incomplete_recordings,
+                    call_log,
+                )
+                self._run_stage(
+                    'handle_recording_pauses', self._handle_recording_pauses, call_log
+                )
 
                 try:
-                    result.append(call_log.to_call_log())
+                    result.append(self._run_stage('to_call_log', call_log.to_call_log))
                 except InvalidCallLogException as e:
                     logger.debug(
                         'Invalid call log detected(linkedids %s): %s', linkedids, e
@@ -269,12 +523,37 @@ class CallLogsGenerator:
                 logger.exception(
                     'CEL interpretation failure for linkedid group %s: %s', linkedids, e
                 )
-                # this CEL sequence failed to be interpreted,
-                # but the next one should be given a chance
                 continue
 
         return result
 
+    def _run_stage(self, name: str, function, *args):
+        if self.metrics is None:
+            return function(*args)
+        with self.metrics.stage(name):
+            return function(*args)
+
+    def _interpret(
+        self, linkedids: set[str], cels: CelSequence, interpretor
+    ) -> RawCallLog:
+        call_log = None
+        if (
+            self.incremental_interpretor
+            and interpretor is self.incremental_interpretor.interpretor
+        ):
+            call_log = self.incremental_interpretor.pop(linkedids, cels)
+        if call_log is None:
+            logger.debug('interpreting cels using %s', interpretor.__class__.__name__)
+            call_log = interpretor.interpret_cels(cels, RawCallLog())
+        else:
+            logger.debug('cels of linkedids %s interpreted incrementally', linkedids)
+
+        # Call pickups may have multiple linkedids.
+        # In that case, use the linkedid of the caller, i.e. the smaller one.
+        call_log.conversation_id = min(linkedids)
+        call_log.cel_ids = [cel.id for cel in cels]
+        return call_log
+
     def list_call_log_ids(self, cels):
         return {cel.call_log_id for cel in cels if cel.call_log_id}
 
@@ -290,20 +569,96 @@ class CallLogsGenerator:
     def _remove_duplicate_participants(self, call_log):
         channel_names = call_log.raw_participants.keys()
         channel_names = sorted(channel_names)
-        for _, line_channel_names in groupby(
-            channel_names, protocol_interface_from_channel
-        ):
+        for _, line_channel_names in groupby(channel_names, channel_protocol_interface):
             duplicate_channel_names = tuple(line_channel_names)[:-1]
             for duplicate_channel_name in duplicate_channel_names:
                 call_log.raw_participants.pop(duplicate_channel_name, None)
 
-    def _fetch_participants(self, call_log: RawCallLog):
-        participant_processor = _ParticipantsProcessor(self.confd)
+    def _resolve_participants(
+        self, call_logs: Iterable[RawCallLog]
+    ) -> tuple[bool, ResolvedParticipants | None]:
+        """
+        Return whether confd may be used to generate the call logs, and their
+        participants resolved at once.
+
+        When confd is too slow, the participants are only resolved from the
+        cache and the snapshot: the call logs with missing participants are
+        flagged for enrichment, to be generated again later.
+        """
+        lookup_confd = self.confd_breaker is None or self.confd_breaker.allow_request()
+        channames, user_uuids = set(), set()
+        for call_log in call_logs:
+            channames.update(call_log.raw_participants)
+            user_uuids.update(
+                str(participant_info['user_uuid'])
+                for participant_info in call_log.participants_info
+                if 'user_uuid' in participant_info
+            )
+        if not (channames or user_uuids):
+            return lookup_confd, None
+
+        if not lookup_confd:
+            logger.info(
+                'confd is slow, deferring the participants of %s channels'
+                ' and %s users',
+                len(channames),
+                len(user_uuids),
+            )
+            return False, self.participant_cache.prefetch(
+                self.confd, channames, user_uuids, lookup_confd=False
+            )
+
+        try:
+            if self.confd_breaker:
+                resolved_participants = self.confd_breaker.call(
+                    self.participant_cache.prefetch, self.confd, channames, user_uuids
+                )
+            else:
+                resolved_participants = self.participant_cache.prefetch(
+                    self.confd, channames, user_uuids
+                )
+        except Exception:
+            if self.confd_breaker:
+                logger.warning(
+                    'Failed to resolve the participants of %s channels and %s users,'
+                    ' deferring them',
+                    len(channames),
+                    len(user_uuids),
+                    exc_info=True,
+                )
+                return False, self.participant_cache.prefetch(
+                    self.confd, channames, user_uuids, lookup_confd=False
+                )
+            logger.warning(
+                'Failed to resolve the participants of %s channels and %s users,'
+                ' looking them up for each call log',
+                len(channames),
+                len(user_uuids),
+                exc_info=True,
+            )
+            return True, None
+
+        return True, resolved_participants
+
+    def _fetch_participants(
+        self,
+        call_log: RawCallLog,
+        resolved_participants: ResolvedParticipants | None = None,
+        lookup_confd: bool = True,
+    ):
+        participant_processor = _ParticipantsProcessor(
+            self.confd,
+            self.participant_cache,
+            resolved_participants,
+            defer_lookups=not lookup_confd,
+        )
         call_log = participant_processor(call_log)
+        if participant_processor.deferred:
+            call_log.enrichment_pending = True
         logger.debug('fetched participants: %s', call_log.participants)
         return call_log
 
-    def _ensure_tenant_uuid_is_set(self, call_log):
+    def _ensure_tenant_uuid_is_set(self, call_log, lookup_confd=True):
         tenant_uuids = {
             raw_participant['tenant_uuid']
             for raw_participant in call_log.raw_participants.values()
@@ -315,12 +670,14 @@ class CallLogsGenerator:
         if not call_log.tenant_uuid:
             # NOTE(sileht): requested_context
             if call_log.requested_context:
-                contexts = self.confd.contexts.list(
-                    name=call_log.requested_context, recurse=True
-                )['items']
-                if contexts:
-                    call_log.set_tenant_uuid(contexts[0]['tenant_uuid'])
+                tenant_uuid = self._find_context_tenant_uuid(
+                    call_log.requested_context, lookup_confd
+                )
+                if tenant_uuid:
+                    call_log.set_tenant_uuid(tenant_uuid)
                     return
+                if not lookup_confd:
+                    call_log.enrichment_pending = True
 
             logger.debug(
                 'call log of cels `%s` is not attached to a '
@@ -330,6 +687,11 @@ class CallLogsGenerator:
             )
             call_log.set_tenant_uuid(self._service_tenant_uuid)
 
+    def _find_context_tenant_uuid(
+        self, name: str, lookup_confd: bool = True
+    ) -> str | None:
+        return self.context_cache.find_tenant_uuid(self.confd, name, lookup_confd)
+
     def _fill_extensions_from_participants(self, call_log):
         source_participants = (
             participant
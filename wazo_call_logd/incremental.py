@@ -0,0 +1,207 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from xivo_dao.alchemy.cel import CEL
+
+from .cel_interpretor import DispatchCELInterpretor
+from .database.cel_event_type import CELEventType
+from .raw_call_log import RawCallLog
+
+logger = logging.getLogger(__name__)
+
+
+def _cel_key(cel: CEL) -> tuple:
+    return cel.uniqueid, cel.eventtype, cel.eventtime
+
+
+class _IncrementalCall:
+    """
+    The interpretation of the CELs of a linkedid received so far, in the same
+    order as DispatchCELInterpretor: the CELs of the caller channel first, then
+    the CELs of the callee channels. The callee CELs are interpreted once the
+    caller channel has ended, and kept until then.
+
+    The call is `valid` as long as the CELs were received in the order in
+    which they would have been interpreted.
+    """
+
+    __slots__ = (
+        'created_at',
+        'call_log',
+        'keys',
+        'valid',
+        '_interpretor',
+        '_uniqueids',
+        '_caller_uniqueid',
+        '_caller_ended',
+        '_callee_uniqueids',
+        '_pending_callee_cels',
+    )
+
+    def __init__(self, interpretor: DispatchCELInterpretor):
+        self.created_at = time.monotonic()
+        self.call_log = RawCallLog()
+        self.keys: list[tuple] = []
+        self.valid = True
+        self._interpretor = interpretor
+        self._uniqueids: set[str] = set()
+        self._caller_uniqueid: str | None = None
+        self._caller_ended = False
+        self._callee_uniqueids: set[str] = set()
+        self._pending_callee_cels: list[CEL] = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, cel: CEL):
+        if self.keys and cel.eventtime < self.keys[-1][2]:
+            # the CELs are interpreted sorted by eventtime
+            self.valid = False
+        self.keys.append(_cel_key(cel))
+        if not self.valid:
+            return
+
+        try:
+            self._add(cel)
+        except Exception:
+            logger.debug('Failed to interpret CEL %s incrementally', cel, exc_info=True)
+            self.valid = False
+
+    def _add(self, cel: CEL):
+        uniqueid = cel.uniqueid
+        if cel.eventtype == CELEventType.chan_start:
+            if uniqueid in self._uniqueids:
+                self.valid = False
+                return
+            if self._caller_uniqueid is None:
+                self._caller_uniqueid = uniqueid
+            else:
+                self._callee_uniqueids.add(uniqueid)
+        self._uniqueids.add(uniqueid)
+
+        if uniqueid == self._caller_uniqueid:
+            self._add_caller_cel(cel)
+        elif uniqueid in self._callee_uniqueids:
+            if self._caller_ended:
+                self._interpret_callee_cel(cel)
+            else:
+                self._pending_callee_cels.append(cel)
+
+    def _add_caller_cel(self, cel: CEL):
+        caller_interpretor = self._interpretor.caller_cel_interpretor
+        if self._caller_ended:
+            if cel.eventtype in caller_interpretor.eventtype_map:
+                # callee CELs were already interpreted
+                self.valid = False
+            return
+
+        self.call_log = caller_interpretor.interpret_cel(cel, self.call_log)
+        if cel.eventtype == CELEventType.chan_end:
+            self._caller_ended = True
+            for pending_cel in self._pending_callee_cels:
+                self._interpret_callee_cel(pending_cel)
+            self._pending_callee_cels = []
+
+    def _interpret_callee_cel(self, cel: CEL):
+        callee_interpretor = self._interpretor.callee_cel_interpretor
+        self.call_log = callee_interpretor.interpret_cel(cel, self.call_log)
+
+    def finish(self) -> RawCallLog:
+        for cel in self._pending_callee_cels:
+            self._interpret_callee_cel(cel)
+        self._pending_callee_cels = []
+        return self.call_log
+
+
+class IncrementalInterpretor:
+    """
+    Interpret the CELs received from the bus as they arrive, so that only the
+    participants are left to find when a call ends.
+
+    An interpretation is only used for a call of a single linkedid whose CELs
+    are exactly the ones that were interpreted, in the same order. Otherwise
+    (e.g. call pickups, or CELs received out of order), the call is interpreted
+    again from all its CELs. Interpretations are bounded in number of CELs and
+    in age, like the CEL buffer.
+    """
+
+    def __init__(
+        self, interpretor: DispatchCELInterpretor, max_events=100000, max_age=7200
+    ):
+        self.interpretor = interpretor
+        self._max_events = max_events
+        self._max_age = max_age
+        self._calls: OrderedDict[str, _IncrementalCall] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, interpretors):
+        if not (config['enabled'] and config['incremental']):
+            return None
+        interpretor = next(
+            (i for i in interpretors if isinstance(i, DispatchCELInterpretor)), None
+        )
+        if interpretor is None:
+            logger.warning('No interpretor to interpret CELs incrementally')
+            return None
+        return cls(
+            interpretor, max_events=config['max_events'], max_age=config['max_age']
+        )
+
+    def __len__(self):
+        return self._size
+
+    def add(self, cel: CEL):
+        with self._lock:
+            call = self._calls.get(cel.linkedid)
+            if call is None:
+                call = self._calls[cel.linkedid] = _IncrementalCall(self.interpretor)
+            call.add(cel)
+            self._size += 1
+            self._evict()
+
+    def pop(self, linkedids: set[str], cels: Sequence[CEL]) -> RawCallLog | None:
+        """
+        Return the interpretation of the given CELs, if they were all
+        interpreted incrementally. The interpretations of the linkedids are
+        discarded in any case.
+        """
+        with self._lock:
+            calls = [self._remove(linkedid) for linkedid in linkedids]
+
+        if len(calls) != 1 or calls[0] is None:
+            return None
+        call = calls[0]
+        if not call.valid or call.keys != [_cel_key(cel) for cel in cels]:
+            logger.debug('CELs of linkedids %s must be interpreted again', linkedids)
+            return None
+        return call.finish()
+
+    def discard(self, linkedids):
+        with self._lock:
+            for linkedid in linkedids:
+                self._remove(linkedid)
+
+    def _evict(self):
+        oldest_allowed = time.monotonic() - self._max_age
+        while self._calls:
+            linkedid, oldest = next(iter(self._calls.items()))
+            if self._size <= self._max_events and oldest.created_at >= oldest_allowed:
+                break
+            logger.debug('Evicting the interpretation of linkedid %s', linkedid)
+            self._remove(linkedid)
+
+    def _remove(self, linkedid: str) -> _IncrementalCall | None:
+        call = self._calls.pop(linkedid, None)
+        if call:
+            self._size -= len(call)
+        return call
@@ -1,9 +1,10 @@
-# Copyright 2012-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2012-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import argparse
 import logging
 import sys
+from contextlib import contextmanager
 
 from wazo_auth_client import Client as AuthClient
 from wazo_confd_client import Client as ConfdClient
@@ -21,13 +22,16 @@ from xivo_dao import init_db_from_config
 from wazo_call_logd.bus import BusPublisher
 from wazo_call_logd.cel_interpretor import default_interpretors
 from wazo_call_logd.config import DEFAULT_CONFIG
-from wazo_call_logd.database.helpers import new_db_session
+from wazo_call_logd.database.helpers import new_db_sessions
 from wazo_call_logd.database.queries import DAO
 from wazo_call_logd.generator import CallLogsGenerator
 from wazo_call_logd.manager import CallLogsManager
+from wazo_call_logd.sweep import CheckpointedSweep, ParallelCallLogsGenerator
 from wazo_call_logd.writer import CallLogsWriter
 
+DEFAULT_BATCH_SIZE = 5000
 DEFAULT_CEL_COUNT = 20000
+JOBS_TOKEN_EXPIRATION = 24 * 3600
 PIDFILENAME = '/run/wazo-call-logs.pid'
 
 logger = logging.getLogger(__name__)
@@ -71,8 +75,7 @@ def _generate_call_logs(cli_options: argparse.Namespace):
     logger.debug('CEL database is %s', config['cel_db_uri'])
     init_db_from_config({'db_uri': config['cel_db_uri']})
     logger.debug('call-logd database is %s', config['db_uri'])
-    DBSession = new_db_session(config['db_uri'])
-    CELDBSession = new_db_session(config['cel_db_uri'])
+    DBSession, CELDBSession = new_db_sessions(config['db_uri'], config['cel_db_uri'])
     dao = DAO(DBSession, CELDBSession)
 
     auth_client = AuthClient(**config['auth'])
@@ -92,17 +95,40 @@ def _generate_call_logs(cli_options: argparse.Namespace):
     manager = CallLogsManager(dao, generator, writer, publisher)
 
     options = vars(cli_options)
+    writer.associate_pending()
     with token_renewer:
         if options.get('action') == 'delete':
             if options.get('all'):
                 manager.delete_all()
             elif options.get('days'):
                 manager.delete_from_days(options['days'])
+        elif options.get('days') or options.get('resume'):
+            with _call_logs_generator(
+                manager, config, auth_client, options
+            ) as generate:
+                sweep = CheckpointedSweep(dao, generate, options['batch_size'])
+                sweep.run(days=options.get('days'), resume=options.get('resume'))
+        elif options.get('jobs', 1) > 1:
+            with _call_logs_generator(
+                manager, config, auth_client, options
+            ) as generate:
+                generate(manager.find_cels_from_count(options['cel_count']))
         else:
-            if options.get('days'):
-                manager.generate_from_days(days=options['days'])
-            else:
-                manager.generate_from_count(cel_count=options['cel_count'])
+            manager.generate_from_count(cel_count=options['cel_count'])
+
+
+@contextmanager
+def _call_logs_generator(manager, config, auth_client, options):
+    if options.get('jobs', 1) <= 1:
+        yield manager.generate_from_cels
+        return
+
+    # NOTE: worker processes cannot share the token renewer
+    token = auth_client.token.new(expiration=JOBS_TOKEN_EXPIRATION)
+    with ParallelCallLogsGenerator(
+        manager, config, token, options['jobs']
+    ) as parallel_generator:
+        yield parallel_generator.generate_from_cels
 
 
 def parse_args(parser: argparse.ArgumentParser):
@@ -126,6 +152,26 @@ def parse_args(parser: argparse.ArgumentParser):
         help='Minimum number of CEL entries to process',
     )
     group.add_argument('-d', '--days', type=int, help='Number of days to process')
+    parser.add_argument(
+        '-r',
+        '--resume',
+        action='store_true',
+        help='Resume the last interrupted sweep of days',
+    )
+    parser.add_argument(
+        '-b',
+        '--batch-size',
+        default=DEFAULT_BATCH_SIZE,
+        type=int,
+        help='Number of CEL entries processed per batch when sweeping days',
+    )
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        default=1,
+        type=int,
+        help='Number of processes generating call logs in parallel',
+    )
     parser.add_argument(
         '-D',
         '--debug',
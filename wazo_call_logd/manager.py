@@ -1,22 +1,29 @@
-# Copyright 2013-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 
+from .cel_buffer import CELBuffer
 from .database.queries import DAO
+from .generator import stream_cels_by_shared_channels
 
 logger = logging.getLogger(__name__)
 
+# number of correlation groups generated and written at once
+GENERATION_CHUNK_SIZE = 1000
+
 
 class CallLogsManager:
-    def __init__(self, dao, generator, writer, publisher):
+    def __init__(self, dao, generator, writer, publisher, cel_buffer=None):
         self.dao: DAO = dao
         self.generator = generator
         self.writer = writer
         self.publisher = publisher
+        self.cel_buffer: CELBuffer | None = cel_buffer
 
     def delete_all(self):
         self.dao.call_log.delete()
@@ -27,29 +34,163 @@ class CallLogsManager:
         deleted_call_log_ids = self.dao.call_log.delete(older=older)
         self.dao.cel.unassociate_all_from_call_log_ids(deleted_call_log_ids)
 
-    def generate_from_days(self, days):
-        older_cel = datetime.now() - timedelta(days=days)
-        cels = self.dao.cel.find_last_unprocessed(older=older_cel)
-        self._generate_from_cels(cels)
-
     def generate_from_count(self, cel_count):
+        logger.debug('Generating call logs from the last %s CEL', cel_count)
+        cels = self.dao.cel.stream_last_unprocessed(cel_count)
+        self._generate_from_cel_stream(cels)
+
+    def _generate_from_cel_stream(self, cels):
+        cel_groups = stream_cels_by_shared_channels(cels)
+        while chunk := list(islice(cel_groups, GENERATION_CHUNK_SIZE)):
+            self.generate_from_cel_groups(chunk)
+
+    def find_cels_from_count(self, cel_count):
         cels = self.dao.cel.find_last_unprocessed(cel_count)
         logger.debug(
             'Generating call logs from the last %s CEL (found %s)',
             cel_count,
             len(cels),
         )
-        self._generate_from_cels(cels)
+        return cels
 
     def generate_from_linked_id(self, linked_id):
         cels = self.dao.cel.find_from_linked_id(linked_id)
         logger.debug(
             'Generating call log for linked_id %s from %s CEL', linked_id, len(cels)
         )
-        self._generate_from_cels(cels)
+        self.generate_from_cels(cels)
+
+    def generate_from_linked_ids(self, linked_ids):
+        cels = self.find_cels_from_linked_ids(linked_ids)
+        self.generate_from_cels(cels)
+
+    def find_cels_from_linked_ids(self, linked_ids):
+        cels, unbuffered_linked_ids = [], linked_ids
+        if self.cel_buffer:
+            cels, unbuffered_linked_ids = self._find_buffered_cels(linked_ids)
+        if unbuffered_linked_ids:
+            cels_by_id = {cel.id: cel for cel in cels}
+            for cel in self.dao.cel.find_from_linked_ids(unbuffered_linked_ids):
+                cels_by_id.setdefault(cel.id, cel)
+            cels = list(cels_by_id.values())
+        logger.debug('Found %s CEL for %s linked_ids', len(cels), len(linked_ids))
+        return cels
+
+    def _find_buffered_cels(self, linked_ids):
+        buffered_cels = self.cel_buffer.find(linked_ids)
+        if not buffered_cels:
+            return [], linked_ids
+
+        # NOTE: CELs received from the bus have no id, which is required to
+        # associate them to their call log
+        rows_by_linked_id = self.dao.cel.find_ids_from_linked_ids(list(buffered_cels))
+        cels = []
+        for linked_id, linked_cels in buffered_cels.items():
+            ids = _match_cel_ids(linked_cels, rows_by_linked_id.get(linked_id, []))
+            if ids is None:
+                logger.debug(
+                    'Buffered CELs of linkedid %s do not match the database',
+                    linked_id,
+                )
+                return [], linked_ids
+            cels.extend(
+                cel._replace(id=id_, call_log_id=call_log_id)
+                for cel, (id_, call_log_id) in zip(linked_cels, ids)
+            )
+
+        remaining_linked_ids = [
+            linked_id for linked_id in linked_ids if linked_id not in buffered_cels
+        ]
+        logger.debug(
+            'Found %s buffered CEL, %s linked_ids not buffered',
+            len(cels),
+            len(remaining_linked_ids),
+        )
+        return cels, remaining_linked_ids
+
+    def generate_from_cels(self, cels):
+        call_logs = self.generator.from_cel(cels)
+        self._write(call_logs, {cel.linkedid for cel in cels})
+        return call_logs
 
-    def _generate_from_cels(self, cels):
+    def generate_from_cel_groups(self, cel_groups):
+        call_logs = self.generator.from_cel_groups(cel_groups)
+        self._write(call_logs, set().union(*(group[0] for group in cel_groups)))
+        return call_logs
+
+    def find_enrichment_pending(self, limit) -> list[tuple[int, str]]:
+        return self.dao.call_log.find_enrichment_pending(limit)
+
+    def enrich_call_logs(self, pending, cels):
+        """
+        Generate again the `pending` (id, conversation_id) call logs flagged
+        for enrichment from the CELs of their conversations, and publish them
+        as updated. The call logs that cannot be generated again are kept as
+        they were written.
+        """
         call_logs = self.generator.from_cel(cels)
+
+        generated = {call_log.conversation_id for call_log in call_logs.new_call_logs}
+        stale_ids = {
+            id_ for id_, conversation_id in pending if conversation_id not in generated
+        }
+        if stale_ids:
+            logger.info(
+                'Call logs %s cannot be generated again, not enriching them',
+                stale_ids,
+            )
+            call_logs = call_logs._replace(
+                call_logs_to_delete=set(call_logs.call_logs_to_delete) - stale_ids
+            )
+        updated_call_logs = self.writer.write(call_logs)
+        if stale_ids:
+            self.dao.call_log.clear_enrichment_pending(stale_ids)
+
+        updated = {id(call_log) for call_log in updated_call_logs}
+        self.publisher.publish_call_log(
+            *(cdr for cdr in call_logs.new_call_logs if id(cdr) not in updated)
+        )
+        self.publisher.publish_call_log_updated(
+            *(cdr for cdr in updated_call_logs if not cdr.enrichment_pending)
+        )
+        logger.debug('Enriched %s call logs', len(pending))
+
+    def _write(self, call_logs, linked_ids):
         logger.debug('Generated %s call logs', len(call_logs.new_call_logs))
-        self.writer.write(call_logs)
-        self.publisher.publish_call_log(*call_logs.new_call_logs)
+        updated_call_logs = self.writer.write(call_logs)
+        updated = {id(call_log) for call_log in updated_call_logs}
+        self.publisher.publish_call_log(
+            *(cdr for cdr in call_logs.new_call_logs if id(cdr) not in updated)
+        )
+        self.publisher.publish_call_log_updated(*updated_call_logs)
+        if self.cel_buffer:
+            self.cel_buffer.discard(linked_ids)
+
+
+def _match_cel_ids(cels, rows) -> list[tuple] | None:
+    """
+    Return the (id, call_log_id) of each CEL from the database rows with the
+    same uniqueid, event type and event time, or None unless every CEL matches
+    exactly one row, e.g. when the CELs are not all in the database yet
+    """
+    if len(rows) != len(cels):
+        return None
+
+    ids_by_key = {}
+    for uniqueid, eventtype, eventtime, id_, call_log_id in rows:
+        key = _cel_key(uniqueid, eventtype, eventtime)
+        if key in ids_by_key:
+            return None
+        ids_by_key[key] = (id_, call_log_id)
+
+    ids = [ids_by_key.get(_cel_key(c.uniqueid, c.eventtype, c.eventtime)) for c in cels]
+    if None in ids or len(set(ids)) != len(ids):
+        return None
+    return ids
+
+
+def _cel_key(uniqueid, eventtype, eventtime):
+    # NOTE: naive event times are local times, like the CEL bus event times
+    if eventtime.tzinfo is None:
+        eventtime = eventtime.astimezone()
+    return uniqueid, eventtype, eventtime.astimezone(timezone.utc)
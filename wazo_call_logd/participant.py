@@ -1,10 +1,16 @@
-# Copyright 2021-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2021-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 import logging
-from typing import NamedTuple
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, NamedTuple
 
 import requests.exceptions
 from wazo_confd_client import Client as ConfdClient
@@ -12,9 +18,33 @@ from xivo.asterisk.protocol_interface import (
     InvalidChannelError,
     protocol_interface_from_channel,
 )
+from xivo.status import Status
+
+if TYPE_CHECKING:
+    from .confd_snapshot import ConfdSnapshot
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CACHE_TTL = 300
+DEFAULT_CACHE_MAX_SIZE = 10000
+DEFAULT_CONTEXT_CACHE_TTL = 3600
+CONFD_LOOKUP_WORKERS = 4
+USERS_LIST_BATCH_SIZE = 100
+# channel names are parsed many times for each call, and repeat across calls
+CHANNEL_CACHE_SIZE = 10000
+USER_EVENTS = ('user_edited', 'user_deleted')
+# NOTE: these events may change the line or the extension of any participant
+LINE_EVENTS = (
+    'line_edited',
+    'line_deleted',
+    'extension_edited',
+    'extension_deleted',
+    'user_line_associated',
+    'user_line_dissociated',
+    'line_extension_associated',
+    'line_extension_dissociated',
+)
+
 
 class ParticipantInfo(NamedTuple):
     uuid: str
@@ -39,6 +69,10 @@ def find_participant_by_uuid(
         )
         return None
 
+    return _participant_from_user(user)
+
+
+def _participant_from_user(user: dict) -> ParticipantInfo:
     tags = get_tags(user['userfield'])
     logger.debug(
         'Found participant with user uuid %s, tenant uuid %s',
@@ -53,7 +87,7 @@ def find_participant_by_uuid(
         # the main line of the user is provided
         main_line = user['lines'][0]
         main_line_id = main_line['id']
-        logger.debug("user(user_uuid=%s) has main line: %s", user_uuid, main_line)
+        logger.debug("user(user_uuid=%s) has main line: %s", user['uuid'], main_line)
         if main_line["extensions"]:
             main_extension = main_line['extensions'][0]
 
@@ -66,37 +100,75 @@ def find_participant_by_uuid(
     )
 
 
-def find_participant(confd: ConfdClient, channame: str) -> ParticipantInfo | None:
+@lru_cache(maxsize=CHANNEL_CACHE_SIZE)
+def channel_protocol_interface(channame: str) -> tuple[str, str]:
+    return protocol_interface_from_channel(channame)
+
+
+@lru_cache(maxsize=CHANNEL_CACHE_SIZE)
+def line_name_from_channel(channame: str) -> str | None:
     """
-    find and fetch participant information from confd,
-    using the channel name
+    Return the name of the confd line of a channel, or None when the channel
+    cannot belong to a participant
     """
     try:
-        protocol, line_name = protocol_interface_from_channel(channame)
+        protocol, line_name = channel_protocol_interface(channame)
     except InvalidChannelError:
         return None
 
     if protocol == 'Local':
         logger.debug('Ignoring participant %s', channame)
         return None
+    return line_name
 
-    logger.debug(
-        'Looking up participant with protocol %s and line name "%s"',
-        protocol,
-        line_name,
-    )
-    lines = confd.lines.list(name=line_name, recurse=True)['items']
-    if not lines:
+
+class _UserLookupError(Exception):
+    pass
+
+
+def find_participant(confd: ConfdClient, channame: str) -> ParticipantInfo | None:
+    """
+    find and fetch participant information from confd,
+    using the channel name
+    """
+    line_name = line_name_from_channel(channame)
+    if not line_name:
         return None
 
-    line = lines[0]
-    logger.debug('Found participant line id %s', line['id'])
-    users = line['users']
-    if not users:
+    try:
+        return _find_participant_of_line(confd, line_name)
+    except _UserLookupError:
+        return None
+
+
+def _find_participant_of_line(
+    confd: ConfdClient, line_name: str
+) -> ParticipantInfo | None:
+    """Raise _UserLookupError when the user of the line cannot be retrieved"""
+    logger.debug('Looking up participant with line name "%s"', line_name)
+    line = _find_line(confd, line_name)
+    if line is None or not line['users']:
         return None
 
-    user_uuid = users[0]['uuid']
+    logger.debug('Found participant line id %s', line['id'])
+    user_uuid = line['users'][0]['uuid']
+    try:
+        user = confd.users.get(user_uuid)
+    except requests.exceptions.HTTPError as ex:
+        logger.error(
+            "Error retrieving user(user_uuid=%s) from confd: %s", user_uuid, str(ex)
+        )
+        raise _UserLookupError(user_uuid) from ex
+
+    return _participant_from_line(line, user)
+
+
+def _find_line(confd: ConfdClient, line_name: str) -> dict | None:
+    lines = confd.lines.list(name=line_name, recurse=True)['items']
+    return lines[0] if lines else None
+
 
+def _participant_from_line(line: dict, user: dict) -> ParticipantInfo:
     extensions = line['extensions']
     main_extension = None
     if extensions:
@@ -108,14 +180,6 @@ def find_participant(confd: ConfdClient, channame: str) -> ParticipantInfo | Non
             main_extension['context'],
         )
 
-    try:
-        user = confd.users.get(user_uuid)
-    except requests.exceptions.HTTPError as ex:
-        logger.error(
-            "Error retrieving user(user_uuid=%s) from confd: %s", user_uuid, str(ex)
-        )
-        return None
-
     tags = get_tags(user['userfield'])
     logger.debug(
         'Found participant with user uuid %s, tenant uuid %s',
@@ -130,3 +194,346 @@ def find_participant(confd: ConfdClient, channame: str) -> ParticipantInfo | Non
         tags=tags,
         main_extension=main_extension,
     )
+
+
+class ResolvedParticipants(NamedTuple):
+    by_line_name: dict[str, ParticipantInfo | None]
+    by_user_uuid: dict[str, ParticipantInfo]
+
+
+def find_participants(
+    confd: ConfdClient,
+    line_names: Iterable[str],
+    user_uuids: Iterable[str],
+    max_workers: int = CONFD_LOOKUP_WORKERS,
+) -> ResolvedParticipants:
+    """
+    Find the participants of many lines and users at once: the lines are
+    looked up concurrently, then their users and the given users are listed
+    in batches, also concurrently. The lines whose user is not listed are left
+    unresolved.
+    """
+    line_names = sorted(set(line_names))
+    user_uuids = set(user_uuids)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        lines = dict(
+            zip(line_names, executor.map(partial(_find_line, confd), line_names))
+        )
+        for line in lines.values():
+            if line is not None and line['users']:
+                user_uuids.add(line['users'][0]['uuid'])
+
+        sorted_uuids = sorted(user_uuids)
+        batches = [
+            sorted_uuids[i : i + USERS_LIST_BATCH_SIZE]
+            for i in range(0, len(sorted_uuids), USERS_LIST_BATCH_SIZE)
+        ]
+        users = {}
+        for batch_users in executor.map(partial(_list_users, confd), batches):
+            users.update((str(user['uuid']), user) for user in batch_users)
+
+    by_line_name = {}
+    for line_name, line in lines.items():
+        if line is None or not line['users']:
+            by_line_name[line_name] = None
+            continue
+        user = users.get(str(line['users'][0]['uuid']))
+        if user is None:
+            # NOTE: not listed with its line, looked up again next time
+            logger.debug('User of line %s not found, not resolving it', line_name)
+            continue
+        by_line_name[line_name] = _participant_from_line(line, user)
+    by_user_uuid = {
+        user_uuid: _participant_from_user(user) for user_uuid, user in users.items()
+    }
+    return ResolvedParticipants(by_line_name, by_user_uuid)
+
+
+def _list_users(confd: ConfdClient, user_uuids: list[str]) -> list[dict]:
+    return confd.users.list(uuid=','.join(user_uuids), recurse=True)['items']
+
+
+class _TTLCache:
+    def __init__(self, ttl: float, max_size: int):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return whether the key was found, and its value"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key, value):
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, key):
+        self._entries.pop(key, None)
+
+    def discard_values(self, predicate):
+        for key, (_, value) in list(self._entries.items()):
+            if predicate(value):
+                del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+class ParticipantCache:
+    """
+    Participants found in confd by line name and by user uuid, shared by every
+    generation of the process. Lines without a user are also cached.
+
+    Entries expire after `ttl` seconds, the least recently used ones are
+    evicted beyond `max_size` entries, and the entries changed by confd are
+    invalidated from the bus events. Missing entries are looked up in the
+    confd snapshot, if any, then in confd.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_CACHE_TTL,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+        snapshot: ConfdSnapshot | None = None,
+    ):
+        self._snapshot = snapshot
+        self.hits = 0
+        self.misses = 0
+        self._by_line_name = _TTLCache(ttl, max_size)
+        self._by_user_uuid = _TTLCache(ttl, max_size)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, snapshot: ConfdSnapshot | None = None):
+        return cls(ttl=config['ttl'], max_size=config['max_size'], snapshot=snapshot)
+
+    def find_participant(
+        self, confd: ConfdClient, channame: str
+    ) -> ParticipantInfo | None:
+        line_name = line_name_from_channel(channame)
+        if not line_name:
+            return None
+
+        found, participant = self._get(self._by_line_name, line_name)
+        if not found:
+            try:
+                participant = self._find_line_participant(confd, line_name)
+            except _UserLookupError:
+                # NOTE: confd errors are not cached, unlike lines without user
+                return None
+            with self._lock:
+                self._by_line_name.set(line_name, participant)
+        return participant
+
+    def find_participant_by_uuid(
+        self, confd: ConfdClient, user_uuid: str
+    ) -> ParticipantInfo | None:
+        found, participant = self._get(self._by_user_uuid, user_uuid)
+        if not found:
+            participant = self._find_user_participant(confd, user_uuid)
+            # NOTE: confd errors are not cached
+            if participant:
+                with self._lock:
+                    self._by_user_uuid.set(user_uuid, participant)
+        return participant
+
+    def prefetch(
+        self,
+        confd: ConfdClient,
+        channames: Iterable[str],
+        user_uuids: Iterable[str],
+        lookup_confd: bool = True,
+    ) -> ResolvedParticipants:
+        """
+        Resolve the participants of many channels and users, looking up only
+        the ones missing from the cache with `find_participants`. Without
+        `lookup_confd`, the participants missing from the cache and the
+        snapshot are left unresolved.
+        """
+        resolved = ResolvedParticipants({}, {})
+        missing_line_names, missing_user_uuids = set(), set()
+        for line_name in filter(None, map(line_name_from_channel, channames)):
+            found, participant = self._get(self._by_line_name, line_name)
+            if found:
+                resolved.by_line_name[line_name] = participant
+            else:
+                missing_line_names.add(line_name)
+        for user_uuid in user_uuids:
+            found, participant = self._get(self._by_user_uuid, user_uuid)
+            if found:
+                resolved.by_user_uuid[user_uuid] = participant
+            else:
+                missing_user_uuids.add(user_uuid)
+
+        lookups = [self._find_snapshot_participants]
+        if lookup_confd:
+            lookups.append(find_participants)
+        for lookup in lookups:
+            if not (missing_line_names or missing_user_uuids):
+                break
+            found = lookup(confd, missing_line_names, missing_user_uuids)
+            with self._lock:
+                for line_name, participant in found.by_line_name.items():
+                    self._by_line_name.set(line_name, participant)
+                for user_uuid, participant in found.by_user_uuid.items():
+                    self._by_user_uuid.set(user_uuid, participant)
+            resolved.by_line_name.update(found.by_line_name)
+            resolved.by_user_uuid.update(found.by_user_uuid)
+            missing_line_names -= found.by_line_name.keys()
+            missing_user_uuids -= found.by_user_uuid.keys()
+        return resolved
+
+    def _find_snapshot_participants(
+        self, confd: ConfdClient, line_names: set[str], user_uuids: set[str]
+    ) -> ResolvedParticipants:
+        if not self._snapshot:
+            return ResolvedParticipants({}, {})
+        return self._snapshot.find_participants(line_names, user_uuids)
+
+    def _find_line_participant(
+        self, confd: ConfdClient, line_name: str
+    ) -> ParticipantInfo | None:
+        found = self._find_snapshot_participants(confd, {line_name}, set())
+        if line_name in found.by_line_name:
+            return found.by_line_name[line_name]
+        return _find_participant_of_line(confd, line_name)
+
+    def _find_user_participant(
+        self, confd: ConfdClient, user_uuid: str
+    ) -> ParticipantInfo | None:
+        found = self._find_snapshot_participants(confd, set(), {user_uuid})
+        if user_uuid in found.by_user_uuid:
+            return found.by_user_uuid[user_uuid]
+        return find_participant_by_uuid(confd, user_uuid)
+
+    def _get(self, cache: _TTLCache, key: str):
+        with self._lock:
+            found, value = cache.get(key)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return found, value
+
+    def invalidate_user(self, user_uuid: str):
+        logger.debug('Invalidating cached participant of user %s', user_uuid)
+        with self._lock:
+            self._by_user_uuid.discard_values(
+                lambda participant: participant.uuid == user_uuid
+            )
+            self._by_line_name.discard_values(
+                lambda participant: participant and participant.uuid == user_uuid
+            )
+
+    def clear(self):
+        logger.debug('Invalidating all cached participants')
+        with self._lock:
+            self._by_user_uuid.clear()
+            self._by_line_name.clear()
+
+    def subscribe(self, bus_consumer):
+        for event_name in USER_EVENTS:
+            bus_consumer.subscribe(event_name, self._on_user_event)
+        for event_name in LINE_EVENTS:
+            bus_consumer.subscribe(event_name, self._on_line_event)
+
+    def _on_user_event(self, event):
+        self.invalidate_user(str(event['uuid']))
+
+    def _on_line_event(self, event):
+        self.clear()
+
+    def provide_status(self, status):
+        with self._lock:
+            size = len(self._by_line_name) + len(self._by_user_uuid)
+        status['participant_cache']['status'] = Status.ok
+        status['participant_cache']['hits'] = self.hits
+        status['participant_cache']['misses'] = self.misses
+        status['participant_cache']['size'] = size
+
+
+class ContextTenantCache:
+    """
+    Tenant uuids of the confd contexts by name, shared by every generation of
+    the process. Contexts missing from confd are also cached.
+
+    Every context is loaded at once with `load`, then the entries expire after
+    `ttl` seconds and are updated from the context bus events. Missing entries
+    are looked up in the confd snapshot, if any, then in confd.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_CONTEXT_CACHE_TTL,
+        max_size: int = DEFAULT_CACHE_MAX_SIZE,
+        snapshot: ConfdSnapshot | None = None,
+    ):
+        self._snapshot = snapshot
+        self._tenant_uuids = _TTLCache(ttl, max_size)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, snapshot: ConfdSnapshot | None = None):
+        return cls(ttl=config['ttl'], max_size=config['max_size'], snapshot=snapshot)
+
+    def load(self, confd: ConfdClient):
+        contexts = confd.contexts.list(recurse=True)['items']
+        with self._lock:
+            for context in contexts:
+                self._tenant_uuids.set(context['name'], context['tenant_uuid'])
+        logger.info('Loaded the tenants of %s contexts', len(contexts))
+
+    def load_in_background(self, confd: ConfdClient, *args):
+        def _load():
+            try:
+                self.load(confd)
+            except Exception:
+                logger.exception('Failed to load the tenants of the contexts')
+
+        threading.Thread(target=_load, name='context_cache', daemon=True).start()
+
+    def find_tenant_uuid(
+        self, confd: ConfdClient, name: str, lookup_confd: bool = True
+    ) -> str | None:
+        with self._lock:
+            found, tenant_uuid = self._tenant_uuids.get(name)
+        if found:
+            return tenant_uuid
+
+        if self._snapshot:
+            tenant_uuid = self._snapshot.find_context_tenant_uuid(name)
+        if tenant_uuid is None:
+            if not lookup_confd:
+                return None
+            contexts = confd.contexts.list(name=name, recurse=True)['items']
+            tenant_uuid = contexts[0]['tenant_uuid'] if contexts else None
+
+        with self._lock:
+            self._tenant_uuids.set(name, tenant_uuid)
+        return tenant_uuid
+
+    def subscribe(self, bus_consumer):
+        for event_name in ('context_created', 'context_edited'):
+            bus_consumer.subscribe(event_name, self._on_context_event)
+        bus_consumer.subscribe('context_deleted', self._on_context_deleted)
+
+    def _on_context_event(self, event):
+        with self._lock:
+            self._tenant_uuids.set(event['name'], event['tenant_uuid'])
+
+    def _on_context_deleted(self, event):
+        with self._lock:
+            self._tenant_uuids.discard(event['name'])
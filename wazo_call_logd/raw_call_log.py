@@ -1,4 +1,4 @@
-# Copyright 2013-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -7,12 +7,11 @@ import logging
 from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Callable, DefaultDict, Literal
+from typing import DefaultDict, Literal
 
 from wazo_call_logd.database.models import CallLog, CallLogParticipant
 from wazo_call_logd.exceptions import InvalidCallLogException
-from wazo_call_logd.extension_filter import DEFAULT_HIDDEN_EXTENSIONS, ExtensionFilter
-from wazo_call_logd.utils import find
+from wazo_call_logd.extension_filter import DEFAULT_EXTENSION_FILTER, ExtensionFilter
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +24,49 @@ class BridgeInfo:
 
 
 class RawCallLog:
+    __slots__ = (
+        'date',
+        'date_end',
+        'source_name',
+        'source_exten',
+        'source_internal_exten',
+        'source_internal_context',
+        'source_internal_name',
+        'requested_name',
+        'requested_exten',
+        'requested_context',
+        'requested_internal_exten',
+        'requested_internal_context',
+        'requested_type',
+        'destination_name',
+        'destination_exten',
+        'destination_internal_exten',
+        'destination_internal_context',
+        'destination_line_identity',
+        'user_field',
+        'date_answer',
+        'source_line_identity',
+        'direction',
+        'conversation_id',
+        'interpret_callee_bridge_enter',
+        'interpret_caller_xivo_user_fwd',
+        'authoritative_destination_info',
+        '_tenant_uuid',
+        'extension_filter',
+        'was_forwarded',
+        'enrichment_pending',
+        'raw_participants',
+        'recordings',
+        'pending_wait_for_mobile_peers',
+        'caller_id_by_channels',
+        'bridges',
+        'participants_info',
+        'participants',
+        'cel_ids',
+        'destination_details',
+        '_participants_info_by_key',
+    )
+
     def __init__(self):
         self.date: datetime | None = None
         self.date_end: datetime | None = None
@@ -48,11 +90,6 @@ class RawCallLog:
         self.date_answer: datetime | None = None
         self.source_line_identity: str | None = None
         self.direction: Literal['internal', 'inbound', 'outbound'] = 'internal'
-        self.raw_participants: DefaultDict[str, dict] = defaultdict(dict)
-        self.participants_info: list[dict] = []
-        self.participants: list[CallLogParticipant] = []
-        self.recordings: list = []
-        self.cel_ids: list[int] = []
         self.conversation_id: str | None = None
         self.interpret_callee_bridge_enter: bool = True
         self.interpret_caller_xivo_user_fwd: bool = True
@@ -60,14 +97,28 @@ class RawCallLog:
         # and should not be overwritten
         self.authoritative_destination_info: bool = False
         self._tenant_uuid: str = None  # type: ignore[assignment]
+        # shared by every call until an extension is added, see add_filtered_exten
+        self.extension_filter: ExtensionFilter = DEFAULT_EXTENSION_FILTER
+        self.was_forwarded: bool = False
+        # participants not looked up in confd, to be enriched later
+        self.enrichment_pending: bool = False
+        # NOTE: used by the interpretation of most calls
+        self.raw_participants: DefaultDict[str, dict] = defaultdict(dict)
+        self.recordings: list = []
         self.pending_wait_for_mobile_peers: set[str] = set()
         self.caller_id_by_channels: dict[str, tuple[str, str]] = {}
-        self.extension_filter: ExtensionFilter = ExtensionFilter(
-            DEFAULT_HIDDEN_EXTENSIONS
-        )
         self.bridges: dict[str, BridgeInfo] = {}
+        self.participants_info: list[dict] = []
+        self.participants: list[CallLogParticipant] = []
+        self.cel_ids: list[int] = []
         self.destination_details: list = []
-        self.was_forwarded: bool = False
+        # participants info by user uuid and role
+        self._participants_info_by_key: dict[tuple, dict] = {}
+
+    def add_filtered_exten(self, exten: str) -> None:
+        if self.extension_filter is DEFAULT_EXTENSION_FILTER:
+            self.extension_filter = DEFAULT_EXTENSION_FILTER.copy()
+        self.extension_filter.add_exten(exten)
 
     @property
     def tenant_uuid(self) -> str:
@@ -114,6 +165,7 @@ class RawCallLog:
             direction=self.direction,
             destination_details=self.destination_details,
             conversation_id=self.conversation_id,
+            enrichment_pending=self.enrichment_pending,
         )
         result.participants = self.participants
         result.cel_ids = self.cel_ids
@@ -121,10 +173,22 @@ class RawCallLog:
 
         return result
 
-    def insert_or_update_participants_info(
-        self, participant_info: dict, predicate: Callable[[dict], bool]
-    ) -> None:
-        if found := find(self.participants_info, predicate):
+    def add_participants_info(self, participant_info: dict) -> None:
+        self.participants_info.append(participant_info)
+        self._participants_info_by_key.setdefault(
+            _participant_info_key(participant_info), participant_info
+        )
+
+    def insert_or_update_participants_info(self, participant_info: dict) -> None:
+        """
+        Update the first participant info of the same user and role, or add it
+        """
+        key = _participant_info_key(participant_info)
+        if found := self._participants_info_by_key.get(key):
             found.update(participant_info)
             return
-        self.participants_info.append(participant_info)
+        self.add_participants_info(participant_info)
+
+
+def _participant_info_key(participant_info: dict) -> tuple:
+    return participant_info.get('user_uuid'), participant_info.get('role')
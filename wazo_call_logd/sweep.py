@@ -0,0 +1,253 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import logging
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from wazo_confd_client import Client as ConfdClient
+from xivo_dao import init_db_from_config
+
+from .bus import BusPublisher
+from .cel_interpretor import default_interpretors
+from .database.helpers import new_db_sessions
+from .database.queries import DAO
+from .database.queries.cel import CELRow
+from .generator import CallLogsGenerator, partition_cels
+from .manager import CallLogsManager
+from .writer import CallLogsWriter
+
+logger = logging.getLogger(__name__)
+
+SLICES_PER_JOB = 4
+WORKER_CONFIG_KEYS = ('bus', 'confd', 'db_uri', 'cel_db_uri', 'uuid')
+
+_worker_manager: CallLogsManager | None = None
+
+
+@dataclass
+class SliceResult:
+    pid: int
+    cel_count: int
+    call_log_count: int
+    elapsed: float
+
+
+@dataclass
+class WorkerStats:
+    pid: int
+    slices: int = 0
+    cel_count: int = 0
+    call_log_count: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def cels_per_second(self) -> float:
+        return self.cel_count / self.elapsed if self.elapsed else 0.0
+
+
+def _init_worker(config: dict, token: dict):
+    global _worker_manager
+
+    init_db_from_config({'db_uri': config['cel_db_uri']})
+    dao = DAO(*new_db_sessions(config['db_uri'], config['cel_db_uri']))
+    confd_client = ConfdClient(**config['confd'])
+    confd_client.set_token(token['token'])
+    generator = CallLogsGenerator(confd_client, default_interpretors())
+    generator.set_default_tenant_uuid(token)
+    writer = CallLogsWriter(dao)
+    publisher = BusPublisher(service_uuid=config['uuid'], **config['bus'])
+    _worker_manager = CallLogsManager(dao, generator, writer, publisher)
+
+
+def _generate_slice(cels: list[CELRow]) -> SliceResult:
+    start_time = time.monotonic()
+    call_logs = _worker_manager.generate_from_cels(cels)
+    return SliceResult(
+        pid=os.getpid(),
+        cel_count=len(cels),
+        call_log_count=len(call_logs.new_call_logs),
+        elapsed=time.monotonic() - start_time,
+    )
+
+
+class ParallelCallLogsGenerator:
+    """
+    Generate call logs in a pool of processes, each one interpreting and
+    writing contiguous time slices of CELs. A correlation group is never split
+    across slices, so that slices can be written independently.
+
+    Slices failing in a worker are generated again by the given manager. A
+    summary of the throughput of each worker is printed when the pool stops.
+    """
+
+    def __init__(self, manager: CallLogsManager, config, token: dict, jobs: int):
+        self._manager = manager
+        self._config = {key: config[key] for key in WORKER_CONFIG_KEYS}
+        self._token = token
+        self._jobs = jobs
+        self._executor: ProcessPoolExecutor | None = None
+        self._stats: dict[int, WorkerStats] = {}
+        self._cel_count = 0
+        self._start_time = 0.0
+
+    def __enter__(self):
+        self._start_time = time.monotonic()
+        # NOTE: workers are spawned rather than forked, to avoid inheriting the
+        # database connections and the threads of this process
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._jobs,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self._config, self._token),
+        )
+        return self
+
+    def __exit__(self, *args):
+        self._executor.shutdown()
+        self._executor = None
+        _print_summary(
+            list(self._stats.values()),
+            self._cel_count,
+            time.monotonic() - self._start_time,
+        )
+
+    @property
+    def stats(self) -> list[WorkerStats]:
+        return list(self._stats.values())
+
+    def generate_from_cels(self, cels):
+        slice_size = max(math.ceil(len(cels) / (self._jobs * SLICES_PER_JOB)), 1)
+        slices = [
+            [CELRow.from_cel(cel) for cel in slice_cels]
+            for slice_cels in partition_cels(cels, slice_size)
+        ]
+        logger.debug(
+            'Generating call logs from %s CEL in %s slices', len(cels), len(slices)
+        )
+
+        futures = {
+            self._executor.submit(_generate_slice, slice_cels): slice_cels
+            for slice_cels in slices
+        }
+        failed_slices = []
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception:
+                logger.exception('Failed to generate call logs of a slice')
+                failed_slices.append(futures[future])
+                continue
+            worker_stats = self._stats.setdefault(result.pid, WorkerStats(result.pid))
+            worker_stats.slices += 1
+            worker_stats.cel_count += result.cel_count
+            worker_stats.call_log_count += result.call_log_count
+            worker_stats.elapsed += result.elapsed
+
+        for slice_cels in failed_slices:
+            logger.info('Retrying generation of %s CEL', len(slice_cels))
+            self._manager.generate_from_cels(slice_cels)
+        self._cel_count += len(cels)
+
+
+class CheckpointedSweep:
+    """
+    Generate the call logs of the unprocessed CELs of a time range in batches,
+    in ascending order, saving the position of the last batch in a checkpoint.
+
+    An interrupted sweep can then be resumed from its checkpoint, and the
+    memory used does not depend on the size of the range.
+    """
+
+    def __init__(self, dao: DAO, generate_from_cels, batch_size: int):
+        self._dao = dao
+        self._generate_from_cels = generate_from_cels
+        self._batch_size = batch_size
+
+    def run(self, days: int | None = None, resume: bool = False):
+        checkpoint = self._dao.sweep_checkpoint.find() if resume else None
+        if resume and not checkpoint:
+            print('No interrupted sweep to resume')
+        if not checkpoint:
+            if days is None:
+                return
+            older = datetime.now() - timedelta(days=days)
+            checkpoint = self._dao.sweep_checkpoint.create(older)
+        elif checkpoint.last_eventtime:
+            print(
+                f'Resuming sweep of CEL since {checkpoint.older} '
+                f'from {checkpoint.last_eventtime}'
+            )
+
+        self._sweep(checkpoint)
+        self._dao.sweep_checkpoint.delete()
+
+    def _sweep(self, checkpoint):
+        after = _checkpoint_key(checkpoint)
+        remaining = self._dao.cel.count_unprocessed(older=checkpoint.older, after=after)
+        progress = _Progress(remaining)
+        while True:
+            keys = self._dao.cel.find_next_unprocessed(
+                self._batch_size, older=checkpoint.older, after=after
+            )
+            if not keys:
+                break
+
+            uniqueids = {key.uniqueid for key in keys}
+            cels = list(self._dao.cel.stream_from_uniqueids(uniqueids))
+            self._generate_from_cels(cels)
+
+            last = keys[-1]
+            after = (last.eventtime, last.id)
+            checkpoint.last_eventtime, checkpoint.last_cel_id = after
+            checkpoint.processed_cel_count += len(keys)
+            self._dao.sweep_checkpoint.update(checkpoint)
+            progress.update(len(keys))
+
+
+def _checkpoint_key(checkpoint) -> tuple | None:
+    if checkpoint.last_eventtime is None:
+        return None
+    return checkpoint.last_eventtime, checkpoint.last_cel_id
+
+
+class _Progress:
+    def __init__(self, total: int):
+        self._total = total
+        self._done = 0
+        self._start_time = time.monotonic()
+
+    def update(self, count: int):
+        self._done += count
+        elapsed = time.monotonic() - self._start_time
+        rate = self._done / elapsed if elapsed else 0.0
+        # CELs may be added to the range while sweeping
+        remaining = max(self._total - self._done, 0)
+        eta = timedelta(seconds=round(remaining / rate)) if rate else '-'
+        percent = 100 * min(self._done / self._total, 1) if self._total else 100
+        print(
+            f'{self._done}/{self._total} CEL ({percent:.1f}%), '
+            f'{rate:.0f} CEL/s, ETA {eta}'
+        )
+
+
+def _print_summary(stats: list[WorkerStats], cel_count: int, elapsed: float):
+    call_log_count = sum(worker_stats.call_log_count for worker_stats in stats)
+    print(
+        f'Generated {call_log_count} call logs from {cel_count} CEL '
+        f'in {elapsed:.2f}s with {len(stats)} workers'
+    )
+    for worker_stats in sorted(stats, key=lambda worker_stats: worker_stats.pid):
+        print(
+            f'  worker {worker_stats.pid}: {worker_stats.slices} slices, '
+            f'{worker_stats.cel_count} CEL, {worker_stats.call_log_count} call logs '
+            f'in {worker_stats.elapsed:.2f}s '
+            f'({worker_stats.cels_per_second:.0f} CEL/s)'
+        )
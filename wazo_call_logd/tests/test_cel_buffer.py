@@ -0,0 +1,153 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from datetime import datetime, timezone
+from unittest import TestCase
+from unittest.mock import patch
+
+from hamcrest import (
+    assert_that,
+    contains_exactly,
+    contains_inanyorder,
+    empty,
+    equal_to,
+    has_entries,
+    has_properties,
+)
+
+from wazo_call_logd.cel_buffer import (
+    CELBuffer,
+    cel_from_payload,
+    parse_payload_eventtime,
+)
+
+ANY_CEL = has_properties(id=None)
+
+
+def payload(event_name, uniqueid, linkedid, **kwargs):
+    return {
+        'EventName': event_name,
+        'EventTime': '1700000000.000000',
+        'UniqueID': uniqueid,
+        'LinkedID': linkedid,
+        'Channel': f'PJSIP/{uniqueid}-00000001',
+        **kwargs,
+    }
+
+
+def call_payloads(linkedid, *uniqueids):
+    uniqueids = uniqueids or (linkedid,)
+    for uniqueid in uniqueids:
+        yield payload('CHAN_START', uniqueid, linkedid)
+    for uniqueid in uniqueids:
+        yield payload('CHAN_END', uniqueid, linkedid)
+    yield payload('LINKEDID_END', uniqueids[-1], linkedid)
+
+
+class TestCelFromPayload(TestCase):
+    def test_unix_timestamp_eventtime(self):
+        result = parse_payload_eventtime('1700000000.500000')
+
+        assert_that(
+            result,
+            equal_to(datetime(2023, 11, 14, 22, 13, 20, 500000, tzinfo=timezone.utc)),
+        )
+
+    def test_formatted_eventtime(self):
+        result = parse_payload_eventtime('2023-11-14 22:13:20.5+00:00')
+
+        assert_that(
+            result,
+            equal_to(datetime(2023, 11, 14, 22, 13, 20, 500000, tzinfo=timezone.utc)),
+        )
+
+    def test_user_defined_event_type(self):
+        result = cel_from_payload(
+            payload(
+                'USER_DEFINED',
+                '1.1',
+                '1.1',
+                UserDefType='XIVO_INCALL',
+                Extra='{"extra": "tenant"}',
+            )
+        )
+
+        assert_that(
+            result,
+            has_properties(
+                id=None,
+                eventtype='XIVO_INCALL',
+                uniqueid='1.1',
+                linkedid='1.1',
+                channame='PJSIP/1.1-00000001',
+                extra='{"extra": "tenant"}',
+            ),
+        )
+
+
+class TestCELBuffer(TestCase):
+    def setUp(self):
+        self.buffer = CELBuffer(max_events=100, max_age=60)
+
+    def _add(self, payloads):
+        for payload_ in payloads:
+            self.buffer.add(payload_)
+
+    def test_find_complete_call(self):
+        self._add(call_payloads('1.1', '1.1', '1.2'))
+
+        result = self.buffer.find(['1.1'])
+
+        assert_that(result, has_entries({'1.1': contains_exactly(*[ANY_CEL] * 5)}))
+
+    def test_find_unterminated_call(self):
+        self._add(list(call_payloads('1.1'))[:-1])
+
+        assert_that(self.buffer.find(['1.1']), empty())
+
+    def test_find_call_with_missing_channel_start(self):
+        self._add(list(call_payloads('1.1', '1.1', '1.2'))[1:])
+
+        assert_that(self.buffer.find(['1.1']), empty())
+
+    def test_find_correlated_calls(self):
+        self._add(call_payloads('1.1', '1.1', '1.2'))
+        self._add(call_payloads('2.1', '2.1'))
+        self.buffer.add(payload('BRIDGE_ENTER', '1.2', '2.1'))
+
+        result = self.buffer.find(['2.1'])
+
+        assert_that(list(result), contains_inanyorder('1.1', '2.1'))
+
+    def test_discard(self):
+        self._add(call_payloads('1.1'))
+
+        self.buffer.discard(['1.1'])
+
+        assert_that(self.buffer.find(['1.1']), empty())
+        assert_that(len(self.buffer), equal_to(0))
+
+    def test_eviction_by_size(self):
+        buffer = CELBuffer(max_events=4, max_age=60)
+        for payload_ in call_payloads('1.1'):
+            buffer.add(payload_)
+        for payload_ in call_payloads('2.1'):
+            buffer.add(payload_)
+
+        assert_that(buffer.find(['1.1']), empty())
+        assert_that(list(buffer.find(['2.1'])), contains_exactly('2.1'))
+        assert_that(len(buffer), equal_to(3))
+
+    def test_eviction_by_age(self):
+        with patch('wazo_call_logd.cel_buffer.time.monotonic', return_value=0):
+            self._add(call_payloads('1.1'))
+        with patch('wazo_call_logd.cel_buffer.time.monotonic', return_value=61):
+            self._add(call_payloads('2.1'))
+
+        assert_that(self.buffer.find(['1.1']), empty())
+        assert_that(list(self.buffer.find(['2.1'])), contains_exactly('2.1'))
+
+    def test_invalid_payload_is_ignored(self):
+        self.buffer.add({'EventName': 'CHAN_START'})
+
+        assert_that(len(self.buffer), equal_to(0))
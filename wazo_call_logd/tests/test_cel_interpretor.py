@@ -1,9 +1,10 @@
-# Copyright 2013-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 import urllib.parse
+from datetime import datetime, timezone
 from unittest import TestCase
-from unittest.mock import Mock, create_autospec, sentinel
+from unittest.mock import ANY, Mock, create_autospec, sentinel
 
 from hamcrest import (
     assert_that,
@@ -31,8 +32,10 @@ from ..cel_interpretor import (
     extract_cel_extra,
     is_valid_mixmonitor_start_extra,
     is_valid_mixmonitor_stop_extra,
+    parse_eventtime,
 )
 from ..database.cel_event_type import CELEventType
+from ..generation_metrics import GenerationMetrics
 from ..raw_call_log import RawCallLog
 
 
@@ -127,6 +130,24 @@ class TestExtractCELExtra:
         assert_that(result, none())
 
 
+class TestParseEventtime:
+    def test_iso_format(self):
+        result = parse_eventtime('2026-01-01 10:00:00.123456+00:00')
+        assert_that(
+            result, equal_to(datetime(2026, 1, 1, 10, 0, 0, 123456, timezone.utc))
+        )
+
+    def test_other_iso_8601_formats(self):
+        result = parse_eventtime('2026-01-01T10:00:00.1Z')
+        assert_that(
+            result, equal_to(datetime(2026, 1, 1, 10, 0, 0, 100000, timezone.utc))
+        )
+
+    def test_datetime(self):
+        eventtime = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        assert_that(parse_eventtime(eventtime), same_instance(eventtime))
+
+
 class TestParseOriginateAllLinesExtra:
     def test_valid_payloads(self):
         user_uuid = 'some-uuid-value'
@@ -327,6 +348,16 @@ class TestAbstractCELInterpretor(TestCase):
             self.cel_interpretor.hangup, CELEventType.hangup
         )
 
+    def test_interpret_cel_records_the_duration(self):
+        self.cel_interpretor.metrics = Mock(GenerationMetrics)
+        cel = Mock(eventtype=CELEventType.hangup)
+
+        self.cel_interpretor.interpret_cel(cel, sentinel.call)
+
+        self.cel_interpretor.metrics.observe_cel.assert_called_once_with(
+            CELEventType.hangup, ANY
+        )
+
     def test_interpret_cel_unknown_events(self):
         cel = Mock(eventtype=CELEventType.answer)
 
@@ -454,11 +485,10 @@ class TestCallerCELInterpretor(TestCase):
         )
 
         self.call.requested_type = None
-        result = self.caller_cel_interpretor.interpret_wazo_call_log_destination(
-            cel, self.call
-        )
+        self.caller_cel_interpretor.interpret_wazo_call_log_destination(cel, self.call)
 
-        assert_that(result.participants_info[0]['requested'], True)
+        (participant_info,) = self.call.add_participants_info.call_args.args
+        assert_that(participant_info['requested'], equal_to(True))
 
     def test_interpret_wazo_incoming_call_has_destination_details(self):
         cel = Mock(
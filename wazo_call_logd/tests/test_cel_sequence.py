@@ -0,0 +1,54 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import Mock
+
+from hamcrest import assert_that, contains_exactly, equal_to, none, same_instance
+
+from ..cel_sequence import CelSequence
+
+
+class TestCelSequence(TestCase):
+    def setUp(self):
+        self.cels = [
+            self.start_1,
+            self.start_2,
+            self.answer_1,
+            self.enter_2,
+            self.enter_2_again,
+        ] = [
+            Mock(uniqueid='1', eventtype='CHAN_START'),
+            Mock(uniqueid='2', eventtype='CHAN_START'),
+            Mock(uniqueid='1', eventtype='ANSWER'),
+            Mock(uniqueid='2', eventtype='BRIDGE_ENTER'),
+            Mock(uniqueid='2', eventtype='BRIDGE_ENTER'),
+        ]
+        self.sequence = CelSequence(self.cels)
+
+    def test_is_the_list_of_cels(self):
+        assert_that(self.sequence, equal_to(self.cels))
+        assert_that(CelSequence.of(self.sequence), same_instance(self.sequence))
+
+    def test_channels(self):
+        assert_that(self.sequence.uniqueids, contains_exactly('1', '2'))
+        assert_that(self.sequence.started_uniqueids, contains_exactly('1', '2'))
+        assert_that(
+            self.sequence.of_channel('1'), contains_exactly(self.start_1, self.answer_1)
+        )
+        assert_that(self.sequence.of_channel('3'), equal_to([]))
+
+    def test_event_types(self):
+        assert_that(
+            self.sequence.of_type('CHAN_START'),
+            contains_exactly(self.start_1, self.start_2),
+        )
+        assert_that(self.sequence.has('ANSWER'), equal_to(True))
+        assert_that(self.sequence.has('HANGUP'), equal_to(False))
+
+    def test_first_and_last(self):
+        assert_that(self.sequence.first('CHAN_START'), same_instance(self.start_1))
+        assert_that(
+            self.sequence.last('BRIDGE_ENTER', '2'), same_instance(self.enter_2_again)
+        )
+        assert_that(self.sequence.first('BRIDGE_ENTER', '1'), none())
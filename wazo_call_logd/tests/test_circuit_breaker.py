@@ -0,0 +1,91 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from hamcrest import assert_that, calling, equal_to, less_than, raises
+
+from wazo_call_logd.circuit_breaker import CircuitBreaker
+
+
+@patch('wazo_call_logd.circuit_breaker.time.monotonic')
+class TestCircuitBreaker(TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker('confd', latency_threshold=1, retry_interval=30)
+
+    def test_closed(self, monotonic):
+        monotonic.return_value = 100
+
+        self.breaker.record_success(0.5)
+
+        assert_that(self.breaker.is_open, equal_to(False))
+        assert_that(self.breaker.allow_request(), equal_to(True))
+
+    def test_opened_by_slow_request(self, monotonic):
+        monotonic.return_value = 100
+
+        self.breaker.record_success(2)
+
+        assert_that(self.breaker.is_open, equal_to(True))
+        assert_that(self.breaker.allow_request(), equal_to(False))
+
+    def test_opened_by_failed_request(self, monotonic):
+        monotonic.return_value = 100
+
+        self.breaker.record_failure()
+
+        assert_that(self.breaker.allow_request(), equal_to(False))
+
+    def test_requests_retried_after_retry_interval(self, monotonic):
+        monotonic.return_value = 100
+        self.breaker.record_failure()
+
+        monotonic.return_value = 130
+
+        assert_that(self.breaker.allow_request(), equal_to(True))
+        assert_that(self.breaker.is_open, equal_to(True))
+
+    def test_closed_by_fast_request(self, monotonic):
+        monotonic.return_value = 100
+        self.breaker.record_failure()
+
+        self.breaker.record_success(0.5)
+
+        assert_that(self.breaker.is_open, equal_to(False))
+
+
+class TestCircuitBreakerCall(TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker('confd', latency_threshold=0.1, retry_interval=30)
+
+    def test_call(self):
+        func = Mock(return_value='result')
+
+        result = self.breaker.call(func, 'arg', key='value')
+
+        assert_that(result, equal_to('result'))
+        func.assert_called_once_with('arg', key='value')
+        assert_that(self.breaker.is_open, equal_to(False))
+
+    def test_call_failing(self):
+        func = Mock(side_effect=ValueError())
+
+        assert_that(calling(self.breaker.call).with_args(func), raises(ValueError))
+
+        assert_that(self.breaker.is_open, equal_to(True))
+
+    def test_call_hanging(self):
+        released = threading.Event()
+        self.addCleanup(released.set)
+
+        start_time = time.monotonic()
+        assert_that(
+            calling(self.breaker.call).with_args(released.wait),
+            raises(TimeoutError),
+        )
+
+        assert_that(time.monotonic() - start_time, less_than(1))
+        assert_that(self.breaker.is_open, equal_to(True))
@@ -0,0 +1,194 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import Mock
+
+from hamcrest import assert_that, has_entries, has_key, has_properties, is_not
+from requests.exceptions import HTTPError, Timeout
+
+from ..confd_snapshot import ConfdSnapshot
+from ..database.models import ConfdLine, ConfdUser
+
+USER = ConfdUser(
+    uuid='user-uuid', tenant_uuid='tenant-uuid', userfield='a, b', line_id=1
+)
+LINE = ConfdLine(
+    id=1,
+    name='line1',
+    user_uuid='user-uuid',
+    extension_id=10,
+    extension_exten='1001',
+    extension_context='default',
+)
+
+
+class TestConfdSnapshot(TestCase):
+    def setUp(self):
+        self.dao = Mock()
+        self.confd = Mock()
+        self.snapshot = ConfdSnapshot(self.dao, self.confd)
+
+    def test_load(self):
+        self.confd.users.list.return_value = {
+            'items': [
+                {
+                    'uuid': 'user-uuid',
+                    'tenant_uuid': 'tenant-uuid',
+                    'userfield': None,
+                    'lines': [{'id': 1}],
+                }
+            ]
+        }
+        self.confd.lines.list.return_value = {
+            'items': [
+                {
+                    'id': 1,
+                    'name': 'line1',
+                    'users': [{'uuid': 'user-uuid'}],
+                    'extensions': [{'id': 10, 'exten': '1001', 'context': 'default'}],
+                }
+            ]
+        }
+        self.confd.contexts.list.return_value = {
+            'items': [{'name': 'default', 'tenant_uuid': 'tenant-uuid'}]
+        }
+
+        self.snapshot.load()
+
+        self.dao.replace_all.assert_called_once_with(
+            [
+                {
+                    'uuid': 'user-uuid',
+                    'tenant_uuid': 'tenant-uuid',
+                    'userfield': None,
+                    'line_id': 1,
+                }
+            ],
+            [
+                {
+                    'id': 1,
+                    'name': 'line1',
+                    'user_uuid': 'user-uuid',
+                    'extension_id': 10,
+                    'extension_exten': '1001',
+                    'extension_context': 'default',
+                }
+            ],
+            [{'name': 'default', 'tenant_uuid': 'tenant-uuid'}],
+            kept_user_uuids=set(),
+            kept_line_ids=set(),
+            kept_context_names=set(),
+        )
+
+    def test_load_keeps_rows_updated_while_loading(self):
+        def list_users(**kwargs):
+            self.snapshot._on_user_deleted({'uuid': 'user-uuid'})
+            self.snapshot._on_line_event({'id': 1})
+            return {'items': []}
+
+        self.confd.users.list.side_effect = list_users
+        self.confd.lines.list.return_value = {'items': []}
+        self.confd.contexts.list.return_value = {'items': []}
+
+        self.snapshot.load()
+        self.snapshot._on_user_deleted({'uuid': 'other-user-uuid'})
+
+        self.dao.replace_all.assert_called_once_with(
+            [],
+            [],
+            [],
+            kept_user_uuids={'user-uuid'},
+            kept_line_ids={1},
+            kept_context_names=set(),
+        )
+
+    def test_find_participants(self):
+        trunk = ConfdLine(id=2, name='line2')
+        unloaded = ConfdLine(id=3, name='line3', user_uuid='other-user-uuid')
+        self.dao.find_lines.return_value = [
+            (LINE, USER),
+            (trunk, None),
+            (unloaded, None),
+        ]
+        self.dao.find_users.return_value = [(USER, LINE)]
+
+        result = self.snapshot.find_participants(
+            ['line1', 'line2', 'line3'], ['user-uuid']
+        )
+
+        participant = has_properties(
+            uuid='user-uuid',
+            tenant_uuid='tenant-uuid',
+            line_id=1,
+            tags=['a', 'b'],
+            main_extension={'exten': '1001', 'context': 'default'},
+        )
+        assert_that(
+            result.by_line_name,
+            has_entries(line1=participant, line2=None),
+        )
+        assert_that(result.by_line_name, is_not(has_key('line3')))
+        assert_that(result.by_user_uuid, has_entries({'user-uuid': participant}))
+
+    def test_user_event_refreshes_user(self):
+        self.confd.users.get.return_value = {
+            'uuid': 'user-uuid',
+            'tenant_uuid': 'tenant-uuid',
+            'lines': [],
+        }
+
+        self.snapshot._on_user_event({'uuid': 'user-uuid'})
+        self.confd.users.get.assert_not_called()
+        self._run_refreshes()
+
+        self.dao.delete_user.assert_called_once_with('user-uuid')
+        (row,) = self.dao.upsert_user.call_args.args
+        assert_that(row, has_entries(uuid='user-uuid', line_id=None))
+
+    def test_user_event_keeps_user_deleted_when_not_found(self):
+        self.confd.users.get.side_effect = HTTPError(response=Mock(status_code=404))
+
+        self.snapshot._on_user_event({'uuid': 'user-uuid'})
+        self._run_refreshes()
+
+        self.dao.delete_user.assert_called_once_with('user-uuid')
+        self.dao.upsert_user.assert_not_called()
+
+    def test_user_event_does_not_raise_when_confd_fails(self):
+        self.confd.users.get.side_effect = HTTPError(response=Mock(status_code=503))
+
+        self.snapshot._on_user_event({'uuid': 'user-uuid'})
+        self._run_refreshes()
+
+        self.dao.delete_user.assert_called_once_with('user-uuid')
+        self.dao.upsert_user.assert_not_called()
+
+    def test_line_event_does_not_raise_when_confd_times_out(self):
+        self.confd.lines.get.side_effect = Timeout()
+
+        self.snapshot._on_line_event({'id': 1})
+        self._run_refreshes()
+
+        self.dao.delete_line.assert_called_once_with(1)
+        self.dao.upsert_line.assert_not_called()
+
+    def test_extension_event_refreshes_lines(self):
+        self.dao.find_line_ids_by_extension_id.return_value = [1]
+        self.confd.lines.get.return_value = {
+            'id': 1,
+            'name': 'line1',
+            'users': [],
+            'extensions': [{'id': 10, 'exten': '1002', 'context': 'default'}],
+        }
+
+        self.snapshot._on_extension_event({'id': 10})
+        self._run_refreshes()
+
+        self.confd.lines.get.assert_called_once_with(1)
+        (row,) = self.dao.upsert_line.call_args.args
+        assert_that(row, has_entries(id=1, user_uuid=None, extension_exten='1002'))
+
+    def _run_refreshes(self):
+        with self.snapshot:
+            pass
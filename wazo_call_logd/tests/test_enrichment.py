@@ -0,0 +1,44 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from unittest import TestCase
+from unittest.mock import Mock
+
+from hamcrest import assert_that, equal_to
+
+from wazo_call_logd.circuit_breaker import CircuitBreaker
+from wazo_call_logd.enrichment import EnrichmentWorker
+from wazo_call_logd.generation_queue import GenerationQueue
+
+
+class TestEnrichmentWorker(TestCase):
+    def setUp(self):
+        self.generation_queue = Mock(GenerationQueue)
+        self.breaker = Mock(CircuitBreaker)
+        self.breaker.allow_request.return_value = True
+        self.worker = EnrichmentWorker(
+            self.generation_queue, self.breaker, batch_size=2
+        )
+
+    def test_enrich_until_last_batch(self):
+        self.generation_queue.enrich.side_effect = [2, 2, 1]
+
+        self.worker.enrich()
+
+        assert_that(self.generation_queue.enrich.call_count, equal_to(3))
+        self.generation_queue.enrich.assert_called_with(2)
+
+    def test_enrich_stops_when_confd_is_slow(self):
+        self.breaker.allow_request.side_effect = [True, False]
+        self.generation_queue.enrich.return_value = 2
+
+        self.worker.enrich()
+
+        self.generation_queue.enrich.assert_called_once_with(2)
+
+    def test_no_enrichment_when_confd_is_slow(self):
+        self.breaker.allow_request.return_value = False
+
+        self.worker.enrich()
+
+        self.generation_queue.enrich.assert_not_called()
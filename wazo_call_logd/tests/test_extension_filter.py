@@ -1,9 +1,9 @@
-# Copyright 2021 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2021-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from unittest import TestCase
 
-from ..extension_filter import ExtensionFilter
+from ..extension_filter import DEFAULT_EXTENSION_FILTER, ExtensionFilter
 
 
 class MockRawCall:
@@ -36,6 +36,19 @@ class TestExtensionFilter(TestCase):
         assert filter.filter('s') == ''
         assert filter.filter('test') == 'test'
 
+    def test_copy(self):
+        filter = ExtensionFilter()
+        copy = filter.copy()
+        copy.add_exten('test')
+        assert copy.filter('s') == ''
+        assert copy.filter('test') == ''
+        assert filter.filter('test') == 'test'
+
+    def test_default_filter_is_frozen(self):
+        self.assertRaises(TypeError, DEFAULT_EXTENSION_FILTER.add_exten, 'test')
+        assert DEFAULT_EXTENSION_FILTER.filter('s') == ''
+        assert DEFAULT_EXTENSION_FILTER.filter('test') == 'test'
+
     def test_filter_call(self):
         filter = ExtensionFilter()
         filter.add_exten('s')
@@ -0,0 +1,122 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from collections import defaultdict
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from hamcrest import (
+    assert_that,
+    calling,
+    close_to,
+    equal_to,
+    has_entries,
+    instance_of,
+    none,
+    raises,
+)
+
+from wazo_call_logd.generation_metrics import GenerationMetrics, Histogram
+
+
+class TestHistogram(TestCase):
+    def test_to_dict(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+
+        assert_that(
+            histogram.to_dict(),
+            has_entries(
+                count=4,
+                sum=close_to(2.65, 1e-9),
+                buckets=equal_to(
+                    [
+                        {'le': 0.1, 'count': 2},
+                        {'le': 1.0, 'count': 3},
+                    ]
+                ),
+            ),
+        )
+
+
+class TestGenerationMetrics(TestCase):
+    def setUp(self):
+        self.metrics = GenerationMetrics(buckets=(1.0,))
+
+    def status(self):
+        status = defaultdict(dict)
+        self.metrics.provide_status(status)
+        return status['generation_metrics']
+
+    @patch('wazo_call_logd.generation_metrics.time.perf_counter')
+    def test_stage(self, perf_counter):
+        perf_counter.side_effect = [10.0, 10.5, 20.0, 22.0]
+
+        with self.metrics.stage('interpret'):
+            pass
+        with self.assertRaises(ValueError):
+            with self.metrics.stage('interpret'):
+                raise ValueError()
+
+        assert_that(
+            self.status()['stages'],
+            equal_to(
+                {
+                    'interpret': {
+                        'count': 2,
+                        'sum': 2.5,
+                        'buckets': [{'le': 1.0, 'count': 1}],
+                    }
+                }
+            ),
+        )
+
+    def test_observe_cel(self):
+        self.metrics.observe_cel('CHAN_START', 0.5)
+        self.metrics.observe_cel('CHAN_START', 0.5)
+        self.metrics.observe_cel('ANSWER', 0.25)
+
+        assert_that(
+            self.status()['cel_eventtypes'],
+            has_entries(
+                CHAN_START=has_entries(count=2, sum=1.0),
+                ANSWER=has_entries(count=1, sum=0.25),
+            ),
+        )
+
+    def test_counted_confd(self):
+        confd = Mock()
+        confd.users.get.return_value = {'uuid': 'user-uuid'}
+        counted_confd = self.metrics.counted_confd(confd)
+
+        result = counted_confd.users.get('user-uuid')
+        counted_confd.users.get('other-uuid')
+        counted_confd.lines.list(name='line', recurse=True)
+
+        assert_that(result, equal_to({'uuid': 'user-uuid'}))
+        confd.users.get.assert_called_with('other-uuid')
+        confd.lines.list.assert_called_once_with(name='line', recurse=True)
+        assert_that(
+            self.status()['confd_calls'],
+            equal_to({'users.get': 2, 'lines.list': 1}),
+        )
+
+    def test_counted_confd_errors(self):
+        confd = Mock()
+        confd.users.get.side_effect = ValueError()
+        counted_confd = self.metrics.counted_confd(confd)
+
+        assert_that(
+            calling(counted_confd.users.get).with_args('user-uuid'),
+            raises(ValueError),
+        )
+        assert_that(self.status()['confd_calls'], equal_to({'users.get': 1}))
+
+    def test_from_config(self):
+        assert_that(GenerationMetrics.from_config({'enabled': False}), none())
+        assert_that(
+            GenerationMetrics.from_config({'enabled': True}),
+            instance_of(GenerationMetrics),
+        )
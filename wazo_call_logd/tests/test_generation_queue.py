@@ -0,0 +1,150 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import threading
+from unittest import TestCase
+from unittest.mock import Mock, call
+
+from hamcrest import (
+    assert_that,
+    contains_exactly,
+    contains_inanyorder,
+    equal_to,
+    has_entries,
+)
+
+from wazo_call_logd.generation_queue import CorrelationLocks, GenerationQueue
+from wazo_call_logd.manager import CallLogsManager
+
+
+class TestGenerationQueue(TestCase):
+    def setUp(self):
+        self.manager = Mock(CallLogsManager)
+        self.manager.find_cels_from_linked_ids.side_effect = lambda linked_ids: [
+            Mock(linkedid=linked_id) for linked_id in linked_ids
+        ]
+        self.queue = GenerationQueue(self.manager, batch_size=3, batch_timeout=0)
+
+    def _generated_linked_ids(self):
+        return [
+            [cel.linkedid for cel in cels]
+            for (cels,), _ in self.manager.generate_from_cels.call_args_list
+        ]
+
+    def test_linked_ids_are_generated_in_batches(self):
+        with GenerationQueue(
+            self.manager, batch_size=3, batch_timeout=1, workers=2
+        ) as queue:
+            for linked_id in ('1', '2', '3', '4'):
+                queue.put(linked_id)
+
+        batches = self._generated_linked_ids()
+        assert_that(
+            [linked_id for batch in batches for linked_id in batch],
+            contains_inanyorder('1', '2', '3', '4'),
+        )
+        for batch in batches:
+            assert len(batch) <= 3
+
+    def test_batch_size_is_bounded(self):
+        queue = GenerationQueue(self.manager, batch_size=3, batch_timeout=1)
+        for linked_id in ('1', '2', '3', '4'):
+            queue.put(linked_id)
+
+        linked_ids, stopping = queue._next_batch()
+
+        assert_that(linked_ids, contains_exactly('1', '2', '3'))
+        assert_that(stopping, equal_to(False))
+
+    def test_failed_batch_is_retried_per_linked_id(self):
+        def generate(cels):
+            if len(cels) > 1 or cels[0].linkedid == '2':
+                raise Exception('failure')
+
+        self.manager.generate_from_cels.side_effect = generate
+
+        self.queue.process(['1', '2', '3'])
+
+        self.manager.find_cels_from_linked_ids.assert_has_calls(
+            [call(['1', '2', '3']), call(['1']), call(['2']), call(['3'])]
+        )
+
+    def test_correlated_linked_ids_are_held_while_generating(self):
+        self.manager.find_cels_from_linked_ids.side_effect = None
+        self.manager.find_cels_from_linked_ids.return_value = [
+            Mock(linkedid='1'),
+            Mock(linkedid='2'),
+        ]
+        held = []
+        self.manager.generate_from_cels.side_effect = lambda cels: held.append(
+            self.queue._locks.acquire({'2'}, blocking=False)
+        )
+
+        self.queue.process(['1'])
+
+        assert_that(held, contains_exactly(False))
+        assert_that(self.queue._locks.acquire({'1', '2'}, blocking=False))
+
+    def test_enrich_holds_linked_ids(self):
+        self.manager.find_enrichment_pending.return_value = [(1, '1'), (2, '1')]
+        held = []
+        self.manager.enrich_call_logs.side_effect = lambda pending, cels: held.append(
+            self.queue._locks.acquire({'1'}, blocking=False)
+        )
+
+        result = self.queue.enrich(100)
+
+        assert_that(result, equal_to(2))
+        self.manager.find_enrichment_pending.assert_called_once_with(100)
+        self.manager.find_cels_from_linked_ids.assert_called_once_with(['1'])
+        assert_that(held, contains_exactly(False))
+        assert_that(self.queue._locks.acquire({'1'}, blocking=False))
+
+    def test_enrich_nothing_pending(self):
+        self.manager.find_enrichment_pending.return_value = []
+
+        result = self.queue.enrich(100)
+
+        assert_that(result, equal_to(0))
+        self.manager.enrich_call_logs.assert_not_called()
+
+    def test_provide_status(self):
+        queue = GenerationQueue(self.manager, queue_size=1, workers=2)
+        status = {'generation_queue': {}}
+
+        queue.provide_status(status)
+        assert_that(
+            status['generation_queue'],
+            has_entries(status='ok', size=0, max_size=1, workers=2),
+        )
+
+        queue.put('1')
+        queue.provide_status(status)
+        assert_that(status['generation_queue'], has_entries(status='fail', size=1))
+
+
+class TestCorrelationLocks(TestCase):
+    def setUp(self):
+        self.locks = CorrelationLocks()
+
+    def test_overlapping_linked_ids_cannot_be_acquired(self):
+        assert_that(self.locks.acquire({'1', '2'}))
+
+        assert_that(self.locks.acquire({'2', '3'}, blocking=False), equal_to(False))
+        assert_that(self.locks.acquire({'3'}, blocking=False), equal_to(True))
+
+    def test_blocking_acquire_waits_for_release(self):
+        self.locks.acquire({'1'})
+        acquired = threading.Event()
+
+        def acquire():
+            self.locks.acquire({'1'})
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        assert_that(acquired.wait(timeout=0.1), equal_to(False))
+
+        self.locks.release({'1'})
+        thread.join()
+        assert_that(acquired.is_set())
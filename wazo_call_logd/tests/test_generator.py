@@ -1,12 +1,14 @@
-# Copyright 2013-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
 
 import itertools
+import threading
+import time
 from collections import defaultdict
 from unittest import TestCase
-from unittest.mock import ANY, Mock, create_autospec, patch
+from unittest.mock import ANY, MagicMock, Mock, create_autospec, patch
 
 import requests.exceptions
 from hamcrest import (
@@ -23,17 +25,23 @@ from hamcrest import (
     has_properties,
     has_property,
     is_,
+    less_than,
     raises,
 )
 from xivo_dao.alchemy.cel import CEL
 
+from wazo_call_logd.circuit_breaker import CircuitBreaker
 from wazo_call_logd.database.cel_event_type import CELEventType
 from wazo_call_logd.exceptions import InvalidCallLogException
+from wazo_call_logd.generation_metrics import GenerationMetrics
 from wazo_call_logd.generator import (
     CallLogsGenerator,
     _group_cels_by_shared_channels,
     _ParticipantsProcessor,
+    partition_cels,
+    stream_cels_by_shared_channels,
 )
+from wazo_call_logd.participant import ResolvedParticipants
 from wazo_call_logd.raw_call_log import RawCallLog
 
 
@@ -111,6 +119,155 @@ class TestCallLogsGenerator(TestCase):
         self.interpretor.interpret_cels.assert_any_call(cels_2, ANY)
         assert_that(result, contains_inanyorder(expected_call_1, expected_call_2))
 
+    @patch('wazo_call_logd.generator.RawCallLog')
+    def test_call_logs_from_cel_resolves_participants_once(
+        self, raw_call_log_constructor
+    ):
+        cels_1 = self._generate_cels_for_call('9328742934')
+        cels_2 = self._generate_cels_for_call('2707230959')
+        call_1 = mock_call()
+        call_1.raw_participants = {'PJSIP/abc-00000001': {}}
+        call_2 = mock_call()
+        call_2.participants_info = [{'user_uuid': 'some-user-uuid'}]
+        self.interpretor.interpret_cels.side_effect = [call_1, call_2]
+        raw_call_log_constructor.side_effect = [call_1, call_2]
+        self.generator.participant_cache = Mock()
+
+        self.generator.call_logs_from_cel(cels_1 + cels_2)
+
+        self.generator.participant_cache.prefetch.assert_called_once_with(
+            self.confd_client, {'PJSIP/abc-00000001'}, {'some-user-uuid'}
+        )
+
+    @patch('wazo_call_logd.generator.RawCallLog')
+    def test_call_logs_from_cel_records_the_stages(self, raw_call_log_constructor):
+        cels = self._generate_cels_for_call('9328742934')
+        call = mock_call()
+        self.interpretor.interpret_cels.return_value = call
+        raw_call_log_constructor.return_value = call
+        self.generator.metrics = MagicMock(GenerationMetrics)
+
+        self.generator.call_logs_from_cel(cels)
+
+        stages = [args[0] for args, _ in self.generator.metrics.stage.call_args_list]
+        assert_that(
+            stages,
+            contains_exactly(
+                'interpret',
+                'remove_duplicate_participants',
+                'resolve_participants',
+                'fetch_participants',
+                'ensure_tenant_uuid_is_set',
+                'fill_extensions_from_participants',
+                'remove_incomplete_recordings',
+                'handle_recording_pauses',
+                'to_call_log',
+            ),
+        )
+
+    @patch('wazo_call_logd.generator.RawCallLog')
+    def test_call_logs_from_cel_deferred_when_confd_is_slow(
+        self, raw_call_log_constructor
+    ):
+        cels = self._generate_cels_for_call('9328742934')
+        call = mock_call()
+        call.raw_participants = {'PJSIP/abc-00000001': {'role': 'source'}}
+        call.requested_context = None
+        call.enrichment_pending = False
+        self.interpretor.interpret_cels.return_value = call
+        raw_call_log_constructor.return_value = call
+        self.generator.confd_breaker = Mock(CircuitBreaker)
+        self.generator.confd_breaker.allow_request.return_value = False
+        self.generator.participant_cache = Mock()
+        self.generator.participant_cache.prefetch.return_value = ResolvedParticipants(
+            {}, {}
+        )
+
+        result = self.generator.call_logs_from_cel(cels)
+
+        self.generator.participant_cache.prefetch.assert_called_once_with(
+            self.confd_client, {'PJSIP/abc-00000001'}, set(), lookup_confd=False
+        )
+        self.generator.participant_cache.find_participant.assert_not_called()
+        assert_that(call.enrichment_pending, equal_to(True))
+        assert_that(result, contains_exactly(call.to_call_log.return_value))
+
+    @patch('wazo_call_logd.generator.RawCallLog')
+    def test_call_logs_from_cel_deferred_when_confd_fails(
+        self, raw_call_log_constructor
+    ):
+        cels = self._generate_cels_for_call('9328742934')
+        call = mock_call()
+        call.participants_info = [{'user_uuid': 'some-user-uuid'}]
+        call.requested_context = None
+        call.enrichment_pending = False
+        self.interpretor.interpret_cels.return_value = call
+        raw_call_log_constructor.return_value = call
+        self.generator.confd_breaker = CircuitBreaker('confd', 1, 30)
+        self.generator.participant_cache = Mock()
+        self.generator.participant_cache.prefetch.side_effect = [
+            requests.exceptions.ConnectionError(),
+            ResolvedParticipants({}, {}),
+        ]
+
+        self.generator.call_logs_from_cel(cels)
+
+        assert_that(self.generator.confd_breaker.is_open, equal_to(True))
+        self.generator.participant_cache.find_participant_by_uuid.assert_not_called()
+        assert_that(call.enrichment_pending, equal_to(True))
+
+    @patch('wazo_call_logd.generator.RawCallLog')
+    def test_call_logs_from_cel_deferred_when_confd_hangs(
+        self, raw_call_log_constructor
+    ):
+        cels = self._generate_cels_for_call('9328742934')
+        call = mock_call()
+        call.participants_info = [{'user_uuid': 'some-user-uuid'}]
+        call.requested_context = None
+        call.enrichment_pending = False
+        self.interpretor.interpret_cels.return_value = call
+        raw_call_log_constructor.return_value = call
+        released = threading.Event()
+        self.addCleanup(released.set)
+
+        def prefetch(confd, channames, user_uuids, lookup_confd=True):
+            if lookup_confd:
+                released.wait()
+            return ResolvedParticipants({}, {})
+
+        self.generator.confd_breaker = CircuitBreaker('confd', 0.1, 30)
+        self.generator.participant_cache = Mock()
+        self.generator.participant_cache.prefetch.side_effect = prefetch
+
+        start_time = time.monotonic()
+        self.generator.call_logs_from_cel(cels)
+
+        assert_that(time.monotonic() - start_time, less_than(1))
+        assert_that(self.generator.confd_breaker.is_open, equal_to(True))
+        assert_that(call.enrichment_pending, equal_to(True))
+
+    @patch('wazo_call_logd.generator.RawCallLog')
+    def test_call_logs_from_cel_records_confd_latency(self, raw_call_log_constructor):
+        cels = self._generate_cels_for_call('9328742934')
+        call = mock_call()
+        call.raw_participants = {'PJSIP/abc-00000001': {'role': 'source'}}
+        call.requested_context = None
+        call.enrichment_pending = False
+        self.interpretor.interpret_cels.return_value = call
+        raw_call_log_constructor.return_value = call
+        self.generator.confd_breaker = CircuitBreaker('confd', 1, 30)
+        self.generator.confd_breaker.record_failure()
+        self.generator.confd_breaker.allow_request = Mock(return_value=True)
+        self.generator.participant_cache = Mock()
+        self.generator.participant_cache.prefetch.return_value = ResolvedParticipants(
+            {'abc': None}, {}
+        )
+
+        self.generator.call_logs_from_cel(cels)
+
+        assert_that(self.generator.confd_breaker.is_open, equal_to(False))
+        assert_that(call.enrichment_pending, equal_to(False))
+
     @patch('wazo_call_logd.generator.RawCallLog')
     def test_call_logs_from_cel_two_calls_one_valid_one_invalid(
         self, raw_call_log_constructor
@@ -284,6 +441,24 @@ class TestParticipantsProcessor(TestCase):
         assert_that(self.confd.mock_calls, contains(anything()))
         assert_that(call_log.participants, is_(empty()))
 
+    def test_deferred_lookups(self):
+        processor = _ParticipantsProcessor(
+            self.confd,
+            resolved_participants=ResolvedParticipants({}, {}),
+            defer_lookups=True,
+        )
+        raw_call_log = mock_call()
+        raw_call_log.raw_participants = {"PJSIP/abc-00000001": {"role": "source"}}
+        raw_call_log.participants_info = [
+            {"user_uuid": "some-user-uuid", "role": "destination"}
+        ]
+
+        call_log = processor(raw_call_log)
+
+        assert_that(self.confd.mock_calls, is_(empty()))
+        assert_that(call_log.participants, is_(empty()))
+        assert_that(processor.deferred, equal_to(True))
+
     def test_participant_identified_from_channel(self):
         call_log = mock_call()
         channel_name = "PJSIP/rgcZLNGE-00000028"
@@ -378,6 +553,36 @@ class TestGroupCelsBySharedChannels(TestCase):
             ),
         )
 
+    def test_sequence_bridging_two_groups(self):
+        cel_sequence_1 = self._generate_cel_sequence(
+            '1.0', iter(['1.0', '1.1', '1.2']).__next__
+        )
+        cel_sequence_2 = self._generate_cel_sequence(
+            '2.0', iter(['2.0', '2.1', '2.2']).__next__
+        )
+        # the last sequence shares a channel with each of the previous ones
+        cel_sequence_3 = self._generate_cel_sequence(
+            '3.0', iter(['3.0', '1.2', '2.2']).__next__
+        )
+
+        groups = list(
+            _group_cels_by_shared_channels(
+                cel_sequence_1 + cel_sequence_2 + cel_sequence_3
+            )
+        )
+
+        assert_that(
+            groups,
+            contains_exactly(
+                contains_exactly(
+                    contains_inanyorder('1.0', '2.0', '3.0'),
+                    contains_inanyorder(
+                        *cel_sequence_1, *cel_sequence_2, *cel_sequence_3
+                    ),
+                )
+            ),
+        )
+
     def test_uncorrelated_cels(self):
         linkedid_1 = '123456789.0'
         uniqueids = (linkedid_1.replace('.0', f'.{i}') for i in itertools.count(0))
@@ -484,3 +689,115 @@ class TestGroupCelsBySharedChannels(TestCase):
                 ),
             ),
         )
+
+
+class TestPartitionCels(TestCase):
+    def _cel(self, linkedid, uniqueid, second):
+        return Mock(
+            linkedid=linkedid,
+            uniqueid=uniqueid,
+            eventtime=f'2023-05-31 00:00:{second:02}.000000+00',
+        )
+
+    def test_slices_are_contiguous_in_time(self):
+        cels = [self._cel(f'{i}.0', f'{i}.0', i) for i in reversed(range(6))]
+
+        slices = partition_cels(cels, slice_size=2)
+
+        assert_that(
+            [[cel.linkedid for cel in slice_cels] for slice_cels in slices],
+            contains_exactly(['0.0', '1.0'], ['2.0', '3.0'], ['4.0', '5.0']),
+        )
+
+    def test_correlated_cels_are_not_split(self):
+        cels = [
+            self._cel('1.0', '1.0', 0),
+            self._cel('1.0', '1.1', 1),
+            self._cel('2.0', '1.1', 2),
+            self._cel('3.0', '3.0', 3),
+        ]
+
+        slices = partition_cels(cels, slice_size=1)
+
+        assert_that(
+            [[cel.linkedid for cel in slice_cels] for slice_cels in slices],
+            contains_exactly(['1.0', '1.0', '2.0'], ['3.0']),
+        )
+
+
+class TestStreamCelsBySharedChannels(TestCase):
+    def _cel(self, eventtype, linkedid, uniqueid):
+        return Mock(
+            eventtype=eventtype,
+            linkedid=linkedid,
+            uniqueid=uniqueid,
+            eventtime='2023-05-31 00:00:00.000000+00',
+        )
+
+    def _call(self, linkedid, *uniqueids):
+        uniqueids = uniqueids or (linkedid,)
+        return [
+            *(self._cel('CHAN_START', linkedid, uniqueid) for uniqueid in uniqueids),
+            *(self._cel('CHAN_END', linkedid, uniqueid) for uniqueid in uniqueids),
+            self._cel('LINKEDID_END', linkedid, uniqueids[-1]),
+        ]
+
+    def test_group_is_yielded_when_ended(self):
+        call_1, call_2 = self._call('1.0'), self._call('2.0')
+
+        def cels():
+            yield from call_1
+            # the first call must be yielded before reading the next one
+            assert_that(groups, has_length(1))
+            yield from call_2
+
+        groups = []
+        for group in stream_cels_by_shared_channels(cels()):
+            groups.append(group)
+
+        assert_that(
+            groups,
+            contains_exactly(
+                contains_exactly({'1.0'}, contains_exactly(*call_1)),
+                contains_exactly({'2.0'}, contains_exactly(*call_2)),
+            ),
+        )
+
+    def test_interleaved_correlated_calls(self):
+        cels = [
+            self._cel('CHAN_START', '1.0', '1.0'),
+            self._cel('CHAN_START', '2.0', '2.0'),
+            self._cel('CHAN_START', '3.0', '3.0'),
+            # the channel 1.0 bridges the calls 2.0 and 3.0
+            self._cel('BRIDGE_ENTER', '2.0', '1.0'),
+            self._cel('BRIDGE_ENTER', '3.0', '1.0'),
+            self._cel('CHAN_END', '2.0', '2.0'),
+            self._cel('LINKEDID_END', '2.0', '2.0'),
+            self._cel('CHAN_END', '3.0', '3.0'),
+            self._cel('LINKEDID_END', '3.0', '3.0'),
+            self._cel('CHAN_END', '3.0', '1.0'),
+            self._cel('LINKEDID_END', '1.0', '1.0'),
+        ]
+
+        groups = list(stream_cels_by_shared_channels(cels))
+
+        assert_that(
+            groups,
+            contains_exactly(
+                contains_exactly({'1.0', '2.0', '3.0'}, contains_inanyorder(*cels)),
+            ),
+        )
+
+    def test_unended_groups_are_yielded_last(self):
+        unended = self._call('1.0')[:-1]
+        ended = self._call('2.0')
+
+        groups = list(stream_cels_by_shared_channels(unended + ended))
+
+        assert_that(
+            groups,
+            contains_exactly(
+                contains_exactly({'2.0'}, anything()),
+                contains_exactly({'1.0'}, contains_exactly(*unended)),
+            ),
+        )
@@ -1,4 +1,4 @@
-# Copyright 2013-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from __future__ import annotations
@@ -20,6 +20,7 @@ from wazo_confd_client import Client as ConfdClient
 
 from wazo_call_logd.cel_interpretor import default_interpretors, parse_eventtime
 from wazo_call_logd.generator import CallLogsGenerator
+from wazo_call_logd.incremental import IncrementalInterpretor
 
 from .helpers.hamcrest.datetime_close_to import datetime_close_to
 
@@ -216,6 +217,18 @@ def mock_confd_client(
 
     confd_client.users.get.side_effect = get_user if users is not None else HTTPError
 
+    def list_users(uuid=None, **kwargs):
+        if users is None:
+            filtered_users = []
+        elif uuid:
+            uuids = uuid.split(',')
+            filtered_users = [user for user in users if user['uuid'] in uuids]
+        else:
+            filtered_users = users
+        return {'items': filtered_users}
+
+    confd_client.users.list.side_effect = list_users
+
     def list_contexts(name=None, **kwargs):
         if contexts is None:
             filtered_contexts = []
@@ -772,3 +785,23 @@ class TestCallLogGenerationScenarios(TestCase):
                 ),
             ),
         )
+
+
+class IncrementalCallLogsGenerator(CallLogsGenerator):
+    def call_logs_from_cel(self, cels):
+        for cel in cels:
+            self.incremental_interpretor.add(cel)
+        return super().call_logs_from_cel(cels)
+
+
+class TestIncrementalCallLogGenerationScenarios(TestCallLogGenerationScenarios):
+    """The same scenarios, with the CELs interpreted as they are received"""
+
+    def setUp(self) -> None:
+        super().setUp()
+        interpretors = default_interpretors()
+        self.generator = IncrementalCallLogsGenerator(
+            self.confd_client,
+            interpretors,
+            incremental_interpretor=IncrementalInterpretor(interpretors[-1]),
+        )
@@ -0,0 +1,181 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from datetime import datetime, timedelta, timezone
+from unittest import TestCase
+
+from hamcrest import assert_that, equal_to, has_entries, is_not, none
+
+from ..cel_buffer import cel_from_payload
+from ..cel_interpretor import default_interpretors
+from ..incremental import IncrementalInterpretor
+from ..raw_call_log import RawCallLog
+
+START = datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc)
+COMPARED_ATTRIBUTES = (
+    'date',
+    'date_answer',
+    'date_end',
+    'source_name',
+    'source_exten',
+    'destination_name',
+    'destination_exten',
+    'requested_exten',
+)
+
+
+def cels(linkedid, *events):
+    result = []
+    for i, (event_name, uniqueid, *extra) in enumerate(events):
+        eventtime = START + timedelta(seconds=i)
+        payload = {
+            'EventName': event_name,
+            'EventTime': str(eventtime.timestamp()),
+            'UniqueID': uniqueid,
+            'LinkedID': linkedid,
+            'Channel': f'PJSIP/line{uniqueid}-00000001',
+            'CallerIDname': f'User {uniqueid}',
+            'CallerIDnum': f'100{uniqueid}',
+            'Exten': '1002',
+            'Extra': extra[0] if extra else '',
+        }
+        result.append(cel_from_payload(payload))
+    return result
+
+
+BRIDGE = '{"bridge_id":"bridge","bridge_technology":"simple_bridge"}'
+ANSWERED_CALL = (
+    ('CHAN_START', '1'),
+    ('APP_START', '1'),
+    ('CHAN_START', '2'),
+    ('ANSWER', '2'),
+    ('ANSWER', '1'),
+    ('BRIDGE_ENTER', '2', BRIDGE),
+    ('BRIDGE_ENTER', '1', BRIDGE),
+    ('BRIDGE_EXIT', '2', BRIDGE),
+    ('HANGUP', '2'),
+    ('CHAN_END', '2'),
+    ('BRIDGE_EXIT', '1', BRIDGE),
+    ('HANGUP', '1'),
+    ('CHAN_END', '1'),
+    ('LINKEDID_END', '1'),
+)
+
+
+class TestIncrementalInterpretor(TestCase):
+    def setUp(self):
+        self.interpretor = default_interpretors()[-1]
+        self.incremental = IncrementalInterpretor(self.interpretor)
+
+    def interpret(self, cels):
+        return self.interpretor.interpret_cels(cels, RawCallLog())
+
+    def assert_same_call_log(self, result, expected):
+        for attribute in COMPARED_ATTRIBUTES:
+            assert_that(
+                getattr(result, attribute),
+                equal_to(getattr(expected, attribute)),
+                attribute,
+            )
+        assert_that(
+            dict(result.raw_participants), equal_to(dict(expected.raw_participants))
+        )
+
+    def test_pop_returns_the_same_interpretation(self):
+        call_cels = cels('1', *ANSWERED_CALL)
+        for cel in call_cels:
+            self.incremental.add(cel)
+
+        result = self.incremental.pop({'1'}, call_cels)
+
+        assert_that(result, is_not(none()))
+        self.assert_same_call_log(result, self.interpret(call_cels))
+        assert_that(result.date_answer, is_not(none()))
+        assert_that(len(self.incremental), equal_to(0))
+
+    def test_callee_cels_after_the_caller_ended(self):
+        call_cels = cels(
+            '1',
+            ('CHAN_START', '1'),
+            ('CHAN_START', '2'),
+            ('HANGUP', '1'),
+            ('CHAN_END', '1'),
+            ('HANGUP', '2', '{"hangupcause":16,"dialstatus":""}'),
+            ('CHAN_END', '2'),
+            ('LINKEDID_END', '2'),
+        )
+        for cel in call_cels:
+            self.incremental.add(cel)
+
+        result = self.incremental.pop({'1'}, call_cels)
+
+        self.assert_same_call_log(result, self.interpret(call_cels))
+        assert_that(
+            result.raw_participants,
+            has_entries({'PJSIP/line1-00000001': has_entries(role='source')}),
+        )
+
+    def test_pop_when_the_cels_differ(self):
+        call_cels = cels('1', *ANSWERED_CALL)
+        for cel in call_cels[1:]:
+            self.incremental.add(cel)
+
+        assert_that(self.incremental.pop({'1'}, call_cels), none())
+        assert_that(len(self.incremental), equal_to(0))
+
+    def test_pop_when_the_cels_are_out_of_order(self):
+        call_cels = cels('1', *ANSWERED_CALL)
+        for cel in [call_cels[0], call_cels[2], call_cels[1], *call_cels[3:]]:
+            self.incremental.add(cel)
+
+        assert_that(self.incremental.pop({'1'}, call_cels), none())
+
+    def test_pop_when_a_channel_starts_after_its_first_cel(self):
+        call_cels = cels('1', ('ANSWER', '1'), ('CHAN_START', '1'), ('CHAN_END', '1'))
+        for cel in call_cels:
+            self.incremental.add(cel)
+
+        assert_that(self.incremental.pop({'1'}, call_cels), none())
+
+    def test_pop_correlated_linkedids(self):
+        call_cels = cels('1', *ANSWERED_CALL)
+        other_cels = cels('2', ('CHAN_START', '3'), ('LINKEDID_END', '3'))
+        for cel in call_cels + other_cels:
+            self.incremental.add(cel)
+
+        assert_that(self.incremental.pop({'1', '2'}, call_cels + other_cels), none())
+        assert_that(len(self.incremental), equal_to(0))
+
+    def test_pop_unknown_linkedid(self):
+        assert_that(self.incremental.pop({'1'}, cels('1', *ANSWERED_CALL)), none())
+
+    def test_evicts_the_oldest_calls(self):
+        incremental = IncrementalInterpretor(self.interpretor, max_events=3)
+        first_cels = cels('1', ('CHAN_START', '1'), ('CHAN_END', '1'))
+        second_cels = cels('2', ('CHAN_START', '2'), ('CHAN_END', '2'))
+        for cel in first_cels + second_cels:
+            incremental.add(cel)
+
+        assert_that(len(incremental), equal_to(2))
+        assert_that(incremental.pop({'1'}, first_cels), none())
+        assert_that(incremental.pop({'2'}, second_cels), is_not(none()))
+
+    def test_from_config(self):
+        interpretors = default_interpretors()
+        config = {
+            'enabled': True,
+            'incremental': True,
+            'max_events': 10,
+            'max_age': 60,
+        }
+
+        incremental = IncrementalInterpretor.from_config(config, interpretors)
+
+        assert_that(incremental.interpretor, equal_to(interpretors[-1]))
+        for disabled in ({'enabled': False}, {'incremental': False}):
+            assert_that(
+                IncrementalInterpretor.from_config(
+                    {**config, **disabled}, interpretors
+                ),
+                none(),
+            )
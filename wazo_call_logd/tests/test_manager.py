@@ -1,20 +1,28 @@
-# Copyright 2015-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2015-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from datetime import datetime, timedelta, timezone
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
+
+from hamcrest import assert_that, contains_exactly, equal_to, has_properties
 
 from wazo_call_logd.bus import BusPublisher
-from wazo_call_logd.generator import CallLogsGenerator
+from wazo_call_logd.cel_buffer import CELBuffer
+from wazo_call_logd.database.queries.cel import CELRow
+from wazo_call_logd.generator import CallLogsCreation, CallLogsGenerator
 from wazo_call_logd.manager import CallLogsManager
 from wazo_call_logd.writer import CallLogsWriter
 
+NOW = datetime.now(timezone.utc)
+
 
 class TestCallLogsManager(TestCase):
     def setUp(self):
         self.dao = Mock()
         self.generator = Mock(CallLogsGenerator)
         self.writer = Mock(CallLogsWriter)
+        self.writer.write.return_value = []
         self.publisher = Mock(BusPublisher)
         self.manager = CallLogsManager(
             self.dao,
@@ -28,15 +36,33 @@ class TestCallLogsManager(TestCase):
 
     def test_generate_from_count(self):
         cel_count = 132456
-        cels = self.dao.cel.find_last_unprocessed.return_value = [Mock(), Mock()]
-        call_logs = self.generator.from_cel.return_value = Mock(new_call_logs=[])
+        cels = [
+            CELRow(1, 'CHAN_START', NOW, '1.1', '1.1'),
+            CELRow(2, 'CHAN_END', NOW, '1.1', '1.1'),
+            CELRow(3, 'LINKEDID_END', NOW, '1.1', '1.1'),
+        ]
+        self.dao.cel.stream_last_unprocessed.return_value = iter(cels)
+        call_logs = self.generator.from_cel_groups.return_value = Mock(new_call_logs=[])
 
         self.manager.generate_from_count(cel_count=cel_count)
 
-        self.dao.cel.find_last_unprocessed.assert_called_once_with(cel_count)
-        self.generator.from_cel.assert_called_once_with(cels)
+        self.dao.cel.stream_last_unprocessed.assert_called_once_with(cel_count)
+        self.generator.from_cel_groups.assert_called_once_with([({'1.1'}, cels)])
         self.writer.write.assert_called_once_with(call_logs)
 
+    @patch('wazo_call_logd.manager.GENERATION_CHUNK_SIZE', 1)
+    def test_generate_from_count_in_chunks(self):
+        cels = [
+            CELRow(1, 'LINKEDID_END', NOW, '1.1', '1.1'),
+            CELRow(2, 'LINKEDID_END', NOW, '2.1', '2.1'),
+        ]
+        self.dao.cel.stream_last_unprocessed.return_value = iter(cels)
+        self.generator.from_cel_groups.return_value = Mock(new_call_logs=[])
+
+        self.manager.generate_from_count(cel_count=2)
+
+        assert_that(self.writer.write.call_count, equal_to(2))
+
     def test_generate_from_linked_id(self):
         linked_id = '666'
         cels = self.dao.cel.find_from_linked_id.return_value = [Mock()]
@@ -47,3 +73,186 @@ class TestCallLogsManager(TestCase):
         self.dao.cel.find_from_linked_id.assert_called_once_with(linked_id)
         self.generator.from_cel.assert_called_once_with(cels)
         self.writer.write.assert_called_once_with(call_logs)
+
+    def test_generate_from_linked_ids(self):
+        linked_ids = ['666', '777']
+        cels = self.dao.cel.find_from_linked_ids.return_value = [Mock(), Mock()]
+        call_logs = self.generator.from_cel.return_value = Mock(new_call_logs=[])
+
+        self.manager.generate_from_linked_ids(linked_ids)
+
+        self.dao.cel.find_from_linked_ids.assert_called_once_with(linked_ids)
+        self.generator.from_cel.assert_called_once_with(cels)
+        self.writer.write.assert_called_once_with(call_logs)
+
+    def test_generate_from_cels_publishes_updated_call_logs(self):
+        created, updated = Mock(), Mock()
+        self.generator.from_cel.return_value = CallLogsCreation(
+            new_call_logs=[created, updated], call_logs_to_delete={1}
+        )
+        self.writer.write.return_value = [updated]
+
+        self.manager.generate_from_cels([Mock(linkedid='1')])
+
+        self.publisher.publish_call_log.assert_called_once_with(created)
+        self.publisher.publish_call_log_updated.assert_called_once_with(updated)
+
+    def test_enrich_call_logs(self):
+        cels = [Mock()]
+        enriched = Mock(id=1, conversation_id='1.1', enrichment_pending=False)
+        call_logs = self.generator.from_cel.return_value = CallLogsCreation(
+            new_call_logs=[enriched], call_logs_to_delete={1}
+        )
+        self.writer.write.return_value = [enriched]
+
+        self.manager.enrich_call_logs([(1, '1.1')], cels)
+
+        self.generator.from_cel.assert_called_once_with(cels)
+        self.writer.write.assert_called_once_with(call_logs)
+        self.publisher.publish_call_log.assert_called_once_with()
+        self.publisher.publish_call_log_updated.assert_called_once_with(enriched)
+        self.dao.call_log.clear_enrichment_pending.assert_not_called()
+
+    def test_enrich_call_logs_still_deferred(self):
+        deferred = Mock(id=1, conversation_id='1.1', enrichment_pending=True)
+        self.generator.from_cel.return_value = CallLogsCreation(
+            new_call_logs=[deferred], call_logs_to_delete={1}
+        )
+        self.writer.write.return_value = [deferred]
+
+        self.manager.enrich_call_logs([(1, '1.1')], [Mock()])
+
+        self.publisher.publish_call_log_updated.assert_called_once_with()
+
+    def test_enrich_call_logs_keeps_call_logs_not_generated_again(self):
+        enriched = Mock(id=1, conversation_id='1.1', enrichment_pending=False)
+        self.generator.from_cel.return_value = CallLogsCreation(
+            new_call_logs=[enriched], call_logs_to_delete={1, 2}
+        )
+        self.writer.write.return_value = [enriched]
+
+        self.manager.enrich_call_logs([(1, '1.1'), (2, '2.1')], [Mock()])
+
+        (call_logs,) = self.writer.write.call_args.args
+        assert_that(call_logs.call_logs_to_delete, equal_to({1}))
+        self.dao.call_log.clear_enrichment_pending.assert_called_once_with({2})
+
+    def test_enrich_call_logs_without_cels(self):
+        self.generator.from_cel.return_value = CallLogsCreation(
+            new_call_logs=[], call_logs_to_delete=set()
+        )
+
+        self.manager.enrich_call_logs([(1, '1.1')], [])
+
+        self.dao.call_log.clear_enrichment_pending.assert_called_once_with({1})
+
+
+class TestCallLogsManagerWithCELBuffer(TestCase):
+    def setUp(self):
+        self.dao = Mock()
+        self.generator = Mock(CallLogsGenerator)
+        self.writer = Mock(CallLogsWriter)
+        self.writer.write.return_value = []
+        self.publisher = Mock(BusPublisher)
+        self.cel_buffer = Mock(CELBuffer)
+        self.manager = CallLogsManager(
+            self.dao,
+            self.generator,
+            self.writer,
+            self.publisher,
+            self.cel_buffer,
+        )
+
+    def test_find_cels_from_buffer(self):
+        cel1 = CELRow(None, 'CHAN_START', NOW, '1', '1')
+        cel2 = CELRow(None, 'LINKEDID_END', NOW, '1', '1')
+        self.cel_buffer.find.return_value = {'1': [cel1, cel2]}
+        self.dao.cel.find_ids_from_linked_ids.return_value = {
+            '1': [('1', 'CHAN_START', NOW, 10, None), ('1', 'LINKEDID_END', NOW, 11, 5)]
+        }
+
+        result = self.manager.find_cels_from_linked_ids(['1'])
+
+        assert_that(
+            result,
+            contains_exactly(
+                has_properties(id=10, eventtype='CHAN_START', call_log_id=None),
+                has_properties(id=11, eventtype='LINKEDID_END', call_log_id=5),
+            ),
+        )
+        self.dao.cel.find_from_linked_ids.assert_not_called()
+
+    def test_find_cels_from_buffer_received_out_of_order(self):
+        later = NOW + timedelta(seconds=1)
+        hangup = CELRow(None, 'HANGUP', later, '1', '1')
+        chan_start = CELRow(None, 'CHAN_START', NOW, '1', '1')
+        self.cel_buffer.find.return_value = {'1': [hangup, chan_start]}
+        self.dao.cel.find_ids_from_linked_ids.return_value = {
+            '1': [('1', 'CHAN_START', NOW, 10, None), ('1', 'HANGUP', later, 11, None)]
+        }
+
+        result = self.manager.find_cels_from_linked_ids(['1'])
+
+        assert_that(
+            result,
+            contains_exactly(
+                has_properties(id=11, eventtype='HANGUP'),
+                has_properties(id=10, eventtype='CHAN_START'),
+            ),
+        )
+
+    def test_find_cels_from_buffer_with_naive_database_times(self):
+        cel = CELRow(None, 'CHAN_START', NOW, '1', '1')
+        self.cel_buffer.find.return_value = {'1': [cel]}
+        naive = NOW.astimezone().replace(tzinfo=None)
+        self.dao.cel.find_ids_from_linked_ids.return_value = {
+            '1': [('1', 'CHAN_START', naive, 10, None)]
+        }
+
+        result = self.manager.find_cels_from_linked_ids(['1'])
+
+        assert_that(result, contains_exactly(has_properties(id=10)))
+
+    def test_find_cels_from_buffer_not_matching_one_to_one(self):
+        cel = CELRow(None, 'CHAN_START', NOW, '1', '1')
+        self.cel_buffer.find.return_value = {'1': [cel, cel]}
+        self.dao.cel.find_ids_from_linked_ids.return_value = {
+            '1': [
+                ('1', 'CHAN_START', NOW, 10, None),
+                ('1', 'CHAN_START', NOW, 11, None),
+            ]
+        }
+        cels = self.dao.cel.find_from_linked_ids.return_value = [Mock(id=10)]
+
+        result = self.manager.find_cels_from_linked_ids(['1'])
+
+        assert_that(result, equal_to(cels))
+
+    def test_find_cels_not_in_buffer(self):
+        self.cel_buffer.find.return_value = {}
+        cels = self.dao.cel.find_from_linked_ids.return_value = [Mock(id=1)]
+
+        result = self.manager.find_cels_from_linked_ids(['1'])
+
+        assert_that(result, equal_to(cels))
+        self.dao.cel.find_from_linked_ids.assert_called_once_with(['1'])
+
+    def test_find_cels_when_database_is_late(self):
+        cel = CELRow(None, 'CHAN_START', NOW, '1', '1')
+        self.cel_buffer.find.return_value = {'1': [cel, cel]}
+        self.dao.cel.find_ids_from_linked_ids.return_value = {
+            '1': [('1', 'CHAN_START', NOW, 10, None)]
+        }
+        cels = self.dao.cel.find_from_linked_ids.return_value = [Mock(id=10)]
+
+        result = self.manager.find_cels_from_linked_ids(['1'])
+
+        assert_that(result, equal_to(cels))
+        self.dao.cel.find_from_linked_ids.assert_called_once_with(['1'])
+
+    def test_generated_cels_are_discarded_from_buffer(self):
+        self.generator.from_cel.return_value = Mock(new_call_logs=[])
+
+        self.manager.generate_from_cels([Mock(linkedid='1'), Mock(linkedid='2')])
+
+        self.cel_buffer.discard.assert_called_once_with({'1', '2'})
@@ -1,13 +1,33 @@
-# Copyright 2013-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
-from hamcrest import assert_that, has_properties, none
+from hamcrest import (
+    assert_that,
+    equal_to,
+    has_key,
+    has_properties,
+    is_not,
+    none,
+    same_instance,
+)
 from requests.exceptions import HTTPError
 
-from ..participant import find_participant, find_participant_by_uuid
+from ..participant import (
+    ContextTenantCache,
+    ParticipantCache,
+    find_participant,
+    find_participant_by_uuid,
+    find_participants,
+)
+
+USER = {
+    'uuid': 'user_uuid',
+    'tenant_uuid': 'tenant_uuid',
+    'userfield': None,
+}
 
 
 def confd_mock(lines=None):
@@ -116,3 +136,198 @@ class TestFindParticipant(TestCase):
             result,
             none(),
         )
+
+
+class TestFindParticipants(TestCase):
+    def test_find_participants(self):
+        other_user = dict(USER, uuid='other_user_uuid', lines=[])
+        lines = [{'id': 12, 'users': [USER], 'extensions': []}]
+        confd = confd_mock(lines)
+        confd.users.list.return_value = {'items': [dict(USER, lines=lines), other_user]}
+
+        result = find_participants(confd, ['something'], ['other_user_uuid'])
+
+        assert_that(
+            result.by_line_name['something'],
+            has_properties(uuid='user_uuid', line_id=12),
+        )
+        assert_that(
+            result.by_user_uuid['other_user_uuid'],
+            has_properties(uuid='other_user_uuid', line_id=None),
+        )
+        confd.users.list.assert_called_once_with(
+            uuid='other_user_uuid,user_uuid', recurse=True
+        )
+        confd.users.get.assert_not_called()
+
+    def test_find_participants_when_line_has_no_user(self):
+        confd = confd_mock([{'id': 12, 'users': [], 'extensions': []}])
+        confd.users.list.return_value = {'items': []}
+
+        result = find_participants(confd, ['trunk'], [])
+
+        assert_that(result.by_line_name['trunk'], none())
+        confd.users.list.assert_not_called()
+
+    def test_find_participants_when_user_of_line_is_not_listed(self):
+        confd = confd_mock([{'id': 12, 'users': [USER], 'extensions': []}])
+        confd.users.list.return_value = {'items': []}
+
+        result = find_participants(confd, ['something'], [])
+
+        assert_that(result.by_line_name, is_not(has_key('something')))
+
+
+class TestParticipantCache(TestCase):
+    def setUp(self):
+        lines = [{'id': 12, 'users': [USER], 'extensions': []}]
+        self.confd = confd_mock(lines)
+        self.cache = ParticipantCache(ttl=60, max_size=2)
+
+    def test_find_participant_is_cached_by_line_name(self):
+        first = self.cache.find_participant(self.confd, 'sip/something-00000001')
+        second = self.cache.find_participant(self.confd, 'sip/something-00000002')
+
+        assert_that(second, same_instance(first))
+        assert_that(self.confd.lines.list.call_count, equal_to(1))
+        assert_that(self.cache, has_properties(hits=1, misses=1))
+
+    def test_find_participant_caches_lines_without_user(self):
+        self.confd.lines.list.return_value = {'items': []}
+
+        self.cache.find_participant(self.confd, 'sip/trunk-00000001')
+        result = self.cache.find_participant(self.confd, 'sip/trunk-00000002')
+
+        assert_that(result, none())
+        assert_that(self.confd.lines.list.call_count, equal_to(1))
+
+    def test_find_participant_when_user_not_found_is_not_cached(self):
+        lines = [{'id': 12, 'users': [{'uuid': 'phantom-user-uuid'}]}]
+        self.confd.lines.list.return_value = {'items': lines}
+
+        first = self.cache.find_participant(self.confd, 'sip/something-00000001')
+        self.cache.find_participant(self.confd, 'sip/something-00000002')
+
+        assert_that(first, none())
+        assert_that(self.confd.lines.list.call_count, equal_to(2))
+        assert_that(self.confd.users.get.call_count, equal_to(2))
+
+    def test_find_participant_by_uuid_is_cached(self):
+        self.cache.find_participant_by_uuid(self.confd, 'user_uuid')
+        self.cache.find_participant_by_uuid(self.confd, 'user_uuid')
+
+        assert_that(self.confd.users.get.call_count, equal_to(1))
+
+    def test_find_participant_by_uuid_when_not_found_is_not_cached(self):
+        self.cache.find_participant_by_uuid(self.confd, 'phantom-user-uuid')
+        self.cache.find_participant_by_uuid(self.confd, 'phantom-user-uuid')
+
+        assert_that(self.confd.users.get.call_count, equal_to(2))
+
+    def test_entries_expire(self):
+        with patch('wazo_call_logd.participant.time.monotonic') as monotonic:
+            monotonic.return_value = 0
+            self.cache.find_participant_by_uuid(self.confd, 'user_uuid')
+            monotonic.return_value = 61
+            self.cache.find_participant_by_uuid(self.confd, 'user_uuid')
+
+        assert_that(self.confd.users.get.call_count, equal_to(2))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cache.find_participant(self.confd, 'sip/line1-00000001')
+        self.cache.find_participant(self.confd, 'sip/line2-00000001')
+        self.cache.find_participant(self.confd, 'sip/line1-00000002')
+        self.cache.find_participant(self.confd, 'sip/line3-00000001')
+
+        self.cache.find_participant(self.confd, 'sip/line1-00000003')
+        self.cache.find_participant(self.confd, 'sip/line2-00000002')
+
+        assert_that(self.confd.lines.list.call_count, equal_to(4))
+
+    def test_user_event_invalidates_user(self):
+        self.cache.find_participant(self.confd, 'sip/something-00000001')
+        self.cache.find_participant_by_uuid(self.confd, 'user_uuid')
+
+        self.cache._on_user_event({'uuid': 'user_uuid'})
+        self.cache.find_participant(self.confd, 'sip/something-00000002')
+        self.cache.find_participant_by_uuid(self.confd, 'user_uuid')
+
+        assert_that(self.confd.lines.list.call_count, equal_to(2))
+        assert_that(self.confd.users.get.call_count, equal_to(4))
+
+    def test_line_event_invalidates_all(self):
+        self.confd.lines.list.return_value = {'items': []}
+        self.cache.find_participant(self.confd, 'sip/trunk-00000001')
+
+        self.cache._on_line_event({'id': 12})
+        self.cache.find_participant(self.confd, 'sip/trunk-00000002')
+
+        assert_that(self.confd.lines.list.call_count, equal_to(2))
+
+    def test_prefetch_looks_up_missing_participants(self):
+        self.confd.users.list.return_value = {
+            'items': [dict(USER, lines=self.confd.lines.list()['items'])]
+        }
+        self.cache.find_participant_by_uuid(self.confd, 'user_uuid')
+
+        result = self.cache.prefetch(
+            self.confd, ['sip/something-00000001', 'Local/foo-00000001'], ['user_uuid']
+        )
+
+        assert_that(result.by_line_name['something'], has_properties(uuid='user_uuid'))
+        assert_that(result.by_user_uuid['user_uuid'], has_properties(uuid='user_uuid'))
+        self.confd.users.list.assert_called_once_with(uuid='user_uuid', recurse=True)
+
+    def test_prefetch_does_not_cache_line_when_user_is_not_listed(self):
+        self.confd.users.list.return_value = {'items': []}
+
+        self.cache.prefetch(self.confd, ['sip/something-00000001'], [])
+        self.cache.prefetch(self.confd, ['sip/something-00000002'], [])
+
+        assert_that(self.confd.lines.list.call_count, equal_to(2))
+
+
+class TestContextTenantCache(TestCase):
+    def setUp(self):
+        self.confd = Mock()
+        self.confd.contexts.list.return_value = {
+            'items': [{'name': 'from-extern', 'tenant_uuid': 'tenant_uuid'}]
+        }
+        self.cache = ContextTenantCache(ttl=60, max_size=10)
+
+    def test_load(self):
+        self.cache.load(self.confd)
+
+        result = self.cache.find_tenant_uuid(self.confd, 'from-extern')
+
+        assert_that(result, equal_to('tenant_uuid'))
+        self.confd.contexts.list.assert_called_once_with(recurse=True)
+
+    def test_missing_context_looked_up_once(self):
+        self.confd.contexts.list.return_value = {'items': []}
+
+        self.cache.find_tenant_uuid(self.confd, 'unknown')
+        result = self.cache.find_tenant_uuid(self.confd, 'unknown')
+
+        assert_that(result, none())
+        self.confd.contexts.list.assert_called_once_with(name='unknown', recurse=True)
+
+    def test_missing_context_not_looked_up_in_confd(self):
+        result = self.cache.find_tenant_uuid(
+            self.confd, 'from-extern', lookup_confd=False
+        )
+
+        assert_that(result, none())
+        self.confd.contexts.list.assert_not_called()
+
+    def test_context_events(self):
+        self.cache.load(self.confd)
+
+        self.cache._on_context_event({'name': 'other', 'tenant_uuid': 'other_uuid'})
+        self.cache._on_context_deleted({'name': 'from-extern'})
+
+        assert_that(
+            self.cache.find_tenant_uuid(self.confd, 'other'), equal_to('other_uuid')
+        )
+        self.cache.find_tenant_uuid(self.confd, 'from-extern')
+        self.confd.contexts.list.assert_called_with(name='from-extern', recurse=True)
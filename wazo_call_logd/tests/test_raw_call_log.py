@@ -1,12 +1,22 @@
-# Copyright 2013-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
-from hamcrest import all_of, assert_that, equal_to, has_property
+from hamcrest import (
+    all_of,
+    assert_that,
+    calling,
+    equal_to,
+    has_property,
+    is_not,
+    raises,
+    same_instance,
+)
 
 from wazo_call_logd.exceptions import InvalidCallLogException
+from wazo_call_logd.extension_filter import DEFAULT_EXTENSION_FILTER
 from wazo_call_logd.raw_call_log import RawCallLog
 
 
@@ -53,3 +63,71 @@ class TestRawCallLog(TestCase):
         self.raw_call_log.source_exten = ''
 
         self.assertRaises(InvalidCallLogException, self.raw_call_log.to_call_log)
+
+    def test_containers_are_not_shared(self):
+        other_call_log = RawCallLog()
+
+        self.raw_call_log.raw_participants['PJSIP/abc'].update(role='source')
+        self.raw_call_log.participants_info.append({'user_uuid': 'user-uuid'})
+
+        assert_that(
+            self.raw_call_log.raw_participants,
+            equal_to({'PJSIP/abc': {'role': 'source'}}),
+        )
+        assert_that(
+            self.raw_call_log.participants_info, equal_to([{'user_uuid': 'user-uuid'}])
+        )
+        assert_that(other_call_log.raw_participants, equal_to({}))
+        assert_that(other_call_log.participants_info, equal_to([]))
+        assert_that(
+            calling(getattr).with_args(self.raw_call_log, 'unknown'),
+            raises(AttributeError),
+        )
+        assert_that(
+            calling(setattr).with_args(self.raw_call_log, 'unknown', None),
+            raises(AttributeError),
+        )
+
+    def test_add_filtered_exten_copies_the_default_filter(self):
+        other_call_log = RawCallLog()
+        assert_that(
+            self.raw_call_log.extension_filter, same_instance(DEFAULT_EXTENSION_FILTER)
+        )
+
+        self.raw_call_log.add_filtered_exten('1234')
+        self.raw_call_log.add_filtered_exten('5678')
+
+        assert_that(
+            self.raw_call_log.extension_filter,
+            is_not(same_instance(DEFAULT_EXTENSION_FILTER)),
+        )
+        assert_that(self.raw_call_log.extension_filter.filter('1234'), equal_to(''))
+        assert_that(self.raw_call_log.extension_filter.filter('5678'), equal_to(''))
+        assert_that(self.raw_call_log.extension_filter.filter('s'), equal_to(''))
+        assert_that(other_call_log.extension_filter.filter('1234'), equal_to('1234'))
+
+    def test_insert_or_update_participants_info(self):
+        source = {'user_uuid': 'user-1', 'role': 'source'}
+        self.raw_call_log.add_participants_info(source)
+        self.raw_call_log.add_participants_info(
+            {'user_uuid': 'user-1', 'role': 'source'}
+        )
+
+        self.raw_call_log.insert_or_update_participants_info(
+            {'user_uuid': 'user-1', 'role': 'source', 'answered': False}
+        )
+        self.raw_call_log.insert_or_update_participants_info(
+            {'user_uuid': 'user-1', 'role': 'destination'}
+        )
+
+        assert_that(
+            self.raw_call_log.participants_info,
+            equal_to(
+                [
+                    {'user_uuid': 'user-1', 'role': 'source', 'answered': False},
+                    {'user_uuid': 'user-1', 'role': 'source'},
+                    {'user_uuid': 'user-1', 'role': 'destination'},
+                ]
+            ),
+        )
+        assert_that(self.raw_call_log.participants_info[0], same_instance(source))
@@ -0,0 +1,79 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from datetime import datetime
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from hamcrest import assert_that, contains_exactly, equal_to, has_properties
+
+from wazo_call_logd.database.models import SweepCheckpoint
+from wazo_call_logd.sweep import CheckpointedSweep
+
+EVENTTIME = datetime(2026, 1, 1)
+
+
+def key(id_):
+    return Mock(eventtime=EVENTTIME, id=id_, uniqueid=f'{id_}.0')
+
+
+@patch('builtins.print', Mock())
+class TestCheckpointedSweep(TestCase):
+    def setUp(self):
+        self.dao = Mock()
+        self.dao.cel.count_unprocessed.return_value = 3
+        self.dao.cel.find_next_unprocessed.side_effect = [
+            [key(1), key(2)],
+            [key(3)],
+            [],
+        ]
+        self.dao.cel.stream_from_uniqueids.return_value = []
+        self.generate_from_cels = Mock()
+        self.sweep = CheckpointedSweep(self.dao, self.generate_from_cels, 2)
+
+    def test_run_in_batches(self):
+        checkpoint = self.dao.sweep_checkpoint.create.return_value = SweepCheckpoint(
+            older=EVENTTIME, processed_cel_count=0
+        )
+
+        self.sweep.run(days=1)
+
+        assert_that(self.dao.cel.find_next_unprocessed.call_count, equal_to(3))
+        assert_that(
+            [
+                call.kwargs['after']
+                for call in self.dao.cel.find_next_unprocessed.mock_calls
+            ],
+            contains_exactly(None, (EVENTTIME, 2), (EVENTTIME, 3)),
+        )
+        assert_that(self.generate_from_cels.call_count, equal_to(2))
+        assert_that(
+            checkpoint,
+            has_properties(
+                last_eventtime=EVENTTIME, last_cel_id=3, processed_cel_count=3
+            ),
+        )
+        self.dao.sweep_checkpoint.delete.assert_called_once_with()
+
+    def test_resume_from_checkpoint(self):
+        self.dao.sweep_checkpoint.find.return_value = SweepCheckpoint(
+            older=EVENTTIME,
+            last_eventtime=EVENTTIME,
+            last_cel_id=42,
+            processed_cel_count=10,
+        )
+
+        self.sweep.run(resume=True)
+
+        self.dao.sweep_checkpoint.create.assert_not_called()
+        first_call = self.dao.cel.find_next_unprocessed.mock_calls[0]
+        assert_that(first_call.kwargs['after'], equal_to((EVENTTIME, 42)))
+        self.dao.sweep_checkpoint.delete.assert_called_once_with()
+
+    def test_resume_without_checkpoint(self):
+        self.dao.sweep_checkpoint.find.return_value = None
+
+        self.sweep.run(resume=True)
+
+        self.dao.cel.find_next_unprocessed.assert_not_called()
+        self.dao.sweep_checkpoint.delete.assert_not_called()
@@ -1,16 +1,23 @@
-# Copyright 2013-2022 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from unittest import TestCase
-from unittest.mock import Mock
+from unittest.mock import MagicMock, Mock, call
 
+from hamcrest import assert_that, calling, contains_exactly, equal_to, raises
+from psycopg2.errors import ForeignKeyViolation
+from sqlalchemy.exc import IntegrityError
+
+from wazo_call_logd.exceptions import DatabaseServiceUnavailable
 from wazo_call_logd.generator import CallLogsCreation
 from wazo_call_logd.writer import CallLogsWriter
 
 
 class TestCallLogsWriter(TestCase):
     def setUp(self):
-        self.dao = Mock()
+        self.dao = MagicMock()
+        self.dao.call_log.update_from_list.return_value = []
+        self.dao.pending_cel_association.find_all_by_cel_ids.return_value = []
         self.writer = CallLogsWriter(self.dao)
 
     def tearDown(self):
@@ -27,6 +34,208 @@ class TestCallLogsWriter(TestCase):
         self.dao.call_log.create_from_list.assert_called_once_with(
             call_logs_creation.new_call_logs
         )
-        self.dao.call_log.delete_from_list.assert_called_once_with(
-            call_logs_creation.call_logs_to_delete
+        self.dao.call_log.delete_from_list.assert_called_once_with(set())
+
+    def test_write_in_a_single_transaction(self):
+        self.dao.cel_in_same_database = True
+        call_logs_creation = CallLogsCreation(
+            new_call_logs=[Mock(recordings=[])], call_logs_to_delete=[1]
+        )
+
+        self.writer.write(call_logs_creation)
+
+        assert_that(
+            [name for name, _, _ in self.dao.mock_calls],
+            contains_exactly(
+                'transaction',
+                'transaction().__enter__',
+                'tenant.create_all_uuids_if_not_exist',
+                'call_log.update_from_list',
+                'call_log.delete_from_list',
+                'call_log.create_from_list',
+                'cel.unassociate_all_from_call_log_ids',
+                'cel.associate_all_to_call_logs',
+                'transaction().__exit__',
+                'tenant.remember_uuids',
+            ),
+        )
+
+    def test_write_in_two_phases(self):
+        self.dao.cel_in_same_database = False
+        call_logs_creation = CallLogsCreation(
+            new_call_logs=[Mock(cel_ids=[10], recordings=[])], call_logs_to_delete=[1]
+        )
+
+        self.writer.write(call_logs_creation)
+
+        assert_that(
+            [name for name, _, _ in self.dao.mock_calls],
+            contains_exactly(
+                'transaction',
+                'transaction().__enter__',
+                'tenant.create_all_uuids_if_not_exist',
+                'pending_cel_association.find_all_by_cel_ids',
+                'call_log.update_from_list',
+                'call_log.delete_from_list',
+                'call_log.create_from_list',
+                'pending_cel_association.delete_from_list',
+                'pending_cel_association.create',
+                'transaction().__exit__',
+                'tenant.remember_uuids',
+                'cel_transaction',
+                'cel_transaction().__enter__',
+                'cel.unassociate_all_from_call_log_ids',
+                'cel.associate_all',
+                'cel_transaction().__exit__',
+                'pending_cel_association.delete_from_list',
+            ),
+        )
+
+    def test_write_in_two_phases_replaces_pending_associations(self):
+        self.dao.cel_in_same_database = False
+        self.dao.pending_cel_association.find_all_by_cel_ids.return_value = [
+            Mock(id=42, call_log_ids=[3, 3], unassociated_call_log_ids=[2]),
+        ]
+        self.dao.pending_cel_association.create.return_value = Mock(id=43)
+        new_call_log = Mock(id=4, cel_ids=[10, 11], recordings=[])
+        call_logs_creation = CallLogsCreation(
+            new_call_logs=[new_call_log], call_logs_to_delete={1}
+        )
+
+        self.writer.write(call_logs_creation)
+
+        self.dao.pending_cel_association.find_all_by_cel_ids.assert_called_once_with(
+            {10, 11}
+        )
+        self.dao.call_log.update_from_list.assert_called_once_with(
+            [new_call_log], {1, 2, 3}
+        )
+        self.dao.call_log.delete_from_list.assert_called_once_with({1, 2, 3})
+        self.dao.pending_cel_association.create.assert_called_once_with(
+            [10, 11], [4, 4], {1, 2, 3}
+        )
+        self.dao.cel.unassociate_all_from_call_log_ids.assert_called_once_with(
+            {1, 2, 3}
+        )
+        self.dao.cel.associate_all.assert_called_once_with([10, 11], [4, 4])
+        assert_that(
+            self.dao.pending_cel_association.delete_from_list.call_args_list,
+            contains_exactly(call([42]), call([43])),
+        )
+
+    def test_write_when_a_known_tenant_was_deleted(self):
+        self.dao.cel_in_same_database = True
+        error = Mock(spec=ForeignKeyViolation)
+        error.diag.constraint_name = 'call_logd_call_log_tenant_uuid_fkey'
+        self.dao.call_log.create_from_list.side_effect = [
+            IntegrityError('INSERT', {}, error),
+            None,
+        ]
+        call_logs_creation = CallLogsCreation(
+            new_call_logs=[Mock(recordings=[])], call_logs_to_delete=None
+        )
+
+        self.writer.write(call_logs_creation)
+
+        self.dao.tenant.forget_all_uuids.assert_called_once_with()
+        assert_that(self.dao.call_log.create_from_list.call_count, equal_to(2))
+
+    def test_write_remembers_tenants_once_committed(self):
+        self.dao.cel_in_same_database = True
+        created = self.dao.tenant.create_all_uuids_if_not_exist.return_value
+        call_logs_creation = CallLogsCreation(
+            new_call_logs=[Mock(tenant_uuid='tenant', recordings=[])],
+            call_logs_to_delete=None,
+        )
+
+        self.writer.write(call_logs_creation)
+
+        self.dao.tenant.create_all_uuids_if_not_exist.assert_called_once_with(
+            {'tenant'}
+        )
+        self.dao.tenant.remember_uuids.assert_called_once_with(created)
+
+    def test_write_does_not_remember_tenants_when_rolled_back(self):
+        self.dao.cel_in_same_database = True
+        self.dao.call_log.create_from_list.side_effect = Exception()
+        call_logs_creation = CallLogsCreation(
+            new_call_logs=[Mock(recordings=[])], call_logs_to_delete=None
+        )
+
+        assert_that(
+            calling(self.writer.write).with_args(call_logs_creation),
+            raises(Exception),
+        )
+        self.dao.tenant.remember_uuids.assert_not_called()
+
+    def test_write_other_integrity_errors(self):
+        self.dao.cel_in_same_database = True
+        error = Mock(spec=ForeignKeyViolation)
+        error.diag.constraint_name = 'other_fkey'
+        self.dao.call_log.create_from_list.side_effect = IntegrityError(
+            'INSERT', {}, error
+        )
+        call_logs_creation = CallLogsCreation(
+            new_call_logs=[Mock(recordings=[])], call_logs_to_delete=None
+        )
+
+        assert_that(
+            calling(self.writer.write).with_args(call_logs_creation),
+            raises(IntegrityError),
+        )
+        self.dao.tenant.forget_all_uuids.assert_not_called()
+
+    def test_associate_pending(self):
+        self.dao.pending_cel_association.find_all.return_value = [
+            Mock(
+                id=42,
+                cel_ids=[10, 11, 12],
+                call_log_ids=[3, 3, 4],
+                unassociated_call_log_ids=[2],
+            ),
+        ]
+        self.dao.call_log.find_existing_ids.return_value = {3}
+
+        self.writer.associate_pending()
+
+        self.dao.call_log.find_existing_ids.assert_called_once_with({3, 4})
+        self.dao.cel.unassociate_all_from_call_log_ids.assert_called_once_with([2])
+        self.dao.cel.associate_all.assert_called_once_with([10, 11], [3, 3])
+        self.dao.pending_cel_association.delete_from_list.assert_called_once_with([42])
+
+    def test_associate_pending_keeps_failed_associations(self):
+        self.dao.pending_cel_association.find_all.return_value = [
+            Mock(id=42, cel_ids=[10], call_log_ids=[3], unassociated_call_log_ids=[]),
+        ]
+        self.dao.call_log.find_existing_ids.return_value = {3}
+        self.dao.cel.associate_all.side_effect = DatabaseServiceUnavailable()
+
+        assert_that(
+            calling(self.writer.associate_pending),
+            raises(DatabaseServiceUnavailable),
+        )
+
+        self.dao.pending_cel_association.delete_from_list.assert_not_called()
+
+    def test_write_updates_regenerated_call_logs(self):
+        self.dao.cel_in_same_database = True
+        updated_call_log = Mock(id=1, recordings=[])
+        new_call_log = Mock(recordings=[])
+        self.dao.call_log.update_from_list.return_value = [updated_call_log]
+        call_logs_creation = CallLogsCreation(
+            new_call_logs=[updated_call_log, new_call_log],
+            call_logs_to_delete={1, 2},
+        )
+
+        result = self.writer.write(call_logs_creation)
+
+        assert_that(result, contains_exactly(updated_call_log))
+        self.dao.call_log.update_from_list.assert_called_once_with(
+            call_logs_creation.new_call_logs, {1, 2}
+        )
+        self.dao.call_log.delete_from_list.assert_called_once_with({2})
+        self.dao.call_log.create_from_list.assert_called_once_with([new_call_log])
+        self.dao.cel.unassociate_all_from_call_log_ids.assert_called_once_with({2})
+        self.dao.cel.associate_all_to_call_logs.assert_called_once_with(
+            call_logs_creation.new_call_logs
         )
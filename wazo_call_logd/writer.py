@@ -1,16 +1,155 @@
-# Copyright 2013-2023 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2013-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import logging
+
+from psycopg2.errors import ForeignKeyViolation
+from sqlalchemy import exc
+
+logger = logging.getLogger(__name__)
+
+TENANT_FOREIGN_KEY = 'call_logd_call_log_tenant_uuid_fkey'
+
 
 class CallLogsWriter:
+    """
+    Write the generated call logs and associate their CEL.
+
+    When the CEL are in the call-logd database, everything is written in a
+    single transaction. Otherwise, the call logs are committed first, along
+    with the CEL associations to make, and the CEL associations second. If the
+    second phase fails, the CEL keep their previous call log and the
+    associations stay pending:
+
+    - when the same CEL are written again, e.g. by the next sweep, the call
+      logs of their pending associations are updated or deleted like the
+      existing call logs of the CEL, instead of being duplicated;
+    - the other pending associations are made by `associate_pending`, when
+      wazo-call-logd or wazo-call-logs start.
+
+    Regenerated call logs are updated in place when they keep the conversation
+    of an existing call log of their CEL, the others are deleted.
+    """
+
     def __init__(self, dao):
         self._dao = dao
 
-    def write(self, call_logs):
-        self._dao.call_log.delete_from_list(call_logs.call_logs_to_delete)
-        self._dao.cel.unassociate_all_from_call_log_ids(call_logs.call_logs_to_delete)
+    def write(self, call_logs) -> list:
+        """Return the call logs that were updated in place, the others are new"""
+        try:
+            return self._write(call_logs)
+        except exc.IntegrityError as e:
+            if not _is_unknown_tenant(e):
+                raise
+            # NOTE: tenants are also deleted by wazo-call-logd-sync-db, which
+            # cannot update the known tenants of this process
+            logger.info('Known tenants are outdated, writing the call logs again')
+            self._dao.tenant.forget_all_uuids()
+            return self._write(call_logs)
+
+    def _write(self, call_logs):
+        if self._dao.cel_in_same_database:
+            with self._dao.transaction():
+                tenant_uuids = self._create_tenants(call_logs)
+                deleted_ids, updated_call_logs = self._write_call_logs(call_logs)
+                self._write_cel_associations(call_logs, deleted_ids)
+            self._dao.tenant.remember_uuids(tenant_uuids)
+            return updated_call_logs
 
+        with self._dao.transaction():
+            tenant_uuids = self._create_tenants(call_logs)
+            superseded = self._dao.pending_cel_association.find_all_by_cel_ids(
+                {cel_id for cdr in call_logs.new_call_logs for cel_id in cdr.cel_ids}
+            )
+            pending_call_log_ids = set()
+            for pending in superseded:
+                pending_call_log_ids.update(pending.call_log_ids)
+                pending_call_log_ids.update(pending.unassociated_call_log_ids)
+            deleted_ids, updated_call_logs = self._write_call_logs(
+                call_logs, pending_call_log_ids
+            )
+            self._dao.pending_cel_association.delete_from_list(
+                [pending.id for pending in superseded]
+            )
+            # NOTE: the ids of the new call logs are known once they are written
+            cel_ids, call_log_ids = _cel_associations(call_logs.new_call_logs)
+            pending = self._dao.pending_cel_association.create(
+                cel_ids, call_log_ids, deleted_ids
+            )
+        self._dao.tenant.remember_uuids(tenant_uuids)
+        with self._dao.cel_transaction():
+            self._dao.cel.unassociate_all_from_call_log_ids(deleted_ids)
+            self._dao.cel.associate_all(cel_ids, call_log_ids)
+        self._dao.pending_cel_association.delete_from_list([pending.id])
+        return updated_call_logs
+
+    def associate_pending(self):
+        """
+        Make the CEL associations left pending by a failed write, unless their
+        call logs were deleted since
+        """
+        pendings = self._dao.pending_cel_association.find_all()
+        for pending in pendings:
+            existing_ids = self._dao.call_log.find_existing_ids(
+                set(pending.call_log_ids)
+            )
+            associations = [
+                (cel_id, call_log_id)
+                for cel_id, call_log_id in zip(pending.cel_ids, pending.call_log_ids)
+                if call_log_id in existing_ids
+            ]
+            with self._dao.cel_transaction():
+                self._dao.cel.unassociate_all_from_call_log_ids(
+                    pending.unassociated_call_log_ids
+                )
+                self._dao.cel.associate_all(
+                    [cel_id for cel_id, _ in associations],
+                    [call_log_id for _, call_log_id in associations],
+                )
+            self._dao.pending_cel_association.delete_from_list([pending.id])
+        if pendings:
+            logger.info('Made %s pending CEL associations', len(pendings))
+
+    def _create_tenants(self, call_logs):
+        # NOTE: the tenants created are only known once committed
         tenant_uuids = {cdr.tenant_uuid for cdr in call_logs.new_call_logs}
-        self._dao.tenant.create_all_uuids_if_not_exist(tenant_uuids)
-        self._dao.call_log.create_from_list(call_logs.new_call_logs)
+        return self._dao.tenant.create_all_uuids_if_not_exist(tenant_uuids)
+
+    def _write_call_logs(self, call_logs, pending_call_log_ids=()):
+        existing_ids = set(call_logs.call_logs_to_delete or ()) | set(
+            pending_call_log_ids
+        )
+        updated_call_logs = self._dao.call_log.update_from_list(
+            call_logs.new_call_logs, existing_ids
+        )
+        deleted_ids = existing_ids - {call_log.id for call_log in updated_call_logs}
+        self._dao.call_log.delete_from_list(deleted_ids)
+
+        updated = {id(call_log) for call_log in updated_call_logs}
+        self._dao.call_log.create_from_list(
+            [
+                call_log
+                for call_log in call_logs.new_call_logs
+                if id(call_log) not in updated
+            ]
+        )
+        return deleted_ids, updated_call_logs
+
+    def _write_cel_associations(self, call_logs, deleted_ids):
+        self._dao.cel.unassociate_all_from_call_log_ids(deleted_ids)
         self._dao.cel.associate_all_to_call_logs(call_logs.new_call_logs)
+
+
+def _cel_associations(call_logs):
+    cel_ids, call_log_ids = [], []
+    for call_log in call_logs:
+        cel_ids.extend(call_log.cel_ids)
+        call_log_ids.extend([call_log.id] * len(call_log.cel_ids))
+    return cel_ids, call_log_ids
+
+
+def _is_unknown_tenant(error):
+    return (
+        isinstance(error.orig, ForeignKeyViolation)
+        and error.orig.diag.constraint_name == TENANT_FOREIGN_KEY
+    )